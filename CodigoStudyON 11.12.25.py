@@ -1,1107 +1,4384 @@
 # Versão com JSON + extras: prioridades, pesquisas e relatório diário
 import time
+import datetime
 import sys
 import json
+import bisect
+import collections
+import hashlib
+import heapq
+import itertools
+import threading
+import math
+import unicodedata
 import os
+import re
+import sqlite3
+import argparse
+import csv
+import asyncio
+import secrets
+import urllib.parse
+import atexit
+import functools
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 DADOS_ARQUIVO = "dados.json"
+JOURNAL_ARQUIVO = "dados.journal"
+PASTA_SHARDS = "dados_shards"  # usuarios.json, solicitacoes.json e usuarios/<email>.json
+BANCO_ARQUIVO = "dados.db"
+
+# "json": cada alteração reescreve o dados.json inteiro (padrão)
+# "journal": cada alteração só acrescenta uma linha no JOURNAL_ARQUIVO,
+#            que é compactado de volta no dados.json de tempos em tempos
+# "shards": usuários, solicitações e cada área de usuário em arquivos
+#           separados dentro de PASTA_SHARDS; a área só é lida no login
+# "sqlite": tabelas no BANCO_ARQUIVO; cada alteração regrava só as linhas
+#           do trecho e a área de cada usuário só é lida no login
+MODO_PERSISTENCIA = os.environ.get("STUDYON_PERSISTENCIA", "json")
+LIMITE_JOURNAL = 200  # operações acumuladas antes de compactar
+
+operacoes_no_journal = 0
+
+# as threads do Pomodoro e dos lembretes também gravam dados: uma gravação por
+# vez. O menu fica com a trava_dados o tempo todo e só a solta enquanto espera
+# o usuário (perguntar), então elas nunca gravam no meio de uma alteração do menu.
+trava_dados = threading.RLock()
+
+def perguntar(texto=""):
+    """input() do menu, sem a trava_dados enquanto espera a resposta."""
+    trava_dados.release()
+    try:
+        return input(texto)
+    finally:
+        trava_dados.acquire()
+
+# ----------------- Vários terminais no mesmo arquivo -----------------
+# Toda leitura e gravação dos arquivos de dados acontece com a trava do
+# TRAVA_ARQUIVO, que também vale entre processos. No modo json,
+# dados["versao"] conta as gravações e dados["versoes"] guarda, para cada
+# unidade (um usuário, uma solicitação, um campo da área de um usuário),
+# [versão em que foi gravada, resumo do conteúdo]. Ao salvar, se outro
+# processo gravou depois da nossa última leitura, as unidades que ele mexeu
+# são trazidas para a memória e as nossas vão por cima; se os dois mexeram
+# na mesma unidade, vale a dele e a nossa alteração é descartada com um aviso.
+
+TRAVA_ARQUIVO = DADOS_ARQUIVO + ".lock"
+
+versao_lida = 0         # dados["versao"] na última leitura/gravação deste processo
+assinatura_lida = None  # (inode, mtime, tamanho) do arquivo nesse momento
+
+class TravaArquivo:
+    """Trava exclusiva entre processos; dentro do processo pode ser aninhada."""
+
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+        self.nivel = 0
+        self.f = None
+
+    def __enter__(self):
+        trava_dados.acquire()
+        if self.nivel == 0:
+            self.f = open(self.arquivo, "a+b")
+            if fcntl:
+                fcntl.flock(self.f, fcntl.LOCK_EX)
+            else:
+                self.f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self.f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        pass  # LK_LOCK desiste depois de 10 s: continua esperando
+        self.nivel += 1
+        return self
+
+    def __exit__(self, *erro):
+        self.nivel -= 1
+        if self.nivel == 0:
+            if fcntl:
+                fcntl.flock(self.f, fcntl.LOCK_UN)
+            else:
+                self.f.seek(0)
+                msvcrt.locking(self.f.fileno(), msvcrt.LK_UNLCK, 1)
+            self.f.close()
+            self.f = None
+        trava_dados.release()
+
+trava_arquivo = TravaArquivo(TRAVA_ARQUIVO)
+
+def assinatura_arquivo():
+    """Muda sempre que o arquivo é regravado (os.replace troca o inode)."""
+    try:
+        st = os.stat(DADOS_ARQUIVO)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+# ----------------- Medição de desempenho -----------------
+# Com STUDYON_MEDIR=1 (ou a opção --medir), as funções marcadas com @medido
+# contam chamadas e tempos; as que passam de LIMITE_LENTO_MS são anotadas no
+# LOG_OPERACOES_LENTAS e ao sair é mostrado um resumo. Desligada, @medido
+# devolve a própria função e não custa nada.
+
+MEDIR = os.environ.get("STUDYON_MEDIR", "") not in ("", "0")
+LIMITE_LENTO_MS = float(os.environ.get("STUDYON_LIMITE_LENTO_MS", "200"))
+LOG_OPERACOES_LENTAS = "operacoes_lentas.log"
+FAIXAS_MS = [0.01, 0.1, 1, 10, 100, 1000]  # limites das faixas do histograma
+
+medicoes = {}         # nome -> {"chamadas", "total_ms", "maximo_ms", "faixas"}
+funcoes_medidas = []  # nomes (qualname) das funções marcadas com @medido
+trava_medicoes = threading.Lock()
+
+def medido(funcao):
+    """Marca a função para ser medida quando a medição estiver ligada."""
+    funcoes_medidas.append(funcao.__qualname__)
+    return cronometrar(funcao) if MEDIR else funcao
+
+def cronometrar(funcao):
+    nome = funcao.__qualname__
+
+    @functools.wraps(funcao)
+    def medida(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            registrar_medicao(nome, (time.perf_counter() - inicio) * 1000)
+    return medida
+
+def registrar_medicao(nome, ms):
+    with trava_medicoes:
+        m = medicoes.get(nome)
+        if m is None:
+            m = medicoes[nome] = {"chamadas": 0, "total_ms": 0.0, "maximo_ms": 0.0,
+                                  "faixas": [0] * (len(FAIXAS_MS) + 1)}
+        m["chamadas"] += 1
+        m["total_ms"] += ms
+        m["maximo_ms"] = max(m["maximo_ms"], ms)
+        m["faixas"][bisect.bisect_left(FAIXAS_MS, ms)] += 1
+    if ms > LIMITE_LENTO_MS:
+        agora = datetime.datetime.now().isoformat(sep=" ", timespec="seconds")
+        with open(LOG_OPERACOES_LENTAS, "a", encoding="utf-8") as f:
+            f.write(f"{agora} {nome} {ms:.1f} ms\n")
+
+def ativar_medicao(limite_ms=None):
+    """Liga a medição com o programa já carregado (opção --medir): troca as
+    funções marcadas pelas versões medidas, nos módulos e nas classes."""
+    global MEDIR, LIMITE_LENTO_MS
+    if limite_ms is not None:
+        LIMITE_LENTO_MS = limite_ms
+    if MEDIR:
+        return
+    MEDIR = True
+    for qualname in funcoes_medidas:
+        classe, _, nome = qualname.rpartition(".")
+        dono = globals()[classe] if classe else None
+        if dono is None:
+            globals()[nome] = cronometrar(globals()[nome])
+        else:
+            setattr(dono, nome, cronometrar(getattr(dono, nome)))
+    atexit.register(mostrar_medicoes)
+
+def mostrar_medicoes():
+    """Resumo por operação, da que mais tomou tempo para a que menos tomou."""
+    if not medicoes:
+        return
+    faixas = [f"<{limite:g}" for limite in FAIXAS_MS] + [f">={FAIXAS_MS[-1]:g}"]
+    print("\n" + "MEDIÇÃO DE DESEMPENHO (ms)".center(130), file=sys.stderr)
+    print(f"{'operação':<34}{'chamadas':>9}{'total':>11}{'média':>10}{'máximo':>10}  "
+          + "".join(f"{f:>8}" for f in faixas), file=sys.stderr)
+    for nome, m in sorted(medicoes.items(), key=lambda item: -item[1]["total_ms"]):
+        print(f"{nome:<34}{m['chamadas']:>9}{m['total_ms']:>11.1f}{m['total_ms'] / m['chamadas']:>10.3f}"
+              f"{m['maximo_ms']:>10.1f}  " + "".join(f"{n:>8}" for n in m["faixas"]), file=sys.stderr)
+    print(f"Operações acima de {LIMITE_LENTO_MS:g} ms ficam em {LOG_OPERACOES_LENTAS}.", file=sys.stderr)
+
+if MEDIR:
+    atexit.register(mostrar_medicoes)
+
+# ----------------- Horários e dias padrão -----------------
+# Um só objeto em memória para todos os usuários que nunca mudaram os seus
+# horários ou dias (tuplas: mudar sem copiar antes dá erro em vez de alterar
+# todo mundo). Quem muda ganha a própria lista (lista_propria). Enquanto a área
+# aponta para o padrão, o campo não vai para o arquivo: chave ausente = padrão.
+
+HORARIOS_PADRAO = (
+    '07:00 - 08:00',
+    '08:00 - 09:00',
+    '09:00 - 10:00',
+    '10:00 - 11:00',
+    '11:00 - 12:00',
+    '14:00 - 16:00',
+    '16:00 - 17:00',
+    '17:00 - 18:00'
+)
+DIAS_PADRAO = ('Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado')
+PADROES_AREA = {"horarios": HORARIOS_PADRAO, "dias": DIAS_PADRAO}
+
+def lista_propria(u, campo):
+    """Cópia na escrita: a lista do usuário, copiada do padrão se ainda for ele."""
+    if u[campo] is PADROES_AREA[campo]:
+        u[campo] = list(u[campo])
+    return u[campo]
+
+def area_para_gravar(u):
+    """A área sem os campos que ainda apontam para o padrão compartilhado."""
+    if not any(u.get(campo) is padrao for campo, padrao in PADROES_AREA.items()):
+        return u
+    return {k: v for k, v in u.items() if PADROES_AREA.get(k) is not v}
 
 # ----------------- Funções JSON -----------------
 
+def dados_padrao():
+    """Estrutura inicial: só o admin padrão."""
+    return {
+        "usuarios": [["admin", "admin@sistema.com", "123456", True]],
+        "solicitacoes": [],
+        "usuarios_dados": {}
+    }
+
+def ler_arquivo_dados():
+    """Lê o DADOS_ARQUIVO (com a trava_arquivo). Se não existir, devolve o padrão.
+
+    Um erro de leitura (permissão, disco) sobe para quem chamou: voltar ao
+    padrão faria a próxima gravação apagar os dados de verdade."""
+    global assinatura_lida
+    if not os.path.exists(DADOS_ARQUIVO):
+        return dados_padrao()
+    try:
+        with open(DADOS_ARQUIVO, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        # com a gravação atômica isso não deveria acontecer; o arquivo é
+        # guardado à parte em vez de ser sobrescrito pelo padrão
+        copia = f"{DADOS_ARQUIVO}.corrompido-{int(time.time())}"
+        os.replace(DADOS_ARQUIVO, copia)
+        print(f"Aviso: {DADOS_ARQUIVO} estava ilegível e foi guardado como {copia}.")
+        restaurados, nome = reconstruir_snapshot()
+        if restaurados is None:
+            return dados_padrao()
+        salvar_dados(restaurados)
+        print(f"Os dados foram restaurados do snapshot de {instante_snapshot(nome):%d/%m/%Y %H:%M:%S}.")
+        return restaurados
+    migrar(dados, MIGRACOES_ARQUIVO)
+    assinatura_lida = assinatura_arquivo()
+    return dados
+
+@medido
 def carregar_dados():
-    """Carrega dados do arquivo JSON. Se não existir, cria com admin padrão."""
-    if os.path.exists(DADOS_ARQUIVO):
+    """Carrega os dados do armazenamento escolhido. Se não existirem, cria com admin padrão."""
+    dados = armazenamento.carregar()
+    migrar(dados, MIGRACOES_ARQUIVO)
+    return dados
+
+def gravar_atomico(arquivo, partes):
+    """Grava num temporário e troca pelo arquivo de uma vez: quem lê vê o
+    conteúdo antigo ou o novo, nunca um arquivo pela metade."""
+    temporario = f"{arquivo}.{os.getpid()}.tmp"
+    with open(temporario, "wb") as f:
+        f.writelines(partes)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, arquivo)
+
+def gravar_json(arquivo, valor):
+    gravar_atomico(arquivo, [json.dumps(valor, indent=4, ensure_ascii=False).encode("utf-8")])
+
+@medido
+def salvar_dados(dados):
+    """Salva o dicionário completo no arquivo JSON (no mesmo formato do
+    json.dump com indent=4) e grava o índice de posições.
+
+    Áreas que estão no arquivo mas não em memória (ainda não lidas, ou de um
+    usuário criado em outro terminal) são copiadas de lá como estão."""
+    global assinatura_lida, indice_lido
+    areas = dados["usuarios_dados"]
+    no_arquivo = areas_no_arquivo(areas)
+    partes = [b"{"]
+    tamanho = 1
+    indice = {"chaves": {}, "areas": {}}
+    for n, (chave, valor) in enumerate(dados.items()):
+        cabeca = f'{"," if n else ""}\n    {texto_json(chave)}: '.encode("utf-8")
+        partes.append(cabeca)
+        tamanho += len(cabeca)
+        inicio = tamanho
+        if chave != "usuarios_dados":
+            trecho = json_aninhado(valor, 1)
+            partes.append(trecho)
+            tamanho += len(trecho)
+        else:
+            emails = list(no_arquivo) + [e for e in areas if e not in no_arquivo]
+            partes.append(b"{" if emails else b"{}")
+            tamanho += 1 if emails else 2
+            for i, email in enumerate(emails):
+                cabeca = f'{"," if i else ""}\n        {texto_json(email)}: '.encode("utf-8")
+                trecho = no_arquivo.get(email) or json_aninhado(area_para_gravar(areas[email]), 2)
+                partes += [cabeca, trecho]
+                tamanho += len(cabeca)
+                indice["areas"][email] = [tamanho, tamanho + len(trecho)]
+                tamanho += len(trecho)
+            if emails:
+                partes.append(b"\n    }")
+                tamanho += 6
+        indice["chaves"][chave] = [inicio, tamanho]
+    partes.append(b"\n}")
+    gravar_atomico(DADOS_ARQUIVO, partes)
+    assinatura_lida = assinatura_arquivo()
+    indice["assinatura"] = list(assinatura_lida)
+    gravar_atomico(INDICE_ARQUIVO, [json.dumps(indice, ensure_ascii=False).encode("utf-8")])
+    indice_lido = (assinatura_lida, indice)
+    if snapshot_vencido():
+        try:
+            tirar_snapshot()
+        except OSError as erro:
+            print(f"Aviso: não foi possível gravar o snapshot ({erro}).")
+
+# ----------------- Índice de posições (modo json) -----------------
+# A cada gravação, o INDICE_ARQUIVO guarda onde (em bytes) começa e termina
+# no dados.json cada tabela e a área de cada usuário, junto com a assinatura
+# do arquivo gravado. Ao iniciar, só as tabelas são lidas e cada área é lida
+# pelo índice quando o usuário faz login; ao gravar, as áreas que não foram
+# lidas são copiadas byte a byte do arquivo atual, sem passar pelo json.
+# Se o índice não bater com o arquivo (ex.: gravado por uma versão anterior),
+# o dados.json é lido inteiro, como antes.
+
+INDICE_ARQUIVO = DADOS_ARQUIVO + ".indice"
+
+indice_lido = None  # (assinatura do dados.json, índice) do último índice lido ou gravado
+
+# o mesmo que json.dumps(texto, ensure_ascii=False), sem o custo de montar um codificador a cada chave
+texto_json = json.encoder.encode_basestring
+
+def json_aninhado(valor, nivel):
+    """O texto que o json.dump(indent=4) do arquivo inteiro gera para `valor` nesse nível."""
+    # strings em JSON não têm quebra de linha literal: toda quebra é da indentação
+    texto = json.dumps(valor, indent=4, ensure_ascii=False)
+    return texto.replace("\n", "\n" + "    " * nivel).encode("utf-8")
+
+def ler_indice():
+    """Índice do DADOS_ARQUIVO como está agora, ou None se não houver um válido."""
+    global indice_lido
+    assinatura = assinatura_arquivo()
+    if assinatura is None:
+        return None
+    if indice_lido is not None and indice_lido[0] == assinatura:
+        return indice_lido[1]
+    try:
+        with open(INDICE_ARQUIVO, "r", encoding="utf-8") as f:
+            indice = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if tuple(indice.get("assinatura") or ()) != assinatura:
+        return None
+    indice_lido = (assinatura, indice)
+    return indice
+
+def ler_trecho(f, posicao):
+    inicio, fim = posicao
+    f.seek(inicio)
+    return f.read(fim - inicio)
+
+def ler_tabelas_indexadas():
+    """Lê do DADOS_ARQUIVO tudo menos as áreas dos usuários (com a trava_arquivo).
+    Devolve None se não houver índice válido."""
+    global assinatura_lida
+    indice = ler_indice()
+    if indice is None:
+        return None
+    dados = {}
+    with open(DADOS_ARQUIVO, "rb") as f:
+        try:
+            for chave, posicao in indice["chaves"].items():
+                dados[chave] = {} if chave == "usuarios_dados" else json.loads(ler_trecho(f, posicao))
+        except ValueError:
+            return None  # o arquivo inteiro é lido (e restaurado, se preciso)
+    assinatura_lida = tuple(indice["assinatura"])
+    return dados
+
+def ler_area_indexada(email):
+    """Área do usuário (ou None) e as versões gravadas no DADOS_ARQUIVO atual (com a trava_arquivo)."""
+    indice = ler_indice()
+    if indice is None:
+        if not os.path.exists(DADOS_ARQUIVO):
+            return None, {}
+        with open(DADOS_ARQUIVO, "r", encoding="utf-8") as f:
+            disco = json.load(f)
+        return disco.get("usuarios_dados", {}).get(email), disco.get("versoes", {})
+    posicao = indice["areas"].get(email)
+    if posicao is None:
+        return None, {}
+    with open(DADOS_ARQUIVO, "rb") as f:
+        area = json.loads(ler_trecho(f, posicao))
+        versoes = indice["chaves"].get("versoes")
+        return area, {} if versoes is None else json.loads(ler_trecho(f, versoes))
+
+def areas_no_arquivo(areas):
+    """E-mails das áreas do DADOS_ARQUIVO atual, na ordem do arquivo, com o
+    trecho já pronto para as que não estão em `areas` (None para as que estão)."""
+    if not os.path.exists(DADOS_ARQUIVO):
+        return {}
+    indice = ler_indice()
+    if indice is None:
+        # arquivo sem índice válido: só lendo tudo para saber o que há nele
         try:
             with open(DADOS_ARQUIVO, "r", encoding="utf-8") as f:
-                dados = json.load(f)
-            # garantir chaves existentes
-            if "usuarios" not in dados:
-                dados["usuarios"] = [["admin", "admin@sistema.com", "123456", True]]
-            if "solicitacoes" not in dados:
-                dados["solicitacoes"] = []
-            if "usuarios_dados" not in dados:
-                dados["usuarios_dados"] = {}
-            return dados
-        except (json.JSONDecodeError, IOError):
-            # arquivo corrompido: sobrescrever com padrão
-            return {
-                "usuarios": [["admin", "admin@sistema.com", "123456", True]],
-                "solicitacoes": [],
-                "usuarios_dados": {}
-            }
+                no_arquivo = json.load(f).get("usuarios_dados", {})
+        except (OSError, ValueError):
+            return {}
+        return {e: None if e in areas else json_aninhado(a, 2) for e, a in no_arquivo.items()}
+    with open(DADOS_ARQUIVO, "rb") as f:
+        return {e: None if e in areas else ler_trecho(f, p) for e, p in indice["areas"].items()}
+
+# ----------------- Snapshots -----------------
+# De tempos em tempos (INTERVALO_SNAPSHOT segundos, contados a partir do
+# snapshot mais recente na pasta), a gravação do dados.json também guarda uma
+# cópia comprimida com zlib em PASTA_SNAPSHOTS. O primeiro snapshot (e depois
+# um a cada INCREMENTAIS_POR_BASE) é completo; os outros guardam as tabelas e
+# só as áreas de usuário cujo trecho no arquivo mudou desde o anterior, pelo
+# resumo de cada trecho guardado em ESTADO_SNAPSHOTS. Restaurar um momento é
+# ler o último completo até ele e aplicar os incrementais seguintes em ordem.
+# Só vale para o dados.json (modos json e journal).
+
+PASTA_SNAPSHOTS = "dados_snapshots"
+ESTADO_SNAPSHOTS = os.path.join(PASTA_SNAPSHOTS, "estado.json")
+INTERVALO_SNAPSHOT = float(os.environ.get("STUDYON_INTERVALO_SNAPSHOT", "600"))
+INCREMENTAIS_POR_BASE = 24
+BASES_MANTIDAS = 3  # snapshots anteriores à mais antiga delas são apagados
+NIVEL_COMPRESSAO = 6
+FORMATO_SNAPSHOT = "%Y%m%d-%H%M%S-%f"  # início do nome: a ordem alfabética é a cronológica
+EXTENSAO_SNAPSHOT = ".json.z"
+
+proximo_snapshot = None  # time.time() a partir do qual a próxima gravação tira um snapshot
+
+def listar_snapshots():
+    """Nomes dos snapshots, do mais antigo ao mais recente."""
+    try:
+        nomes = os.listdir(PASTA_SNAPSHOTS)
+    except FileNotFoundError:
+        return []
+    return sorted(n for n in nomes if n.endswith(EXTENSAO_SNAPSHOT))
+
+def instante_snapshot(nome):
+    return datetime.datetime.strptime(nome[:22], FORMATO_SNAPSHOT)
+
+def tipo_snapshot(nome):
+    """Devolve "completo" ou "incremental"."""
+    return nome[23:-len(EXTENSAO_SNAPSHOT)]
+
+def ler_snapshot(nome):
+    with open(os.path.join(PASTA_SNAPSHOTS, nome), "rb") as f:
+        return json.loads(zlib.decompress(f.read()))
+
+def resumo_trecho(trecho):
+    return hashlib.sha1(trecho).hexdigest()[:16]
+
+def snapshot_vencido():
+    """Se já passou o INTERVALO_SNAPSHOT desde o snapshot mais recente (de qualquer terminal)."""
+    global proximo_snapshot
+    agora = time.time()
+    if proximo_snapshot is not None and agora < proximo_snapshot:
+        return False
+    nomes = listar_snapshots()
+    ultimo = instante_snapshot(nomes[-1]).timestamp() if nomes else 0
+    proximo_snapshot = ultimo + INTERVALO_SNAPSHOT
+    return agora >= proximo_snapshot
+
+def tirar_snapshot(completo=False):
+    """Guarda o DADOS_ARQUIVO atual em PASTA_SNAPSHOTS (com a trava_arquivo).
+    Devolve o nome do snapshot, ou None se nada mudou desde o anterior."""
+    global proximo_snapshot
+    os.makedirs(PASTA_SNAPSHOTS, exist_ok=True)
+    try:
+        with open(ESTADO_SNAPSHOTS, "r", encoding="utf-8") as f:
+            estado = json.load(f)
+    except (OSError, ValueError):
+        estado = {}
+    nomes = listar_snapshots()
+    indice = ler_indice()
+    with open(DADOS_ARQUIVO, "rb") as f:
+        conteudo = f.read()
+    proximo_snapshot = time.time() + INTERVALO_SNAPSHOT
+
+    resumos = tabelas = None
+    if indice is not None:
+        trechos = {chave: conteudo[i:j] for chave, (i, j) in indice["chaves"].items() if chave != "usuarios_dados"}
+        tabelas = resumo_trecho(b"".join(trechos.values()))
+        resumos = {e: resumo_trecho(conteudo[i:j]) for e, (i, j) in indice["areas"].items()}
+    # sem o estado do snapshot anterior não há com o que comparar
+    completo = (completo or resumos is None or not nomes or estado.get("ultimo") != nomes[-1]
+                or estado.get("resumos") is None or estado.get("incrementais", 0) >= INCREMENTAIS_POR_BASE)
+
+    agora = datetime.datetime.now()
+    cabeca = f'{{"tipo": "{"completo" if completo else "incremental"}", "data": "{agora.isoformat(timespec="seconds")}"'
+    if completo:
+        partes = [cabeca.encode("utf-8"), b', "dados": ', conteudo, b"}"]
     else:
-        return {
-            "usuarios": [["admin", "admin@sistema.com", "123456", True]],
-            "solicitacoes": [],
-            "usuarios_dados": {}
-        }
+        anteriores = estado["resumos"]
+        alteradas = [e for e, r in resumos.items() if anteriores.get(e) != r]
+        removidas = [e for e in anteriores if e not in resumos]
+        if not alteradas and not removidas and tabelas == estado.get("tabelas"):
+            return None
+        partes = [cabeca.encode("utf-8"),
+                  f', "anterior": {texto_json(nomes[-1])}, "removidas": {json.dumps(removidas, ensure_ascii=False)}'
+                  f', "tabelas": {{'.encode("utf-8")]
+        for n, (chave, trecho) in enumerate(trechos.items()):
+            partes += [f'{", " if n else ""}{texto_json(chave)}: '.encode("utf-8"), trecho]
+        partes.append(b'}, "areas": {')
+        for n, email in enumerate(alteradas):
+            i, j = indice["areas"][email]
+            partes += [f'{", " if n else ""}{texto_json(email)}: '.encode("utf-8"), conteudo[i:j]]
+        partes.append(b"}}")
+
+    nome = f'{agora.strftime(FORMATO_SNAPSHOT)}-{"completo" if completo else "incremental"}{EXTENSAO_SNAPSHOT}'
+    compressor = zlib.compressobj(NIVEL_COMPRESSAO)
+    gravar_atomico(os.path.join(PASTA_SNAPSHOTS, nome),
+                   [compressor.compress(p) for p in partes] + [compressor.flush()])
+    gravar_json(ESTADO_SNAPSHOTS, {"ultimo": nome,
+                                   "incrementais": 0 if completo else estado["incrementais"] + 1,
+                                   "tabelas": tabelas, "resumos": resumos})
+    if completo:
+        bases = [n for n in nomes if tipo_snapshot(n) == "completo"] + [nome]
+        for antigo in nomes:
+            if len(bases) > BASES_MANTIDAS and antigo < bases[-BASES_MANTIDAS]:
+                os.remove(os.path.join(PASTA_SNAPSHOTS, antigo))
+    return nome
+
+def reconstruir_snapshot(ate=None):
+    """Monta os dados do snapshot mais recente com nome <= `ate` (todos, se
+    None). Devolve (dados, nome do snapshot) ou (None, None) se não houver.
+
+    Se um incremental estiver faltando ou ilegível, para no anterior a ele."""
+    nomes = [n for n in listar_snapshots() if ate is None or n <= ate]
+    bases = [i for i, n in enumerate(nomes) if tipo_snapshot(n) == "completo"]
+    for inicio in reversed(bases):
+        try:
+            dados = ler_snapshot(nomes[inicio])["dados"]
+        except (OSError, ValueError, zlib.error):
+            print(f"Aviso: o snapshot {nomes[inicio]} está ilegível.")
+            continue
+        usado = nomes[inicio]
+        for nome in nomes[inicio + 1:]:
+            try:
+                snapshot = ler_snapshot(nome)
+            except (OSError, ValueError, zlib.error):
+                snapshot = None
+            if snapshot is None or snapshot.get("anterior") != usado:
+                print(f"Aviso: a sequência de snapshots se interrompe depois de {usado}.")
+                break
+            dados.update(snapshot["tabelas"])
+            areas = dados.setdefault("usuarios_dados", {})
+            for email in snapshot["removidas"]:
+                areas.pop(email, None)
+            areas.update(snapshot["areas"])
+            usado = nome
+        migrar(dados, MIGRACOES_ARQUIVO)
+        return dados, usado
+    return None, None
+
+def restaurar_snapshot(ate=None):
+    """Substitui o DADOS_ARQUIVO pelo estado reconstruído (com a trava_arquivo).
+    O arquivo atual e o journal são guardados à parte. Devolve o nome do snapshot usado."""
+    restaurados, nome = reconstruir_snapshot(ate)
+    if restaurados is None:
+        return None
+    sufixo = f"antes-da-restauracao-{int(time.time())}"
+    for arquivo in (DADOS_ARQUIVO, JOURNAL_ARQUIVO):
+        if os.path.exists(arquivo):
+            os.replace(arquivo, f"{arquivo}.{sufixo}")
+    salvar_dados(restaurados)
+    return nome
+
+def comando_snapshots(tirar, momento):
+    """--snapshot, --restaurar e --listar-snapshots. Devolve False se não havia o que fazer."""
+    with trava_arquivo:
+        if tirar:
+            if not os.path.exists(DADOS_ARQUIVO):
+                print(f"{DADOS_ARQUIVO} ainda não existe; nada foi guardado.")
+                return False
+            nome = tirar_snapshot()
+            print(f"Snapshot guardado: {nome}" if nome else "Nada mudou desde o último snapshot.")
+            return True
+        if momento is not None:
+            ate = momento or None
+            try:
+                # até o fim daquele minuto ("~" vem depois dos dígitos)
+                ate = datetime.datetime.strptime(momento, "%Y-%m-%d %H:%M").strftime("%Y%m%d-%H%M") + "~"
+            except ValueError:
+                pass  # nome de um snapshot
+            nome = restaurar_snapshot(ate)
+            if nome is None:
+                print("Nenhum snapshot até esse momento; nada foi alterado.")
+                return False
+            print(f"{DADOS_ARQUIVO} restaurado do snapshot de {instante_snapshot(nome):%d/%m/%Y %H:%M:%S} "
+                  f"({nome}). O arquivo anterior foi guardado como {DADOS_ARQUIVO}.antes-da-restauracao-*.")
+            return True
+    nomes = listar_snapshots()
+    if not nomes:
+        print(f"Nenhum snapshot em {PASTA_SNAPSHOTS}/.")
+        return False
+    for nome in nomes:
+        tamanho = os.path.getsize(os.path.join(PASTA_SNAPSHOTS, nome))
+        print(f"  {instante_snapshot(nome):%Y-%m-%d %H:%M:%S}  {tipo_snapshot(nome):<11} {tamanho / 1024:>10.1f} KB  {nome}")
+    return True
+
+# ----------------- Journal de alterações -----------------
+# Cada linha do journal é {"c": caminho, "v": valor}: o caminho é a lista de
+# chaves/índices até o trecho alterado dentro de `dados` e o valor é o conteúdo
+# novo desse trecho; uma linha sem "v" indica que a chave foi removida. Reaplicar uma linha duas vezes dá o mesmo resultado, então
+# uma queda entre gravar o snapshot e limpar o journal não estraga nada.
+
+def aplicar_operacao(dados, caminho, valor):
+    """Grava `valor` no `caminho` dentro de `dados` (índice == len acrescenta na lista)."""
+    alvo = dados
+    for chave in caminho[:-1]:
+        alvo = alvo[chave]
+    ultima = caminho[-1]
+    if isinstance(alvo, list) and ultima == len(alvo):
+        alvo.append(valor)
+    else:
+        alvo[ultima] = valor
+
+def remover_operacao(dados, caminho):
+    """Remove a chave apontada por `caminho` (se ainda existir)."""
+    alvo = dados
+    for chave in caminho[:-1]:
+        alvo = alvo[chave]
+    alvo.pop(caminho[-1], None)
+
+def aplicar_journal(dados):
+    """Reaplica as operações do journal por cima do snapshot carregado."""
+    global operacoes_no_journal
+    operacoes_no_journal = 0
+    if not os.path.exists(JOURNAL_ARQUIVO):
+        return
+    with open(JOURNAL_ARQUIVO, "r", encoding="utf-8") as f:
+        for linha in f:
+            try:
+                operacao = json.loads(linha)
+            except json.JSONDecodeError:
+                # última linha cortada por uma queda no meio da gravação
+                break
+            try:
+                if "v" in operacao:
+                    aplicar_operacao(dados, operacao["c"], operacao["v"])
+                else:
+                    remover_operacao(dados, operacao["c"])
+            except (KeyError, IndexError, TypeError):
+                # caminho que não existe mais no snapshot: ignora
+                pass
+            operacoes_no_journal += 1
+
+def registrar_operacao(caminho):
+    """Acrescenta no journal o valor atual do trecho `caminho` de `dados`."""
+    global operacoes_no_journal
+    valor = dados
+    try:
+        for chave in caminho:
+            valor = valor[chave]
+        if caminho[0] == "usuarios_dados" and len(caminho) == 2:
+            valor = area_para_gravar(valor)
+        operacao = {"c": list(caminho), "v": valor}
+    except KeyError:
+        # o trecho foi apagado (ex.: célula do cronograma esvaziada)
+        operacao = {"c": list(caminho)}
+    linha = json.dumps(operacao, ensure_ascii=False)
+    with open(JOURNAL_ARQUIVO, "a", encoding="utf-8") as f:
+        f.write(linha + "\n")
+    operacoes_no_journal += 1
+
+# ----------------- Armazenamento em shards -----------------
+# Só usuarios.json e solicitacoes.json são lidos ao iniciar; cada área de
+# usuário fica no seu próprio arquivo e só é lida quando ele faz login.
+
+def arquivo_shard_usuario(email):
+    nome = re.sub(r"[^\w@.+-]", "_", email)
+    return os.path.join(PASTA_SHARDS, "usuarios", nome + ".json")
+
+def carregar_shards():
+    """Lê só a tabela de usuários e as solicitações; as áreas ficam para o login."""
+    dados = dados_padrao()
+    for chave in ("usuarios", "solicitacoes"):
+        arquivo = os.path.join(PASTA_SHARDS, chave + ".json")
+        if os.path.exists(arquivo):
+            with open(arquivo, "r", encoding="utf-8") as f:
+                dados[chave] = json.load(f)
+    return dados
+
+def salvar_shards(dados, alteracoes=None):
+    """Grava só os arquivos tocados pelas alterações (sem alterações: tudo que está em memória)."""
+    if alteracoes is None:
+        tabelas = {"usuarios", "solicitacoes"}
+        emails = set(dados["usuarios_dados"])
+    else:
+        tabelas = {c[0] for c in alteracoes if c[0] != "usuarios_dados"}
+        emails = {c[1] for c in alteracoes if c[0] == "usuarios_dados"}
+    os.makedirs(os.path.join(PASTA_SHARDS, "usuarios"), exist_ok=True)
+    for chave in tabelas:
+        gravar_json(os.path.join(PASTA_SHARDS, chave + ".json"), dados[chave])
+    for email in emails:
+        gravar_json(arquivo_shard_usuario(email), area_para_gravar(dados["usuarios_dados"][email]))
+
+# ----------------- Versões e mescla (modo json) -----------------
+
+def resumo(valor):
+    if valor is None:
+        return None
+    texto = json.dumps(valor, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:16]
+
+def unidades_do_caminho(caminho):
+    """Unidades versionadas que um caminho de salvar_tudo pode ter alterado."""
+    if caminho[0] == "usuarios":
+        return ["usuarios/" + usuarios[caminho[1]][1].lower()]
+    if caminho[0] == "solicitacoes":
+        return [f"solicitacoes/{solicitacoes[caminho[1]]['id']}"]
+    email = caminho[1]
+    if len(caminho) > 2:
+        return [f"usuarios_dados/{email}/{caminho[2]}"]
+    return [f"usuarios_dados/{email}/{campo}" for campo in usuarios_dados.get(email, {})]
+
+def valor_unidade(d, chave, posicoes):
+    """Conteúdo da unidade dentro de `d` (None se não existir)."""
+    tabela, _, resto = chave.partition("/")
+    if tabela == "usuarios_dados":
+        email, _, campo = resto.rpartition("/")
+        area = d["usuarios_dados"].get(email)
+        if area is None:
+            return None
+        return area.get(campo, PADROES_AREA.get(campo))
+    pos = posicoes[tabela].get(resto)
+    return None if pos is None else d[tabela][pos]
+
+def posicoes_unidades(d):
+    """Posição de cada usuário (por e-mail) e de cada solicitação (por id) em `d`."""
+    return {
+        "usuarios": {u[1].lower(): i for i, u in enumerate(d["usuarios"])},
+        "solicitacoes": {str(s.get("id")): i for i, s in enumerate(d["solicitacoes"])}
+    }
+
+def atualizar_no_lugar(atual, novo):
+    """Copia `novo` para dentro de `atual` sem trocar o objeto (o menu guarda
+    referências para as listas da área do usuário)."""
+    if isinstance(atual, list):
+        atual[:] = novo
+    else:
+        atual.clear()
+        atual.update(novo)
+
+def trazer_unidade(chave, valor, posicoes):
+    """Substitui na memória a unidade pelo valor lido do arquivo."""
+    tabela, _, resto = chave.partition("/")
+    if tabela == "usuarios_dados":
+        email, _, campo = resto.rpartition("/")
+        if email not in usuarios_dados:
+            return  # área ainda não lida: fica no arquivo até o login
+        area = usuarios_dados[email]
+        indices_usuarios.pop(email, None)
+        if valor is None:
+            area.pop(campo, None)
+        elif type(area.get(campo)) is type(valor) and isinstance(valor, (list, dict)):
+            atualizar_no_lugar(area[campo], valor)
+        else:
+            area[campo] = valor
+        return
+    lista = usuarios if tabela == "usuarios" else solicitacoes
+    pos = posicoes[tabela].get(resto)
+    if pos is None:
+        posicoes[tabela][resto] = len(lista)
+        lista.append(valor)
+    else:
+        lista[pos] = valor
+
+def descrever_unidade(chave):
+    tabela, _, resto = chave.partition("/")
+    if tabela == "usuarios":
+        return f"o cadastro de {resto}"
+    if tabela == "solicitacoes":
+        return f"a solicitação #{resto}"
+    email, _, campo = resto.rpartition("/")
+    return f'"{campo}" de {email}'
+
+def mesclar_com_arquivo(chaves):
+    """Traz para a memória o que outro processo gravou desde a nossa leitura.
+
+    `chaves` são as unidades que queremos gravar; as que o outro processo
+    também alterou (com conteúdo diferente) saem de `chaves` e ficam com o
+    valor dele."""
+    disco = ler_arquivo_dados()
+    versoes = dados.setdefault("versoes", {})
+    versoes_disco = disco.get("versoes", {})
+    # alteradas por outro processo: mais novas que a nossa leitura e que a
+    # versão que já temos (uma área lida no login já vem com a versão atual)
+    remotas = {k for k, (v, _) in versoes_disco.items() if v > versao_lida and versoes.get(k, [0])[0] != v}
+    pos_disco = posicoes_unidades(disco)
+    pos_memoria = posicoes_unidades(dados)
+    renumerou = False
+
+    for chave in sorted(chaves & remotas):
+        meu = resumo(valor_unidade(dados, chave, pos_memoria))
+        if meu == versoes_disco[chave][1]:
+            chaves.discard(chave)  # os dois gravaram a mesma coisa
+        elif chave.startswith("solicitacoes/") and chave not in versoes:
+            # os dois terminais criaram uma solicitação com o mesmo id: a nossa ganha outro
+            s = valor_unidade(dados, chave, pos_memoria)
+            maior = max((int(k) for k in pos_disco["solicitacoes"] if k.isdigit()), default=0)
+            s["id"] = max(maior, fila_suporte.proximo_id - 1) + 1
+            pos_memoria["solicitacoes"][str(s["id"])] = pos_memoria["solicitacoes"].pop(chave.partition("/")[2])
+            chaves.discard(chave)
+            chaves.add(f"solicitacoes/{s['id']}")
+            renumerou = True
+        else:
+            chaves.discard(chave)
+            print(f"Aviso: {descrever_unidade(chave)} foi alterado em outro terminal; "
+                  "a sua alteração foi descartada.")
+
+    for chave in remotas - chaves:
+        trazer_unidade(chave, valor_unidade(disco, chave, pos_disco), pos_memoria)
+        versoes[chave] = versoes_disco[chave]
+    if any(k.startswith("usuarios/") for k in remotas):
+        indexar_usuarios()
+    if any(k.startswith("solicitacoes/") for k in remotas) or renumerou:
+        fila_suporte.recarregar(solicitacoes)
+    dados["versao"] = max(dados.get("versao", 0), disco.get("versao", 0))
+
+def sincronizar_com_arquivo():
+    """Traz para a memória o que outro processo gravou no dados.json (modo json)
+    ou, no modo sqlite, nas tabelas de usuários e solicitações do banco."""
+    global versao_lida
+    if MODO_PERSISTENCIA == "sqlite":
+        with trava_arquivo:
+            armazenamento.trazer_do_banco(dados)
+        return
+    if MODO_PERSISTENCIA != "json":
+        return
+    with trava_arquivo:
+        if assinatura_arquivo() != assinatura_lida:
+            mesclar_com_arquivo(set())
+            versao_lida = dados.get("versao", 0)
+
+def gravar_sem_versao(*alteracoes):
+    """Grava uma mudança que não é do usuário (a migração do formato de uma
+    área) sem dar versão nova às unidades: ela não disputa com o que outro
+    terminal gravou, que vem para a memória e fica valendo sem aviso."""
+    if MODO_PERSISTENCIA == "json":
+        with trava_arquivo:
+            versoes = dados.setdefault("versoes", {})
+            posicoes = posicoes_unidades(dados)
+            for caminho in alteracoes:
+                for chave in unidades_do_caminho(caminho):
+                    versoes[chave] = [versoes.get(chave, [0])[0], resumo(valor_unidade(dados, chave, posicoes))]
+    salvar_tudo(*alteracoes)
+
+def salvar_com_versao(alteracoes):
+    """Gravação do modo json segura com vários processos no mesmo arquivo."""
+    global versao_lida
+    with trava_arquivo:
+        versoes = dados.setdefault("versoes", {})
+        chaves = set()
+        for caminho in alteracoes:
+            chaves.update(unidades_do_caminho(caminho))
+        # só conta como alteração o que mudou desde a última gravação
+        posicoes = posicoes_unidades(dados)
+        resumos = {k: resumo(valor_unidade(dados, k, posicoes)) for k in chaves}
+        chaves = {k for k in chaves if versoes.get(k, [0, None])[1] != resumos[k]}
+        if assinatura_arquivo() != assinatura_lida:
+            mesclar_com_arquivo(chaves)
+            posicoes = posicoes_unidades(dados)
+        versao = dados.get("versao", 0) + 1
+        for chave in chaves:
+            versoes[chave] = [versao, resumo(valor_unidade(dados, chave, posicoes))]
+        dados["versao"] = versao
+        salvar_dados(dados)
+        versao_lida = versao
+
+# ----------------- Armazenamento SQLite -----------------
+# Uma linha por usuário, solicitação, meta, submeta, célula do cronograma,
+# anotação, lembrete e bloco de Pomodoro. As tabelas da área do usuário têm o
+# e-mail no começo da chave primária: carregar uma área no login e regravar um
+# item são buscas pelo índice, e cada caminho de salvar_tudo vira só o
+# DELETE/INSERT das linhas daquele trecho.
+
+# (das Metas, mas definida aqui: a importação do primeiro uso do SQLite
+# acontece ao carregar o programa e grava o progresso de cada meta)
+def progresso_no(no):
+    """Progresso (0-100) de uma meta ou submeta, em O(1)."""
+    # .get: a importação grava áreas que ainda não foram migradas
+    if no.get("concluida", False):
+        return 100
+    submetas = no.get("submetas")
+    if submetas:
+        return no.get("soma_submetas", 0) / len(submetas)
+    return no.get("progresso", 0)
+
+ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    posicao INTEGER PRIMARY KEY, nome, email NOT NULL UNIQUE COLLATE NOCASE, senha, is_admin);
+CREATE TABLE IF NOT EXISTS solicitacoes (
+    id INTEGER PRIMARY KEY, usuario, email, duvida, respondida, resposta, lida);
+CREATE INDEX IF NOT EXISTS solicitacoes_email ON solicitacoes (email COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS areas (
+    email PRIMARY KEY, horarios, dias, soma_metas, proximo_id_lembrete, pomodoro, extras);
+CREATE TABLE IF NOT EXISTS metas (
+    email, posicao, nome, prioridade, concluida, progresso, no,
+    PRIMARY KEY (email, posicao));
+CREATE TABLE IF NOT EXISTS submetas (
+    email, meta, caminho, nome, concluida, progresso, no,
+    PRIMARY KEY (email, meta, caminho));
+CREATE TABLE IF NOT EXISTS celulas (
+    email, horario, dia, atividades, PRIMARY KEY (email, horario, dia));
+CREATE TABLE IF NOT EXISTS anotacoes (
+    email, posicao, texto, PRIMARY KEY (email, posicao));
+CREATE TABLE IF NOT EXISTS lembretes (
+    email, posicao, id, texto, quando, recorrencia, avisado, PRIMARY KEY (email, posicao));
+CREATE TABLE IF NOT EXISTS pomodoro_registros (
+    email, posicao, inicio, segundos, tipo, completo, meta, PRIMARY KEY (email, posicao));
+"""
+
+# tabelas com uma linha por item de uma lista da área: campo -> (tabela, colunas)
+LISTAS_SQLITE = {
+    "anotacoes": ("anotacoes", ("texto",)),
+    "lembretes": ("lembretes", ("id", "texto", "quando", "recorrencia", "avisado")),
+    "registros": ("pomodoro_registros", ("inicio", "segundos", "tipo", "completo", "meta"))
+}
+CAMPOS_TABELAS = {"metas", "celulas_cronograma", "anotacoes", "lembretes"}
+COLUNAS_AREA = ("horarios", "dias", "soma_metas", "proximo_id_lembrete", "pomodoro")
+
+def json_ou_none(valor, texto=True):
+    if valor is None:
+        return None
+    return json.dumps(valor, ensure_ascii=False) if texto else json.loads(valor)
+
+def linha_item(campo, item):
+    if campo == "anotacoes":
+        return (item,)
+    if campo == "lembretes":
+        if isinstance(item, str):  # lembrete de versões antigas: só o texto
+            return (None, item, None, None, None)
+        return tuple(item[c] for c in LISTAS_SQLITE[campo][1])
+    return tuple(item)
+
+def item_da_linha(campo, linha):
+    if campo == "anotacoes":
+        return linha[0]
+    if campo == "lembretes":
+        if linha[0] is None:
+            return linha[1]
+        lembrete = dict(zip(LISTAS_SQLITE[campo][1], linha))
+        lembrete["avisado"] = bool(lembrete["avisado"])
+        return lembrete
+    return list(linha)
+
+class ArmazenamentoSqlite:
+    """Banco SQLite (BANCO_ARQUIVO); na primeira execução importa o dados.json."""
+
+    def __init__(self, arquivo=None):
+        self.arquivo = arquivo or BANCO_ARQUIVO
+        self.banco = None
+        self.emails_no_banco = set()  # usuários (e-mail minúsculo) que já têm linha no banco
+        self.ids_no_banco = set()     # solicitações que já têm linha no banco
+        self.versao_banco = None      # PRAGMA data_version na última leitura das tabelas
+
+    def conectar(self):
+        # a thread do Pomodoro e a dos lembretes também gravam (sempre com a trava_dados)
+        self.banco = sqlite3.connect(self.arquivo, check_same_thread=False)
+        self.banco.executescript(ESQUEMA_SQLITE)
+
+    def carregar(self):
+        novo = not os.path.exists(self.arquivo)
+        self.conectar()
+        with trava_arquivo:
+            # dois terminais abertos juntos na primeira vez: só o primeiro importa
+            if novo and self.banco.execute("SELECT 1 FROM usuarios").fetchone() is None:
+                self.importar(ler_arquivo_dados())
+            self.versao_banco = self.versao_atual()
+            dados = dados_padrao()
+            usuarios = self.ler_usuarios()
+            if usuarios:
+                dados["usuarios"] = usuarios
+            dados["solicitacoes"] = self.ler_solicitacoes()
+        return dados
+
+    def importar(self, dados):
+        """Substitui todo o conteúdo do banco por `dados` (formato do dados.json)."""
+        with self.banco:
+            for tabela in ("usuarios", "solicitacoes", "areas", "metas", "submetas", "celulas",
+                           "anotacoes", "lembretes", "pomodoro_registros"):
+                self.banco.execute(f"DELETE FROM {tabela}")
+            self.emails_no_banco.clear()
+            self.ids_no_banco.clear()
+            for usuario in dados["usuarios"]:
+                self.inserir_usuario(usuario)  # e-mail repetido: vale o primeiro, como no índice
+            for s in dados["solicitacoes"]:
+                self.inserir_solicitacao(s, s["id"])
+            for email, area in dados["usuarios_dados"].items():
+                self.gravar_area(email, area)
+
+    # --- vários processos no mesmo banco ---
+    # Usuários e solicitações são de todos os terminais. O banco dá as chaves
+    # (a posição do usuário e o id de uma solicitação nova saem do INSERT; um
+    # usuário já gravado é achado pelo e-mail) e cada gravação, feita com a
+    # trava_arquivo, traz antes para a memória o que outro processo gravou
+    # nessas tabelas. A área de cada usuário é de um terminal por vez.
+
+    def versao_atual(self):
+        """Muda quando outra conexão grava no banco."""
+        return self.banco.execute("PRAGMA data_version").fetchone()[0]
+
+    def ler_usuarios(self):
+        usuarios = [[nome, email, senha, bool(admin)] for nome, email, senha, admin in self.banco.execute(
+            "SELECT nome, email, senha, is_admin FROM usuarios ORDER BY posicao")]
+        self.emails_no_banco.update(u[1].lower() for u in usuarios)
+        return usuarios
+
+    def ler_solicitacoes(self):
+        solicitacoes = [
+            {"id": i, "usuario": usuario, "email": email, "duvida": duvida,
+             "respondida": bool(respondida), "resposta": resposta, "lida": bool(lida)}
+            for i, usuario, email, duvida, respondida, resposta, lida in self.banco.execute(
+                "SELECT id, usuario, email, duvida, respondida, resposta, lida "
+                "FROM solicitacoes ORDER BY id")
+        ]
+        self.ids_no_banco.update(s["id"] for s in solicitacoes)
+        return solicitacoes
+
+    def trazer_do_banco(self, dados, gravando=()):
+        """Traz para a memória os usuários e as solicitações que outro processo
+        gravou desde a nossa última leitura (com a trava_arquivo). Os caminhos
+        em `gravando` ficam com o valor da memória."""
+        versao = self.versao_atual()
+        if versao == self.versao_banco:
+            return
+        self.versao_banco = versao
+        for tabela, chave, linhas in (("usuarios", lambda u: u[1].lower(), self.ler_usuarios()),
+                                      ("solicitacoes", lambda s: s["id"], self.ler_solicitacoes())):
+            lista = dados[tabela]
+            posicoes = {chave(item): pos for pos, item in enumerate(lista)}
+            for item in linhas:
+                pos = posicoes.get(chave(item))
+                if pos is None:
+                    lista.append(item)
+                elif (tabela, pos) not in gravando:
+                    lista[pos] = item
+        indexar_usuarios()
+        fila_suporte.recarregar(dados["solicitacoes"])
+
+    # --- leitura da área de um usuário ---
+
+    def carregar_usuario(self, email):
+        with trava_dados:
+            linha = self.banco.execute(
+                "SELECT horarios, dias, soma_metas, proximo_id_lembrete, pomodoro, extras "
+                "FROM areas WHERE email = ?", (email,)).fetchone()
+            if linha is None:
+                return None
+            horarios, dias, soma_metas, proximo_id, pomodoro, extras = linha
+            u = json_ou_none(extras, texto=False)
+            for chave, valor in (("horarios", json_ou_none(horarios, texto=False)),
+                                 ("dias", json_ou_none(dias, texto=False)),
+                                 ("soma_metas", soma_metas),
+                                 ("proximo_id_lembrete", proximo_id)):
+                if valor is not None:
+                    u[chave] = valor
+            if pomodoro is not None:
+                u["pomodoro"] = json_ou_none(pomodoro, texto=False)
+                u["pomodoro"]["registros"] = self.ler_lista(email, "registros")
+            u["metas"] = self.ler_metas(email)
+            u["anotacoes"] = self.ler_lista(email, "anotacoes")
+            u["lembretes"] = self.ler_lista(email, "lembretes")
+            if "matriz_cronograma" not in u:  # matriz antiga: garantir_estrutura_usuario converte
+                celulas = {}
+                for horario, dia, atividades in self.banco.execute(
+                        "SELECT horario, dia, atividades FROM celulas WHERE email = ?", (email,)):
+                    celulas.setdefault(horario, {})[dia] = json.loads(atividades)
+                u["celulas_cronograma"] = celulas
+            return u
 
-def salvar_dados(dados):
-    """Salva o dicionário completo no arquivo JSON."""
-    with open(DADOS_ARQUIVO, "w", encoding="utf-8") as f:
-        json.dump(dados, f, indent=4, ensure_ascii=False)
+    def ler_lista(self, email, campo):
+        tabela, colunas = LISTAS_SQLITE[campo]
+        linhas = self.banco.execute(
+            f"SELECT {', '.join(colunas)} FROM {tabela} WHERE email = ? ORDER BY posicao", (email,))
+        return [item_da_linha(campo, linha) for linha in linhas]
+
+    def ler_metas(self, email):
+        metas = [json.loads(no) for (no,) in self.banco.execute(
+            "SELECT no FROM metas WHERE email = ? ORDER BY posicao", (email,))]
+        linhas = [(meta, tuple(int(p) for p in caminho.split(".")), no) for meta, caminho, no in
+                  self.banco.execute("SELECT meta, caminho, no FROM submetas WHERE email = ?", (email,))]
+        # pais antes dos filhos e irmãos em ordem: basta ir acrescentando
+        for meta, caminho, no in sorted(linhas):
+            pai = metas[meta]
+            for pos in caminho[:-1]:
+                pai = pai["submetas"][pos]
+            pai["submetas"].append(json.loads(no))
+        return metas
+
+    # --- gravação ---
+
+    def salvar(self, dados, alteracoes):
+        with self.banco:  # uma transação por salvar_tudo
+            if not alteracoes:
+                # sem caminhos: regrava tudo que está em memória
+                alteracoes = ([("usuarios", i) for i in range(len(dados["usuarios"]))] +
+                              [("solicitacoes", i) for i in range(len(dados["solicitacoes"]))] +
+                              [("usuarios_dados", email) for email in dados["usuarios_dados"]])
+            # as linhas novas vão antes: uma solicitação que ganhar outro id
+            # não se confunde com a de mesmo id trazida de outro processo
+            renumerou = False
+            for caminho in alteracoes:
+                renumerou |= bool(self.gravar_caminho(dados, caminho))
+            self.trazer_do_banco(dados, set(alteracoes))
+            if renumerou:
+                fila_suporte.recarregar(dados["solicitacoes"])
+
+    def gravar_caminho(self, dados, caminho):
+        """Grava o trecho; devolve True se uma solicitação nova ganhou outro id."""
+        if caminho[0] == "usuarios":
+            self.gravar_usuario(dados["usuarios"], caminho[1])
+            return
+        if caminho[0] == "solicitacoes":
+            return self.gravar_solicitacao(dados["solicitacoes"], caminho[1])
+        email = caminho[1]
+        u = dados["usuarios_dados"][email]
+        campo = caminho[2] if len(caminho) > 2 else None
+        item = caminho[3] if len(caminho) > 3 else None
+        if campo is None:
+            self.gravar_area(email, u)
+        elif campo == "metas":
+            self.gravar_metas(email, u["metas"], item)
+        elif campo == "celulas_cronograma":
+            self.gravar_celulas(email, u["celulas_cronograma"], item)
+        elif campo in LISTAS_SQLITE:
+            self.gravar_lista(email, campo, u[campo], item)
+        elif campo == "pomodoro" and item == "registros":
+            self.gravar_lista(email, "registros", u["pomodoro"]["registros"],
+                              caminho[4] if len(caminho) > 4 else None)
+        else:
+            # horários, dias, somas, totais do Pomodoro...: a linha da área
+            self.gravar_linha_area(email, u)
+
+    def inserir_usuario(self, usuario):
+        """INSERT de um usuário novo; False se o e-mail já tem linha no banco."""
+        nome, email, senha, admin = usuario
+        novo = self.banco.execute(
+            "INSERT INTO usuarios (nome, email, senha, is_admin) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (email) DO NOTHING", (nome, email, senha, int(admin))).rowcount == 1
+        self.emails_no_banco.add(email.lower())
+        return novo
+
+    def gravar_usuario(self, usuarios, pos):
+        nome, email, senha, admin = usuarios[pos]
+        if email.lower() in self.emails_no_banco:
+            self.banco.execute("UPDATE usuarios SET nome = ?, senha = ?, is_admin = ? WHERE email = ?",
+                               (nome, senha, int(admin), email))
+        elif not self.inserir_usuario(usuarios[pos]):
+            # outro terminal cadastrou o mesmo e-mail antes: vale o cadastro dele
+            nome, email, senha, admin = self.banco.execute(
+                "SELECT nome, email, senha, is_admin FROM usuarios WHERE email = ?", (email,)).fetchone()
+            usuarios[pos] = [nome, email, senha, bool(admin)]
+            print(f"Aviso: o e-mail {email} foi cadastrado em outro terminal; "
+                  "o cadastro feito aqui foi descartado.")
+
+    def inserir_solicitacao(self, s, id_solicitacao=None):
+        """INSERT de uma solicitação; sem `id_solicitacao`, o banco escolhe o próximo id."""
+        cursor = self.banco.execute(
+            "INSERT INTO solicitacoes (id, usuario, email, duvida, respondida, resposta, lida) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (id_solicitacao, s["usuario"], s["email"], s["duvida"],
+             int(s["respondida"]), s["resposta"], int(s.get("lida", False))))
+        self.ids_no_banco.add(cursor.lastrowid)
+        return cursor.lastrowid
+
+    def gravar_solicitacao(self, solicitacoes, pos):
+        """Grava a solicitação; devolve True se ela era nova e ganhou outro id
+        (outro processo criou uma com o id que ela tinha na memória)."""
+        s = solicitacoes[pos]
+        if s["id"] in self.ids_no_banco:
+            self.banco.execute("UPDATE solicitacoes SET respondida = ?, resposta = ?, lida = ? WHERE id = ?",
+                               (int(s["respondida"]), s["resposta"], int(s.get("lida", False)), s["id"]))
+            return False
+        id_anterior, s["id"] = s["id"], self.inserir_solicitacao(s)
+        return s["id"] != id_anterior
+
+    def gravar_area(self, email, u):
+        for tabela in ("metas", "submetas", "celulas", "anotacoes", "lembretes", "pomodoro_registros"):
+            self.banco.execute(f"DELETE FROM {tabela} WHERE email = ?", (email,))
+        self.gravar_linha_area(email, u)
+        self.gravar_metas(email, u.get("metas", []))
+        self.gravar_celulas(email, u.get("celulas_cronograma", {}))
+        for campo in ("anotacoes", "lembretes"):
+            self.gravar_lista(email, campo, u.get(campo, []))
+        if "pomodoro" in u:
+            self.gravar_lista(email, "registros", u["pomodoro"]["registros"])
+
+    def gravar_linha_area(self, email, u):
+        u = area_para_gravar(u)
+        extras = {k: v for k, v in u.items() if k not in CAMPOS_TABELAS and k not in COLUNAS_AREA}
+        pomodoro = u.get("pomodoro")
+        if pomodoro is not None:
+            pomodoro = {k: v for k, v in pomodoro.items() if k != "registros"}
+        self.banco.execute(
+            "INSERT OR REPLACE INTO areas VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (email, json_ou_none(u.get("horarios")), json_ou_none(u.get("dias")), u.get("soma_metas"),
+             u.get("proximo_id_lembrete"), json_ou_none(pomodoro), json_ou_none(extras)))
+
+    def gravar_lista(self, email, campo, lista, pos=None):
+        """Regrava o item `pos` da lista (ou a lista inteira, sem `pos`)."""
+        tabela, colunas = LISTAS_SQLITE[campo]
+        if pos is None:
+            self.banco.execute(f"DELETE FROM {tabela} WHERE email = ?", (email,))
+            posicoes = range(len(lista))
+        else:
+            self.banco.execute(f"DELETE FROM {tabela} WHERE email = ? AND posicao = ?", (email, pos))
+            posicoes = [pos] if pos < len(lista) else []
+        marcadores = ", ".join("?" * (len(colunas) + 2))
+        self.banco.executemany(f"INSERT INTO {tabela} VALUES ({marcadores})",
+                               [(email, p) + linha_item(campo, lista[p]) for p in posicoes])
+
+    def gravar_metas(self, email, metas, pos=None):
+        """Regrava a meta `pos` com todas as submetas (ou todas as metas, sem `pos`)."""
+        if pos is None:
+            self.banco.execute("DELETE FROM metas WHERE email = ?", (email,))
+            self.banco.execute("DELETE FROM submetas WHERE email = ?", (email,))
+            posicoes = range(len(metas))
+        else:
+            self.banco.execute("DELETE FROM metas WHERE email = ? AND posicao = ?", (email, pos))
+            self.banco.execute("DELETE FROM submetas WHERE email = ? AND meta = ?", (email, pos))
+            posicoes = [pos] if pos < len(metas) else []
+        for p in posicoes:
+            meta = metas[p]
+            self.banco.execute("INSERT INTO metas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (email, p, meta.get("nome"), meta.get("prioridade"),
+                                int(meta.get("concluida", False)), progresso_no(meta), self.no_sem_filhos(meta)))
+            self.banco.executemany("INSERT INTO submetas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                   [(email, p, caminho, no.get("nome"), int(no.get("concluida", False)),
+                                     progresso_no(no), self.no_sem_filhos(no))
+                                    for caminho, no in self.submetas_com_caminho(meta)])
+
+    def submetas_com_caminho(self, no, prefixo=""):
+        for i, sub in enumerate(no.get("submetas", [])):
+            caminho = f"{prefixo}{i}"
+            yield caminho, sub
+            yield from self.submetas_com_caminho(sub, caminho + ".")
+
+    def no_sem_filhos(self, no):
+        """O nó em JSON; as submetas ficam nas suas próprias linhas."""
+        if "submetas" in no:
+            no = dict(no, submetas=[])
+        return json.dumps(no, ensure_ascii=False)
+
+    def gravar_celulas(self, email, celulas, horario=None):
+        """Regrava a linha `horario` do cronograma (ou todas, sem `horario`)."""
+        if horario is None:
+            self.banco.execute("DELETE FROM celulas WHERE email = ?", (email,))
+            linhas = celulas.items()
+        else:
+            self.banco.execute("DELETE FROM celulas WHERE email = ? AND horario = ?", (email, horario))
+            linhas = [(horario, celulas[horario])] if horario in celulas else []
+        self.banco.executemany("INSERT INTO celulas VALUES (?, ?, ?, ?)",
+                               [(email, h, dia, json_ou_none(atividades))
+                                for h, dias in linhas for dia, atividades in dias.items()])
+
+def migrar_para_sqlite():
+    """Copia o dados.json (com o journal, se houver) para o BANCO_ARQUIVO."""
+    if os.path.exists(BANCO_ARQUIVO):
+        print(f"{BANCO_ARQUIVO} já existe; nada foi alterado.")
+        return
+    with trava_arquivo:
+        origem = ler_arquivo_dados()
+        aplicar_journal(origem)
+    banco = ArmazenamentoSqlite()
+    banco.conectar()
+    banco.importar(origem)
+    print(f"Migração concluída: {len(origem['usuarios'])} usuários, "
+          f"{len(origem['solicitacoes'])} solicitações e {len(origem['usuarios_dados'])} áreas "
+          f"copiados para {BANCO_ARQUIVO}.")
+    print("Use STUDYON_PERSISTENCIA=sqlite para trabalhar com o banco.")
+
+# ----------------- Armazenamento -----------------
+# O resto do programa só fala com `armazenamento`: carregar() devolve o
+# dicionário inicial, carregar_usuario(email) a área de um usuário que não
+# veio no carregar() (ou None) e salvar(dados, alteracoes) grava os caminhos
+# alterados (todos, se a lista estiver vazia).
+
+class ArmazenamentoJson:
+    """dados.json inteiro, combinando as gravações com as de outros processos.
+    Com o índice de posições, a área de cada usuário só é lida no login."""
+
+    def carregar(self):
+        global versao_lida
+        with trava_arquivo:
+            dados = ler_tabelas_indexadas()
+            if dados is None:
+                dados = ler_arquivo_dados()
+        versao_lida = dados.get("versao", 0)
+        return dados
+
+    def carregar_usuario(self, email):
+        with trava_arquivo:
+            area, versoes_arquivo = ler_area_indexada(email)
+        # o arquivo pode ter sido gravado por outro terminal depois da nossa
+        # leitura: as versões dos campos da área vêm junto com ela
+        prefixo = f"usuarios_dados/{email}/"
+        versoes = dados.setdefault("versoes", {})
+        for chave, versao in versoes_arquivo.items():
+            if chave.startswith(prefixo):
+                versoes[chave] = versao
+        return area
+
+    def salvar(self, dados, alteracoes):
+        salvar_com_versao(alteracoes)
+
+class ArmazenamentoJournal(ArmazenamentoJson):
+    """dados.json + JOURNAL_ARQUIVO com as alterações desde a última compactação."""
+
+    def carregar(self):
+        global versao_lida
+        # o journal pode mexer em qualquer área: tudo é lido ao iniciar
+        with trava_arquivo:
+            dados = ler_arquivo_dados()
+        versao_lida = dados.get("versao", 0)
+        aplicar_journal(dados)
+        return dados
+
+    def carregar_usuario(self, email):
+        return None  # todas as áreas já vêm no carregar()
+
+    def salvar(self, dados, alteracoes):
+        global operacoes_no_journal
+        for caminho in alteracoes:
+            registrar_operacao(caminho)
+        if not alteracoes or operacoes_no_journal >= LIMITE_JOURNAL:
+            salvar_dados(dados)
+            # o snapshot já contém tudo que estava no journal
+            open(JOURNAL_ARQUIVO, "w", encoding="utf-8").close()
+            operacoes_no_journal = 0
+
+class ArmazenamentoShards:
+    """Arquivos separados em PASTA_SHARDS; a área de cada usuário só é lida no login."""
+
+    def carregar(self):
+        with trava_arquivo:
+            if os.path.isdir(PASTA_SHARDS):
+                return carregar_shards()
+            # primeira execução no modo shards: divide o dados.json atual
+            dados = ler_arquivo_dados()
+            salvar_shards(dados)
+        dados["usuarios_dados"] = {}
+        return dados
+
+    def carregar_usuario(self, email):
+        arquivo = arquivo_shard_usuario(email)
+        if not os.path.exists(arquivo):
+            return None
+        with open(arquivo, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def salvar(self, dados, alteracoes):
+        salvar_shards(dados, alteracoes or None)
+
+ARMAZENAMENTOS = {
+    "json": ArmazenamentoJson,
+    "journal": ArmazenamentoJournal,
+    "shards": ArmazenamentoShards,
+    "sqlite": ArmazenamentoSqlite
+}
+
+armazenamento = ARMAZENAMENTOS[MODO_PERSISTENCIA]()
+
+# ----------------- Esquema dos dados -----------------
+# O arquivo (as tabelas) e a área de cada usuário guardam em "esquema" a
+# versão do formato em que foram gravados; sem a chave, são de antes disso
+# (versão 0). A função i de MIGRACOES_ARQUIVO / MIGRACOES_AREA leva um
+# registro da versão i para a i + 1. As tabelas, que já são lidas inteiras,
+# são migradas ao carregar; cada área só quando é aberta, e então só ela é
+# regravada: atualizar uma instalação grande não reescreve o dados.json ao
+# iniciar. Um formato novo é uma função a mais no fim da lista.
+
+def migrar_arquivo_para_1(dados):
+    """Chaves principais que faltarem e solicitações sem id ou sem "lida"."""
+    for chave, valor in dados_padrao().items():
+        dados.setdefault(chave, valor)
+    proximo_id = 1 + max((s["id"] for s in dados["solicitacoes"] if "id" in s), default=0)
+    for s in dados["solicitacoes"]:
+        if "id" not in s:
+            s["id"] = proximo_id
+            proximo_id += 1
+        s.setdefault("lida", False)
+
+def migrar_area_para_1(u):
+    """Listas que faltarem, cronograma esparso, Pomodoro e lembretes com id."""
+    for chave in ("metas", "anotacoes", "lembretes"):
+        u.setdefault(chave, [])
+    if "celulas_cronograma" not in u:
+        u["celulas_cronograma"] = converter_matriz_densa(u)
+        u.pop("matriz_cronograma", None)
+    if "pomodoro" not in u:
+        u["pomodoro"] = pomodoro_vazio()
+    # lembretes antigos eram só o texto
+    u["lembretes"][:] = [novo_lembrete(u, l) if isinstance(l, str) else l for l in u["lembretes"]]
+
+def migrar_area_para_2(u):
+    """Toda meta com "prioridade", todo nó com "concluida" e as somas de progresso."""
+    def completar(no):
+        no.setdefault("concluida", False)
+        for sub in no.get("submetas", []):
+            completar(sub)
+    for meta in u["metas"]:
+        meta.setdefault("prioridade", "media")
+        completar(meta)
+    if "soma_metas" not in u:
+        u["soma_metas"] = sum(recalcular_progresso(m) for m in u["metas"])
+
+def migrar_area_para_3(u):
+    """Toda meta com um "id", na ordem da lista (a de criação)."""
+    for meta in u["metas"]:
+        if "id" not in meta:
+            meta["id"] = novo_id_meta(u)
+
+def migrar_area_para_4(u):
+    """proximo_id_meta depois do maior id e um id novo para as metas repetidas
+    (criar uma meta não gravava o proximo_id_meta)."""
+    u["proximo_id_meta"] = max([u.get("proximo_id_meta", 0)] + [meta["id"] + 1 for meta in u["metas"]])
+    vistos = set()
+    for meta in u["metas"]:
+        if meta["id"] in vistos:
+            meta["id"] = novo_id_meta(u)
+        vistos.add(meta["id"])
+
+def migrar_area_para_5(u):
+    """Foco por meta pelo id da meta em vez do nome. O tempo de um nome que não
+    é de nenhuma meta atual (renomeada ou excluída) vai para "foco_por_meta_antiga"."""
+    historico = u.get("pomodoro")
+    if historico is None:
+        return
+    ids = {}
+    for meta in u["metas"]:
+        ids.setdefault(meta["nome"], meta["id"])  # nomes repetidos: vale a primeira
+    por_nome, historico["foco_por_meta"] = historico["foco_por_meta"], {}
+    for nome, segundos in por_nome.items():
+        if nome in ids:
+            historico["foco_por_meta"][str(ids[nome])] = segundos
+        else:
+            historico.setdefault("foco_por_meta_antiga", {})[nome] = segundos
+    for registro in historico["registros"]:
+        if registro[4] in ids:
+            registro[4] = ids[registro[4]]
+
+MIGRACOES_ARQUIVO = [migrar_arquivo_para_1]
+MIGRACOES_AREA = [migrar_area_para_1, migrar_area_para_2, migrar_area_para_3, migrar_area_para_4,
+                  migrar_area_para_5]
+ESQUEMA_ARQUIVO = len(MIGRACOES_ARQUIVO)
+ESQUEMA_AREA = len(MIGRACOES_AREA)
+
+def migrar(registro, migracoes):
+    """Aplica as migrações que faltam ao registro; devolve True se ele mudou."""
+    versao = registro.get("esquema", 0)
+    if versao >= len(migracoes):
+        return False  # em dia (ou gravado por uma versão mais nova do programa)
+    for migracao in migracoes[versao:]:
+        migracao(registro)
+    registro["esquema"] = len(migracoes)
+    return True
+
+def migrar_area(u):
+    """Prepara para uso uma área lida do armazenamento; devolve True se ela foi migrada."""
+    # sem a chave (ou igual ao padrão, em dados antigos): aponta para o padrão compartilhado
+    for campo, padrao in PADROES_AREA.items():
+        if campo not in u or (u[campo] is not padrao and tuple(u[campo]) == padrao):
+            u[campo] = padrao
+    return migrar(u, MIGRACOES_AREA)
 
 # ----------------- Inicialização -----------------
 
 dados = carregar_dados()
 usuarios = dados["usuarios"]          # lista de listas: [nome, email, senha, is_admin]
 solicitacoes = dados["solicitacoes"]  # lista de dicionários
-usuarios_dados = dados["usuarios_dados"]  # cada usuário/email gera dicionário -> {metas, matriz_cronograma, anotacoes, lembretes, horarios, dias}
+usuarios_dados = dados["usuarios_dados"]  # cada usuário/email gera dicionário -> {metas, celulas_cronograma, anotacoes, lembretes, horarios, dias}
 
 # função utilitária para garantir estrutura por usuário como acima /\
 def garantir_estrutura_usuario(email):
+    carregar_usuario(email)
     if email not in usuarios_dados:
         usuarios_dados[email] = {
             "metas": [],
             "cronograma": [],   # legado/backup
-            "horarios": [       # horários padrão
-                '07:00 - 08:00',
-                '08:00 - 09:00',
-                '09:00 - 10:00',
-                '10:00 - 11:00',
-                '11:00 - 12:00',
-                '14:00 - 16:00',
-                '16:00 - 17:00',
-                '17:00 - 18:00'
-            ],
-            "dias": ['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado'],
-            "matriz_cronograma": [],  # criada a partir de horarios x dias
+            "horarios": HORARIOS_PADRAO,
+            "dias": DIAS_PADRAO,
+            "celulas_cronograma": {},  # só as células ocupadas: {horário: {dia: [atividades]}}
             "anotacoes": [],
-            "lembretes": []
+            "lembretes": [],
+            "soma_metas": 0,  # soma do progresso das metas, mantida a cada alteração
+            "pomodoro": pomodoro_vazio(),
+            "esquema": ESQUEMA_AREA
         }
-    # garantir matriz_cronograma coerente
+    # área gravada num formato anterior: migrada e regravada só ela
+    if migrar_area(usuarios_dados[email]):
+        gravar_sem_versao(("usuarios_dados", email))
+
+# ----------------- Cronograma esparso -----------------
+# Só as células ocupadas são guardadas, em u["celulas_cronograma"]:
+# {horário: {dia: [atividade, ...]}}. Células vazias simplesmente não aparecem.
+
+def converter_matriz_densa(u):
+    """Converte a matriz antiga (horários x dias, atividades unidas por ' + ') para o formato esparso."""
+    celulas = {}
+    for i, linha in enumerate(u.get("matriz_cronograma") or []):
+        if i >= len(u["horarios"]):
+            break
+        for j, valor in enumerate(linha):
+            if j >= len(u["dias"]) or not valor:
+                continue
+            atividades = [a for a in str(valor).split(' + ') if a.strip()]
+            if atividades:
+                celulas.setdefault(u["horarios"][i], {})[u["dias"][j]] = atividades
+    return celulas
+
+def atividades_da_celula(u, horario, dia):
+    return u["celulas_cronograma"].get(horario, {}).get(dia, [])
+
+def definir_atividades(email, horario, dia, atividades):
+    """Grava a lista de atividades da célula; lista vazia apaga a célula."""
+    celulas = usuarios_dados[email]["celulas_cronograma"]
+    indice = indice_atividades(email)
+    indice.remover_celula(horario, dia, celulas.get(horario, {}).get(dia, []))
+    indice.adicionar_celula(horario, dia, atividades)
+    if atividades:
+        celulas.setdefault(horario, {})[dia] = atividades
+    else:
+        linha = celulas.get(horario, {})
+        linha.pop(dia, None)
+        if not linha:
+            celulas.pop(horario, None)
+    invalidar_cronograma(email, horario)
+
+def renomear_linha_cronograma(email, antigo, novo):
+    """As atividades do horário `antigo` passam para o horário `novo`."""
+    celulas = usuarios_dados[email]["celulas_cronograma"]
+    linha = celulas.pop(antigo, None)
+    if linha:
+        indice = indice_atividades(email)
+        for dia, atividades in linha.items():
+            indice.remover_celula(antigo, dia, atividades)
+            indice.adicionar_celula(novo, dia, atividades)
+        celulas[novo] = linha
+    invalidar_cronograma(email, antigo, novo)
+
+def apagar_linha_cronograma(email, horario):
+    linha = usuarios_dados[email]["celulas_cronograma"].pop(horario, None)
+    if linha:
+        indice = indice_atividades(email)
+        for dia, atividades in linha.items():
+            indice.remover_celula(horario, dia, atividades)
+    invalidar_cronograma(email, horario)
+
+def texto_da_celula(u, horario, dia, vazio=''):
+    atividades = atividades_da_celula(u, horario, dia)
+    return ' + '.join(atividades) if atividades else vazio
+
+class IndiceAtividades:
+    """Índice reverso do cronograma: atividade -> células (horário, dia) onde aparece.
+
+    O nome é comparado sem acentos e sem diferenciar maiúsculas."""
+
+    def __init__(self, celulas):
+        self.posicoes = {}  # nome normalizado -> {(horário, dia): vezes na célula}
+        self.nomes = {}     # nome normalizado -> nome como foi digitado
+        for horario, linha in celulas.items():
+            for dia, atividades in linha.items():
+                self.adicionar_celula(horario, dia, atividades)
+
+    def adicionar_celula(self, horario, dia, atividades):
+        for atividade in atividades:
+            chave = normalizar_texto(atividade.strip())
+            celulas = self.posicoes.setdefault(chave, {})
+            celulas[(horario, dia)] = celulas.get((horario, dia), 0) + 1
+            self.nomes.setdefault(chave, atividade.strip())
+
+    def remover_celula(self, horario, dia, atividades):
+        for atividade in atividades:
+            chave = normalizar_texto(atividade.strip())
+            celulas = self.posicoes.get(chave, {})
+            if celulas.get((horario, dia), 0) > 1:
+                celulas[(horario, dia)] -= 1
+            else:
+                celulas.pop((horario, dia), None)
+            if not celulas:
+                self.posicoes.pop(chave, None)
+                self.nomes.pop(chave, None)
+
+    def localizar(self, nome):
+        return list(self.posicoes.get(normalizar_texto(nome.strip()), {}))
+
+def indice_atividades(email):
+    indices = indices_do_usuario(email)
+    if "atividades" not in indices:
+        indices["atividades"] = IndiceAtividades(usuarios_dados[email]["celulas_cronograma"])
+    return indices["atividades"]
+
+@medido
+def localizar_atividade(email, nome):
+    """Onde a atividade está na semana: ([(horário, dia), ...] em ordem de dia e horário, minutos por semana)."""
     u = usuarios_dados[email]
-    if "matriz_cronograma" not in u or not u["matriz_cronograma"]:
-        u["matriz_cronograma"] = []
-        for _ in range(len(u["horarios"])):
-            u["matriz_cronograma"].append([''] * len(u["dias"]))
+    posicoes = indice_atividades(email).localizar(nome)
+    ordem_dias = {dia: j for j, dia in enumerate(u["dias"])}
+    ordem_horarios = {h: i for i, h in enumerate(u["horarios"])}
+    posicoes.sort(key=lambda p: (ordem_dias.get(p[1], len(ordem_dias)), ordem_horarios.get(p[0], len(ordem_horarios))))
+    minutos = 0
+    for horario, _ in posicoes:
+        intervalo = interpretar_horario(horario)
+        if intervalo:
+            minutos += intervalo[1] - intervalo[0]
+    return posicoes, minutos
+
+# ----------------- Horários -----------------
+
+# dia da semana de hoje com os nomes usados em "dias" (time.localtime: segunda = 0)
+DIAS_SEMANA = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+
+def interpretar_horario(texto):
+    """'07:00 - 08:00' -> (420, 480) em minutos desde 00:00; None se o formato for inválido."""
+    m = re.fullmatch(r"\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*", texto)
+    if not m:
+        return None
+    h1, m1, h2, m2 = (int(x) for x in m.groups())
+    inicio, fim = h1 * 60 + m1, h2 * 60 + m2
+    if m1 > 59 or m2 > 59 or fim > 24 * 60 or inicio >= fim:
+        return None
+    return inicio, fim
+
+def formatar_horario(inicio, fim):
+    return f"{inicio // 60:02d}:{inicio % 60:02d} - {fim // 60:02d}:{fim % 60:02d}"
+
+def normalizar_horario(texto):
+    """Escreve o horário no formato padrão ('7:00-8:00' -> '07:00 - 08:00')."""
+    intervalo = interpretar_horario(texto)
+    return formatar_horario(*intervalo) if intervalo else texto.strip()
+
+def minuto_atual():
+    agora = time.localtime()
+    return agora.tm_hour * 60 + agora.tm_min
+
+def dia_de_hoje():
+    return DIAS_SEMANA[time.localtime().tm_wday]
+
+class GradeHorarios:
+    """Horários de um usuário ordenados pelo início, com busca binária.
+
+    Mantém a lista `horarios` do usuário (a que vai para o JSON) na mesma ordem
+    que a lista de intervalos em minutos; se ela ainda for o padrão
+    compartilhado, é copiada antes da primeira mudança. Horários antigos em
+    formato inválido ficam no fim da lista e não participam das buscas."""
+
+    def __init__(self, u):
+        self.u = u
+        self.horarios = horarios = u["horarios"]
+        validos = []
+        invalidos = []
+        for texto in horarios:
+            intervalo = interpretar_horario(texto)
+            if intervalo:
+                validos.append((intervalo, texto))
+            else:
+                invalidos.append(texto)
+        validos.sort()
+        self.inicios = [intervalo[0] for intervalo, _ in validos]
+        self.fins = [intervalo[1] for intervalo, _ in validos]
+        ordenados = [texto for _, texto in validos] + invalidos
+        if ordenados != list(horarios):
+            self.propria()[:] = ordenados
+
+    def propria(self):
+        self.horarios = lista_propria(self.u, "horarios")
+        return self.horarios
+
+    def conflito(self, inicio, fim):
+        """Horário já cadastrado que se sobrepõe a [inicio, fim), ou None."""
+        pos = bisect.bisect_left(self.inicios, inicio)
+        if pos > 0 and self.fins[pos - 1] > inicio:
+            return self.horarios[pos - 1]
+        if pos < len(self.inicios) and self.inicios[pos] < fim:
+            return self.horarios[pos]
+        return None
+
+    def inserir(self, texto):
+        """Insere na posição certa e devolve o texto normalizado; ValueError se inválido."""
+        intervalo = interpretar_horario(texto)
+        if not intervalo:
+            raise ValueError("Formato inválido. Use HH:MM - HH:MM, com o fim depois do início.")
+        texto = formatar_horario(*intervalo)
+        outro = self.conflito(*intervalo)
+        if outro:
+            raise ValueError(f"Esse horário se sobrepõe a {outro}.")
+        pos = bisect.bisect_left(self.inicios, intervalo[0])
+        self.inicios.insert(pos, intervalo[0])
+        self.fins.insert(pos, intervalo[1])
+        self.propria().insert(pos, texto)
+        return texto
+
+    def remover(self, texto):
+        pos = self.horarios.index(texto)
+        self.propria().pop(pos)
+        if pos < len(self.inicios):
+            self.inicios.pop(pos)
+            self.fins.pop(pos)
+
+    def renomear(self, antigo, novo):
+        """Troca um horário por outro, reposicionando; se o novo for inválido nada muda."""
+        pos = self.horarios.index(antigo)
+        self.remover(antigo)
+        try:
+            return self.inserir(novo)
+        except ValueError:
+            # devolve o antigo ao lugar de onde saiu
+            intervalo = interpretar_horario(antigo)
+            self.horarios.insert(pos, antigo)
+            if intervalo:
+                self.inicios.insert(pos, intervalo[0])
+                self.fins.insert(pos, intervalo[1])
+            raise
+
+    @medido
+    def ativo_em(self, minuto):
+        """Horário que contém o minuto informado (ex.: agora), ou None."""
+        pos = bisect.bisect_right(self.inicios, minuto) - 1
+        if pos >= 0 and self.fins[pos] > minuto:
+            return self.horarios[pos]
+        return None
+
+# estruturas só de memória (não vão para o JSON), montadas no primeiro uso de cada usuário
+indices_usuarios = {}
+
+def indices_do_usuario(email):
+    return indices_usuarios.setdefault(email, {})
+
+def grade_horarios(email):
+    indices = indices_do_usuario(email)
+    if "horarios" not in indices:
+        indices["horarios"] = GradeHorarios(usuarios_dados[email])
+    return indices["horarios"]
+
+# ----------------- Desenho do cronograma -----------------
+# A tabela é montada num texto só e escrita com um único print. O texto das
+# células de cada horário e as linhas já formatadas ficam guardados e só os
+# horários alterados são refeitos. Cada coluna tem a largura do seu maior
+# texto, entre LARGURA_MIN_COLUNA e LARGURA_MAX_COLUNA (acima disso o texto é
+# cortado; o relatório diário mostra a célula inteira).
+
+LARGURA_MIN_COLUNA = 16
+LARGURA_MAX_COLUNA = 32
+MARCA_AGORA = ' ◄'
+
+def cortar(texto, largura):
+    """O texto cabendo na coluna com ao menos um espaço de cada lado."""
+    return texto if len(texto) <= largura - 2 else texto[:largura - 3] + '…'
+
+class TabelaCronograma:
+    """Textos já prontos do cronograma de um usuário."""
+
+    def __init__(self, u):
+        self.u = u
+        self.dias = tuple(u["dias"])
+        self.celulas = {}   # horário -> texto de cada célula ('' se vazia), na ordem de self.dias
+        self.desenhos = {}  # colunas mostradas -> {"horarios", "larguras", "linhas": {horário: células formatadas}}
+
+    def conferir_dias(self):
+        """Os dias mudaram: nada do que está guardado serve."""
+        if self.dias != tuple(self.u["dias"]):
+            self.dias = tuple(self.u["dias"])
+            self.celulas.clear()
+            self.desenhos.clear()
+
+    def textos(self, horario):
+        linha = self.celulas.get(horario)
+        if linha is None:
+            linha = self.celulas[horario] = tuple(texto_da_celula(self.u, horario, dia) for dia in self.dias)
+        return linha
+
+    def invalidar(self, horario):
+        """Refaz só esse horário no próximo desenho (as larguras são conferidas de novo)."""
+        self.celulas.pop(horario, None)
+        for desenho in self.desenhos.values():
+            desenho["linhas"].pop(horario, None)
+            desenho["larguras"] = None
+
+    def larguras(self, colunas):
+        horarios = self.u["horarios"]
+        primeira = max([LARGURA_MIN_COLUNA] + [len(h) + len(MARCA_AGORA) + 1 for h in horarios])
+        larguras = [primeira]
+        for j in colunas:
+            maior = max([len(self.dias[j])] + [len(self.textos(h)[j]) for h in horarios])
+            larguras.append(min(LARGURA_MAX_COLUNA, max(LARGURA_MIN_COLUNA, maior + 2)))
+        return larguras
+
+    def desenhar(self, dias=None, agora=None):
+        """Tabela dos `dias` escolhidos (todos, se None), marcando o horário `agora`."""
+        self.conferir_dias()
+        colunas = tuple(j for j, dia in enumerate(self.dias) if dias is None or dia in dias)
+        horarios = self.u["horarios"]
+        desenho = self.desenhos.setdefault(colunas, {"horarios": None, "larguras": None, "linhas": {}})
+        if desenho["larguras"] is None or desenho["horarios"] != tuple(horarios):
+            larguras = self.larguras(colunas)
+            if larguras != desenho["larguras"]:
+                desenho["linhas"].clear()
+            desenho["larguras"], desenho["horarios"] = larguras, tuple(horarios)
+        larguras, linhas = desenho["larguras"], desenho["linhas"]
+        total = sum(larguras)
+
+        partes = ['\n', 'CRONOGRAMA'.center(total), '\n', '-' * total, '\n', f'{"HORÁRIO":<{larguras[0]}}']
+        partes += [f'{self.dias[j]:^{largura}}' for j, largura in zip(colunas, larguras[1:])]
+        partes.append('\n')
+        for horario in horarios:
+            linha = linhas.get(horario)
+            if linha is None:
+                textos = self.textos(horario)
+                linha = linhas[horario] = ''.join(f'{cortar(textos[j] or " - ", largura):^{largura}}'
+                                                  for j, largura in zip(colunas, larguras[1:]))
+            marcador = MARCA_AGORA if horario == agora else ''
+            partes += [f'{horario + marcador:<{larguras[0]}}', linha, '\n']
+        partes.append('-' * total)
+        return ''.join(partes)
+
+    def relatorio(self, dia, agora=None):
+        """Atividades de um dia, um horário por linha."""
+        self.conferir_dias()
+        j = self.dias.index(dia)
+        return ''.join(f'{h:<16} | {self.textos(h)[j] or "-"}{"  ◄ agora" if h == agora else ""}\n'
+                       for h in self.u["horarios"])
+
+def tabela_cronograma(email):
+    indices = indices_do_usuario(email)
+    if "tabela" not in indices:
+        indices["tabela"] = TabelaCronograma(usuarios_dados[email])
+    return indices["tabela"]
+
+def invalidar_cronograma(email, *horarios):
+    tabela = indices_do_usuario(email).get("tabela")
+    if tabela is not None:
+        for horario in horarios:
+            tabela.invalidar(horario)
+
+# ----------------- Pesquisa em anotações e lembretes -----------------
+
+def normalizar_texto(texto):
+    """Minúsculas e sem acentos, para "média" e "media" serem a mesma palavra."""
+    decomposto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+def palavras(texto):
+    return re.findall(r"\w+", normalizar_texto(texto))
+
+class IndiceTexto:
+    """Índice invertido (palavra -> textos que a contêm) de uma lista de textos.
+
+    É atualizado a cada inclusão, edição ou exclusão, então a pesquisa não
+    precisa percorrer a lista. Cada texto recebe um número fixo, porque as
+    posições na lista mudam quando algo é excluído."""
+
+    def __init__(self, textos):
+        self.ids = []      # números na mesma ordem da lista original
+        self.textos = {}   # número -> texto
+        self.termos = {}   # palavra -> {número: ocorrências}
+        self.proximo_id = 0
+        for texto in textos:
+            self.adicionar(texto)
+
+    def indexar(self, id_texto, texto):
+        self.textos[id_texto] = texto
+        for palavra in palavras(texto):
+            ocorrencias = self.termos.setdefault(palavra, {})
+            ocorrencias[id_texto] = ocorrencias.get(id_texto, 0) + 1
+
+    def desindexar(self, id_texto):
+        texto = self.textos.pop(id_texto)
+        for palavra in set(palavras(texto)):
+            ocorrencias = self.termos[palavra]
+            ocorrencias.pop(id_texto, None)
+            if not ocorrencias:
+                del self.termos[palavra]
+
+    def adicionar(self, texto):
+        self.ids.append(self.proximo_id)
+        self.indexar(self.proximo_id, texto)
+        self.proximo_id += 1
+
+    def editar(self, pos, texto):
+        id_texto = self.ids[pos]
+        self.desindexar(id_texto)
+        self.indexar(id_texto, texto)
+
+    def excluir(self, pos):
+        self.desindexar(self.ids.pop(pos))
+
+    def buscar(self, consulta):
+        """Textos que contêm todas as palavras da consulta, os mais relevantes primeiro."""
+        return [self.textos[i] for i in self.buscar_ids(consulta)]
+
+    @medido
+    def buscar_ids(self, consulta):
+        """Números dos textos que contêm todas as palavras, os mais relevantes primeiro.
+
+        A relevância soma, para cada palavra, as ocorrências no texto pesadas
+        pela raridade da palavra (tf-idf). Empates ficam na ordem da lista."""
+        termos = set(palavras(consulta))
+        if not termos or any(t not in self.termos for t in termos):
+            return []
+        # começa pela palavra mais rara: o conjunto de candidatos já nasce pequeno
+        ordenados = sorted(termos, key=lambda t: len(self.termos[t]))
+        candidatos = set(self.termos[ordenados[0]])
+        for termo in ordenados[1:]:
+            candidatos &= self.termos[termo].keys()
+            if not candidatos:
+                return []
+        total = len(self.ids)
+        pontos = {}
+        for id_texto in candidatos:
+            pontos[id_texto] = sum(
+                self.termos[t][id_texto] * math.log(1 + total / len(self.termos[t]))
+                for t in termos
+            )
+        return sorted(candidatos, key=lambda i: (-pontos[i], i))
+
+@medido
+def pesquisar(indice, textos, consulta):
+    """Pesquisa pelo índice; se nada casar palavra por palavra, volta à busca por trecho.
+
+    `textos` só é percorrido nesse caso: pode ser um gerador."""
+    resultados = indice.buscar(consulta)
+    if resultados:
+        return resultados
+    trecho = normalizar_texto(consulta.strip())
+    return [t for t in textos if trecho in normalizar_texto(t)]
+
+def indice_busca(email, chave):
+    """Índice de pesquisa de "anotacoes" ou "lembretes" do usuário, montado no primeiro uso.
+
+    Deve ser atualizado antes de mexer na lista, para que a primeira montagem
+    não veja a alteração e depois a aplique de novo."""
+    indices = indices_do_usuario(email)
+    if chave not in indices:
+        textos = usuarios_dados[email][chave]
+        if chave == "lembretes":
+            textos = [l["texto"] for l in textos]
+        indices[chave] = IndiceTexto(textos)
+    return indices[chave]
+
+# garante que a área do usuário esteja em memória antes de ser usada
+@medido
+def carregar_usuario(email):
+    if email not in usuarios_dados:
+        area = armazenamento.carregar_usuario(email)
+        if area is not None:
+            usuarios_dados[email] = area
+
+# índice: email normalizado -> posição do usuário em `usuarios`
+indice_emails = {}
+
+def indexar_usuarios():
+    indice_emails.clear()
+    for pos, u in enumerate(usuarios):
+        # com e-mails repetidos vale o primeiro, como na busca linear antiga
+        indice_emails.setdefault(u[1].lower(), pos)
+
+indexar_usuarios()
 
 # util: encontra usuario por email (retorna a lista)
+@medido
 def encontrar_usuario_por_email(email):
-    for u in usuarios:
-        if u[1].lower() == email.lower():
-            return u
+    pos = indice_emails.get(email.lower())
+    if pos is None:
+        return None
+    return usuarios[pos]
+
+# util: cadastra usuário mantendo o índice de e-mails
+def adicionar_usuario(nome, email, senha, is_admin=False):
+    usuarios.append([nome, email, senha, is_admin])
+    indice_emails[email.lower()] = len(usuarios) - 1
+    return usuarios[-1]
+
+# util: troca a senha e devolve a posição do usuário (para salvar só ele)
+def problema_na_senha(senha):
+    """Mensagem explicando por que a senha não serve, ou None se estiver ok."""
+    if senha == "":
+        return "A senha não pode ser vazia."
+    if len(senha) < 6:
+        return "A senha deve ter pelo menos 6 caracteres."
+    if not any(c in "0123456789" for c in senha):
+        return "A senha deve conter pelo menos 1 número."
     return None
 
+def alterar_senha(email, nova_senha):
+    pos = indice_emails[email.lower()]
+    usuarios[pos][2] = nova_senha
+    return pos
+
 # util: checar estrutura e salvar
-def salvar_tudo():
-    dados["usuarios"] = usuarios
-    dados["solicitacoes"] = solicitacoes
-    dados["usuarios_dados"] = usuarios_dados
-    salvar_dados(dados)
+# Cada alteração é o caminho (tupla de chaves) até o trecho modificado, ex.:
+# salvar_tudo(("usuarios_dados", email, "metas")). Nos modos journal, shards e
+# sqlite só esses trechos são gravados; sem alterações (ou no modo json) tudo é salvo.
+# Durante o modo em lote os caminhos só são acumulados em `gravacoes_adiadas`.
+gravacoes_adiadas = None
+
+def caminhos_minimos(alteracoes):
+    """Tira os caminhos já cobertos por outro mais curto (() = salvar tudo), na
+    ordem em que aconteceram (o journal reaplica acréscimos em listas nessa ordem)."""
+    if () in alteracoes:
+        return []
+    return [c for c in alteracoes if not any(c[:n] in alteracoes for n in range(1, len(c)))]
+
+@medido
+def salvar_tudo(*alteracoes):
+    if gravacoes_adiadas is not None:
+        with trava_dados:
+            gravacoes_adiadas.update(dict.fromkeys(alteracoes or [()]))
+        return
+    with trava_arquivo:
+        dados["usuarios"] = usuarios
+        dados["solicitacoes"] = solicitacoes
+        dados["usuarios_dados"] = usuarios_dados
+        armazenamento.salvar(dados, alteracoes)
+
+# ----------------- Metas -----------------
+# Cada meta/submeta com submetas guarda em "soma_submetas" a soma do progresso
+# das submetas diretas, e a área do usuário guarda em "soma_metas" a soma do
+# progresso das metas. Assim mostrar um progresso não percorre a árvore, e uma
+# alteração só recalcula os nós no caminho entre a submeta mexida e a raiz.
+
+def recalcular_progresso(no):
+    """Refaz as somas guardadas de toda a árvore abaixo do nó (dados de versões anteriores)."""
+    if "submetas" in no:
+        no["soma_submetas"] = sum(recalcular_progresso(s) for s in no["submetas"])
+    return progresso_no(no)
+
+def alterar_meta(email, caminho, mudanca):
+    """Aplica `mudanca(no)` no último nó de `caminho` (meta, submeta, ...) e
+    repassa a diferença de progresso para cada ancestral e para o total do usuário."""
+    indice = indice_metas(email)
+    antes = [progresso_no(no) for no in caminho]
+    mudanca(caminho[-1])
+    for k in range(len(caminho) - 1, 0, -1):
+        pai = caminho[k - 1]
+        pai["soma_submetas"] = pai.get("soma_submetas", 0) + progresso_no(caminho[k]) - antes[k]
+    u = usuarios_dados[email]
+    u["soma_metas"] = u.get("soma_metas", 0) + progresso_no(caminho[0]) - antes[0]
+    indice.alterada(caminho[0])
 
-# ----------------- Programa principal (menu) -----------------
+def progresso_geral(email):
+    u = usuarios_dados[email]
+    if not u["metas"]:
+        return 0
+    # somas acumuladas podem sair um fio de 0-100 por arredondamento
+    return max(0, min(100, u.get("soma_metas", 0) / len(u["metas"])))
+
+# ordem de atendimento: metas em aberto antes das concluídas, depois a
+# prioridade, o progresso (a mais atrasada primeiro) e a ordem de criação
+PESO_PRIORIDADE = {"alta": 0, "media": 1, "baixa": 2}
+
+class IndiceMetas:
+    """Metas de um usuário em ordem de atendimento, numa lista ordenada de
+    chaves mantida com bisect a cada alteração: a próxima meta é a primeira da
+    lista e a visão ordenada só percorre a lista, sem ordenar nada."""
+
+    def __init__(self, metas):
+        self.metas = metas
+        self.chaves = {}    # id da meta -> chave atual em self.ordem
+        self.posicoes = {}  # id da meta -> posição em self.metas
+        for pos, meta in enumerate(metas):
+            self.conferir_id(meta)
+            self.chaves[meta["id"]] = self.chave(meta)
+            self.posicoes[meta["id"]] = pos
+        self.ordem = sorted(self.chaves.values())
+
+    def conferir_id(self, meta):
+        # duas metas com o mesmo id sumiriam uma com a outra da ordem
+        if meta["id"] in self.chaves:
+            raise ValueError(f'Duas metas com o id {meta["id"]} ("{meta["nome"]}").')
+
+    @staticmethod
+    def chave(meta):
+        return (meta["concluida"], PESO_PRIORIDADE.get(meta["prioridade"], 1), progresso_no(meta), meta["id"])
+
+    def adicionada(self):
+        """A última meta da lista acabou de ser acrescentada."""
+        meta = self.metas[-1]
+        self.conferir_id(meta)
+        self.chaves[meta["id"]] = self.chave(meta)
+        self.posicoes[meta["id"]] = len(self.metas) - 1
+        bisect.insort(self.ordem, self.chaves[meta["id"]])
+
+    def removida(self, meta, pos):
+        """`meta` acabou de sair da posição `pos` da lista."""
+        chave = self.chaves.pop(meta["id"])
+        del self.ordem[bisect.bisect_left(self.ordem, chave)]
+        del self.posicoes[meta["id"]]
+        for id_meta, p in self.posicoes.items():
+            if p > pos:
+                self.posicoes[id_meta] = p - 1
+
+    def alterada(self, meta):
+        """Reposiciona a meta depois de mudar prioridade, progresso ou conclusão."""
+        antiga, nova = self.chaves[meta["id"]], self.chave(meta)
+        if nova != antiga:
+            del self.ordem[bisect.bisect_left(self.ordem, antiga)]
+            bisect.insort(self.ordem, nova)
+            self.chaves[meta["id"]] = nova
+
+    def em_ordem(self):
+        """(posição na lista, meta), da próxima a ser feita até as concluídas."""
+        for chave in self.ordem:
+            pos = self.posicoes[chave[-1]]
+            yield pos, self.metas[pos]
+
+    def proxima(self):
+        """(posição, meta) da meta em aberto que vem primeiro, ou None."""
+        if not self.ordem or self.ordem[0][0]:
+            return None
+        pos = self.posicoes[self.ordem[0][-1]]
+        return pos, self.metas[pos]
+
+def indice_metas(email):
+    indices = indices_do_usuario(email)
+    if "metas" not in indices:
+        indices["metas"] = IndiceMetas(usuarios_dados[email]["metas"])
+    return indices["metas"]
+
+def novo_id_meta(u):
+    id_meta = u.get("proximo_id_meta", 0)
+    u["proximo_id_meta"] = id_meta + 1
+    return id_meta
+
+def adicionar_meta(email, nome, prioridade):
+    # meta nova tem progresso 0: a soma do usuário não muda
+    u = usuarios_dados[email]
+    indice = indice_metas(email)
+    u["metas"].append({
+        "id": novo_id_meta(u),
+        "nome": nome,
+        "submetas": [],
+        "concluida": False,
+        "prioridade": prioridade,
+        "soma_submetas": 0
+    })
+    indice.adicionada()
+
+def remover_meta(email, pos):
+    u = usuarios_dados[email]
+    indice = indice_metas(email)
+    removida = u["metas"].pop(pos)
+    indice.removida(removida, pos)
+    u["soma_metas"] = u.get("soma_metas", 0) - progresso_no(removida)
+    if not u["metas"]:
+        u["soma_metas"] = 0
+    return removida
+
+def definir_prioridade(email, pos, prioridade):
+    meta = usuarios_dados[email]["metas"][pos]
+    meta["prioridade"] = prioridade
+    indice_metas(email).alterada(meta)
+
+def adicionar_submeta(email, caminho, nome):
+    def mudanca(no):
+        no.setdefault("submetas", []).append({"nome": nome, "progresso": 0, "concluida": False})
+        no.setdefault("soma_submetas", 0)
+    alterar_meta(email, caminho, mudanca)
+
+def remover_submeta(email, caminho, pos):
+    removida = caminho[-1]["submetas"][pos]
+    def mudanca(no):
+        no["submetas"].pop(pos)
+        no["soma_submetas"] = no.get("soma_submetas", 0) - progresso_no(removida)
+    alterar_meta(email, caminho, mudanca)
+    return removida
+
+def definir_progresso(email, caminho, valor):
+    def mudanca(no):
+        no["progresso"] = valor
+        if valor == 100:
+            no["concluida"] = True
+    alterar_meta(email, caminho, mudanca)
+
+def alternar_conclusao(email, caminho):
+    """Marca/desmarca o último nó do caminho; devolve o novo estado."""
+    def mudanca(no):
+        no["concluida"] = not no["concluida"]
+        # submeta concluída conta como 100%; a meta só muda o status
+        if no["concluida"] and len(caminho) > 1:
+            no["progresso"] = 100
+    alterar_meta(email, caminho, mudanca)
+    return caminho[-1]["concluida"]
+
+def salvar_meta(email, idx_meta):
+    salvar_tudo(("usuarios_dados", email, "metas", idx_meta), ("usuarios_dados", email, "soma_metas"))
+
+def gerenciar_submetas(email, idx_meta, caminho):
+    """Menu das submetas do último nó de `caminho` (meta > submeta > ...), em qualquer profundidade."""
+    no = caminho[-1]
+    while True:
+        submetas = no.get("submetas", [])
+        print(f"\n--- Submetas de: {' > '.join(n['nome'] for n in caminho)} ---")
+        print("1. Adicionar submeta")
+        print("2. Ver submetas")
+        print("3. Editar progresso de uma submeta")
+        print("4. Renomear submeta")
+        print("5. Excluir submeta")
+        print("6. Marcar submeta como concluída")
+        print("7. Gerenciar submetas de uma submeta")
+        print("0. Voltar")
+
+        subopc = perguntar("Escolha: ").strip()
+
+        if subopc == '0':
+            break
+        elif subopc not in ['1', '2', '3', '4', '5', '6', '7']:
+            print("Opção inválida.")
+            continue
 
-while True:
-    print("=== Sistema de Menu ===")
-    print("1. Criar conta")
-    print("2. Fazer login")
-    print("3. Recuperar senha")
-    print("0. Encerrar programa")
+        if subopc == '1':
+            nome_sub = perguntar("\nNome da submeta: ").strip()
+            if nome_sub:
+                adicionar_submeta(email, caminho, nome_sub)
+                salvar_meta(email, idx_meta)
+                print("Submeta adicionada!")
+            else:
+                print("Você não digitou nada.")
+            continue
 
-    opcao = input("Escolha uma opção: ").strip()
+        if not submetas:
+            print("Nenhuma submeta cadastrada.")
+            continue
 
-    if opcao == '0':
-        print("Encerrando o programa...")
-        salvar_tudo()
-        sys.exit()
+        if subopc == '2':
+            print("\nSubmetas:")
+            for i, s in enumerate(submetas, 1):
+                status = "✓" if s["concluida"] else ""
+                niveis = f" ({len(s['submetas'])} submetas)" if s.get("submetas") else ""
+                print(f"{i}. {s['nome']} - {progresso_no(s):.0f}% {status}{niveis}")
+            continue
 
-    elif opcao == '1':
-        print("\n=== Criação de Conta ===")
+        for i, s in enumerate(submetas, 1):
+            print(f"{i}. {s['nome']} - {progresso_no(s):.0f}%")
 
-        while True:
-            nome_usuario = input("Digite o nome de usuário desejado (ou 'sair' para cancelar): ")
-            if nome_usuario.lower() == 'sair':
-                print("Você cancelou a criação da conta. Retornando ao menu principal.\n")
-                break
-            elif nome_usuario == "":
-                print("O nome de usuário não pode ser vazio. Tente novamente.")
+        idx = perguntar("Escolha a submeta: ").strip()
+        if not idx.isdigit() or not (1 <= int(idx) <= len(submetas)):
+            print("Número inválido.")
+            continue
+        sub = submetas[int(idx) - 1]
+
+        if subopc == '3':
+            if sub.get("submetas"):
+                print("O progresso desta submeta vem das submetas dela.")
                 continue
-            break
+            nova = perguntar("Novo progresso (0 – 100): ").strip()
+            if nova.isdigit() and 0 <= int(nova) <= 100:
+                definir_progresso(email, caminho + [sub], int(nova))
+                salvar_meta(email, idx_meta)
+                print("Progresso atualizado!")
+            else:
+                print("Valor inválido.")
+
+        elif subopc == '4':
+            novo_nome = perguntar("Novo nome: ").strip()
+            if novo_nome:
+                sub["nome"] = novo_nome
+                salvar_meta(email, idx_meta)
+                print("Renomeada!")
+            else:
+                print("Nome vazio.")
 
-        if nome_usuario.lower() == 'sair':
-            continue
+        elif subopc == '5':
+            removida = remover_submeta(email, caminho, int(idx) - 1)
+            salvar_meta(email, idx_meta)
+            print(f"Submeta '{removida['nome']}' excluída!")
 
+        elif subopc == '6':
+            if alternar_conclusao(email, caminho + [sub]):
+                print(f"Submeta '{sub['nome']}' marcada como concluída!")
+            else:
+                print(f"Submeta '{sub['nome']}' desmarcada.")
+            salvar_meta(email, idx_meta)
+
+        elif subopc == '7':
+            gerenciar_submetas(email, idx_meta, caminho + [sub])
+
+# ----------------- Pomodoro -----------------
+
+def formatar_tempo(segundos):
+    segundos = int(round(segundos))
+    return f"{segundos // 60:02d}:{segundos % 60:02d}"
+
+class Pomodoro:
+    """Sessão Pomodoro que roda numa thread em segundo plano.
+
+    Cada bloco (foco ou pausa) tem um prazo no relógio monotônico e a thread só
+    dorme até esse prazo ou até receber um comando, então o tempo não acumula o
+    atraso de prints e sleeps e o menu continua livre durante a sessão.
+    `ao_terminar(bloco, segundos_feitos, completo)` é chamado ao fim de cada bloco,
+    sempre fora da condição (ele grava com a trava_dados, que o menu segura)."""
+
+    def __init__(self, foco, pausa, ciclos, ao_terminar=None):
+        self.blocos = []
+        for ciclo in range(1, ciclos + 1):
+            self.blocos.append({"tipo": "foco", "ciclo": ciclo, "segundos": foco * 60})
+            if ciclo < ciclos:
+                self.blocos.append({"tipo": "pausa", "ciclo": ciclo, "segundos": pausa * 60})
+        self.ciclos = ciclos
+        self.ao_terminar = ao_terminar
+        self.atual = 0
+        self.prazo = None
+        self.restante_pausado = None  # segundos que faltavam quando foi pausado
+        self.ativo = False
+        self.condicao = threading.Condition()
+        self.thread = None
+
+    def iniciar(self):
+        with self.condicao:
+            self.ativo = bool(self.blocos)
+            if self.ativo:
+                self.prazo = time.monotonic() + self.blocos[0]["segundos"]
+        self.thread = threading.Thread(target=self.rodar, daemon=True)
+        self.thread.start()
+
+    def rodar(self):
         while True:
-            email = input("Digite seu email: ")
-            if email.lower() == 'sair':
-                print("Você cancelou a criação da conta. Retornando ao menu principal.\n")
-                break
-            elif email == "":
-                print("O email não pode ser vazio. Tente novamente.")
+            with self.condicao:
+                if not self.ativo:
+                    return
+                if self.restante_pausado is not None:
+                    self.condicao.wait()
+                    continue
+                falta = self.prazo - time.monotonic()
+                if falta > 0:
+                    self.condicao.wait(falta)
+                    continue
+                terminado = self.terminar_bloco(completo=True)
+            self.avisar(*terminado)
+
+    def restante(self):
+        if self.restante_pausado is not None:
+            return self.restante_pausado
+        return max(0.0, self.prazo - time.monotonic())
+
+    def terminar_bloco(self, completo):
+        """Fecha o bloco atual e passa para o próximo (chamado com a condição travada).
+
+        Devolve os argumentos do ao_terminar, que o chamador passa a avisar()
+        depois de soltar a condição."""
+        bloco = self.blocos[self.atual]
+        feitos = bloco["segundos"] - (0 if completo else self.restante())
+        self.atual += 1
+        self.restante_pausado = None
+        if self.atual < len(self.blocos):
+            self.prazo = time.monotonic() + self.blocos[self.atual]["segundos"]
+        else:
+            self.ativo = False
+        self.condicao.notify_all()
+        return bloco, feitos, completo
+
+    def avisar(self, bloco, feitos, completo):
+        if self.ao_terminar:
+            try:
+                self.ao_terminar(bloco, feitos, completo)
+            except Exception as erro:  # não derruba a sessão por uma gravação que falhou
+                print(f"\n[Pomodoro] Não foi possível registrar o bloco: {erro}")
+
+    def pausar(self):
+        with self.condicao:
+            if self.ativo and self.restante_pausado is None:
+                self.restante_pausado = self.restante()
+                self.condicao.notify_all()
+
+    def retomar(self):
+        with self.condicao:
+            if self.ativo and self.restante_pausado is not None:
+                self.prazo = time.monotonic() + self.restante_pausado
+                self.restante_pausado = None
+                self.condicao.notify_all()
+
+    def pular(self):
+        """Encerra o bloco atual antes da hora e começa o próximo."""
+        with self.condicao:
+            if not self.ativo:
+                return
+            terminado = self.terminar_bloco(completo=False)
+        self.avisar(*terminado)
+
+    def parar(self):
+        with self.condicao:
+            if not self.ativo:
+                return
+            self.blocos = self.blocos[:self.atual + 1]
+            terminado = self.terminar_bloco(completo=False)
+        self.avisar(*terminado)
+
+    def status(self):
+        """Situação atual sem bloquear: bloco, ciclo, tempo restante e se está pausado."""
+        with self.condicao:
+            if not self.ativo:
+                return {"ativo": False}
+            bloco = self.blocos[self.atual]
+            return {
+                "ativo": True,
+                "tipo": bloco["tipo"],
+                "ciclo": bloco["ciclo"],
+                "ciclos": self.ciclos,
+                "restante": self.restante(),
+                "pausado": self.restante_pausado is not None
+            }
+
+# Histórico por usuário em u["pomodoro"]:
+#   "registros": [[início (epoch), segundos feitos, "foco"/"pausa", completo 0/1, id da meta], ...]
+#   "foco_por_dia" {"AAAA-MM-DD": s}, "foco_por_semana" {"AAAA-Sxx": s}, "foco_por_meta" {id da meta: s},
+#   (pelo id: renomear a meta não separa o histórico; o nome é buscado ao mostrar. Registros
+#   de antes disso de metas que já não existem guardam o nome, e o total delas fica em
+#   "foco_por_meta_antiga" {nome: s})
+#   "foco_total" s e "sequencia" {"ultimo_dia", "atual", "melhor"} (dias seguidos com foco).
+# Os totais são atualizados a cada bloco gravado; as estatísticas nunca relêem os registros.
+
+def pomodoro_vazio():
+    return {
+        "registros": [],
+        "foco_por_dia": {},
+        "foco_por_semana": {},
+        "foco_por_meta": {},
+        "foco_total": 0,
+        "sequencia": {"ultimo_dia": None, "atual": 0, "melhor": 0}
+    }
+
+def chave_semana(dia):
+    ano, semana, _ = dia.isocalendar()
+    return f"{ano}-S{semana:02d}"
+
+def registrar_bloco_pomodoro(email, bloco, segundos, completo, meta=None):
+    """Grava um bloco terminado (ou interrompido) e atualiza os totais de foco."""
+    segundos = int(round(segundos))
+    if segundos <= 0:
+        return
+    with trava_dados:
+        historico = usuarios_dados[email]["pomodoro"]
+        base = ("usuarios_dados", email, "pomodoro")
+        historico["registros"].append([int(time.time()) - segundos, segundos, bloco["tipo"], int(completo), meta])
+        alteracoes = [base + ("registros", len(historico["registros"]) - 1)]
+        if bloco["tipo"] == "foco":
+            hoje = datetime.date.today()
+            dia, semana = hoje.isoformat(), chave_semana(hoje)
+            historico["foco_por_dia"][dia] = historico["foco_por_dia"].get(dia, 0) + segundos
+            historico["foco_por_semana"][semana] = historico["foco_por_semana"].get(semana, 0) + segundos
+            historico["foco_total"] += segundos
+            alteracoes += [base + ("foco_por_dia", dia), base + ("foco_por_semana", semana), base + ("foco_total",)]
+            if meta is not None:
+                chave = str(meta)  # as chaves de um objeto JSON são textos
+                historico["foco_por_meta"][chave] = historico["foco_por_meta"].get(chave, 0) + segundos
+                alteracoes.append(base + ("foco_por_meta", chave))
+            seq = historico["sequencia"]
+            if seq["ultimo_dia"] != dia:
+                ontem = (hoje - datetime.timedelta(days=1)).isoformat()
+                seq["atual"] = seq["atual"] + 1 if seq["ultimo_dia"] == ontem else 1
+                seq["melhor"] = max(seq["melhor"], seq["atual"])
+                seq["ultimo_dia"] = dia
+                alteracoes.append(base + ("sequencia",))
+        salvar_tudo(*alteracoes)
+
+def sequencia_atual(historico):
+    """Dias seguidos com foco até hoje (a sequência só se perde se ontem ficou sem foco)."""
+    seq = historico["sequencia"]
+    hoje = datetime.date.today()
+    if seq["ultimo_dia"] in (hoje.isoformat(), (hoje - datetime.timedelta(days=1)).isoformat()):
+        return seq["atual"]
+    return 0
+
+def ao_terminar_pomodoro(email, meta):
+    """Callback da sessão: grava o bloco no histórico e avisa o usuário."""
+    def ao_terminar(bloco, segundos_feitos, completo):
+        registrar_bloco_pomodoro(email, bloco, segundos_feitos, completo, meta)
+        avisar_fim_de_bloco(bloco, segundos_feitos, completo)
+    return ao_terminar
+
+def formatar_duracao(segundos):
+    return f"{segundos // 3600}h{segundos % 3600 // 60:02d}min"
+
+def mostrar_estatisticas(email):
+    historico = usuarios_dados[email]["pomodoro"]
+    hoje = datetime.date.today()
+    print("\n=== ESTATÍSTICAS DE FOCO ===")
+    print(f"Hoje: {formatar_duracao(historico['foco_por_dia'].get(hoje.isoformat(), 0))}")
+    print(f"Esta semana: {formatar_duracao(historico['foco_por_semana'].get(chave_semana(hoje), 0))}")
+    print(f"Total: {formatar_duracao(historico['foco_total'])}")
+    print(f"Sequência: {sequencia_atual(historico)} dia(s) seguidos (melhor: {historico['sequencia']['melhor']})")
+    print("\nÚltimos 7 dias:")
+    for atras in range(6, -1, -1):
+        dia = hoje - datetime.timedelta(days=atras)
+        segundos = historico["foco_por_dia"].get(dia.isoformat(), 0)
+        # uma barra a cada 15 minutos de foco
+        print(f"{dia.strftime('%d/%m')} {DIAS_SEMANA[dia.weekday()]:<8} {'█' * (segundos // 900):<16} {formatar_duracao(segundos)}")
+    nomes = {str(meta["id"]): meta["nome"] for meta in usuarios_dados[email]["metas"]}
+    por_meta = {}
+    for chave, segundos in historico["foco_por_meta"].items():
+        nome = nomes.get(chave, "(metas excluídas)")
+        por_meta[nome] = por_meta.get(nome, 0) + segundos
+    for nome, segundos in historico.get("foco_por_meta_antiga", {}).items():
+        nome = f"{nome} (antiga)"
+        por_meta[nome] = por_meta.get(nome, 0) + segundos
+    if por_meta:
+        print("\nFoco por meta:")
+        for nome, segundos in sorted(por_meta.items(), key=lambda x: -x[1]):
+            print(f"{nome}: {formatar_duracao(segundos)}")
+
+def avisar_fim_de_bloco(bloco, segundos_feitos, completo):
+    """Avisos do Pomodoro impressos pela thread quando um bloco termina."""
+    if bloco["tipo"] == "foco":
+        if completo:
+            print('\n[Pomodoro] Foco concluído! Hora da pausa.')
+        else:
+            print(f'\n[Pomodoro] Foco interrompido após {formatar_tempo(segundos_feitos)}.')
+    else:
+        print('\n[Pomodoro] Pausa encerrada! Volte ao foco.')
+
+# ----------------- Lembretes -----------------
+# Cada lembrete é {"id", "texto", "quando", "recorrencia", "avisado"}: "quando"
+# é "AAAA-MM-DD HH:MM" (None para lembrete sem hora) e "recorrencia" é None,
+# "diaria" ou "semanal". O id não muda quando outros lembretes são excluídos.
+
+FORMATO_QUANDO = "%Y-%m-%d %H:%M"
+RECORRENCIAS = {"diaria": datetime.timedelta(days=1), "semanal": datetime.timedelta(weeks=1)}
+
+# avisos já disparados, para quem não está olhando o terminal (mais recentes no fim)
+avisos = collections.deque(maxlen=100)
+
+class AgendadorLembretes:
+    """Fila de prioridade (heap) dos próximos avisos, com uma thread que dorme até o mais próximo.
+
+    Agendar custa O(log n) e, sem avisos pendentes, a thread fica parada em
+    wait() sem gastar nada. Reagendar ou cancelar não procura nada no heap: a
+    entrada antiga é descartada quando chega ao topo, porque a versão não bate."""
+
+    def __init__(self, ao_disparar):
+        self.heap = []      # (instante, versão, email, id do lembrete)
+        self.versoes = {}   # (email, id) -> versão agendada válida
+        self.contador = itertools.count()
+        self.condicao = threading.Condition()
+        self.ao_disparar = ao_disparar
+        self.thread = None
+
+    def agendar(self, email, id_lembrete, instante):
+        with self.condicao:
+            versao = next(self.contador)
+            self.versoes[(email, id_lembrete)] = versao
+            heapq.heappush(self.heap, (instante, versao, email, id_lembrete))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.rodar, daemon=True)
+                self.thread.start()
+            self.condicao.notify()
+
+    def cancelar(self, email, id_lembrete):
+        with self.condicao:
+            self.versoes.pop((email, id_lembrete), None)
+
+    def pendentes(self):
+        with self.condicao:
+            return len(self.versoes)
+
+    def proximo_vencido(self):
+        """Espera até o aviso do topo vencer e o retira (chamado com a condição travada)."""
+        while True:
+            while self.heap and self.versoes.get(self.heap[0][2:]) != self.heap[0][1]:
+                heapq.heappop(self.heap)
+            if not self.heap:
+                self.condicao.wait()
                 continue
-            elif "@" not in email or "." not in email:
-                print("Estrutura de e-mail inválida. Tente novamente.")
+            falta = self.heap[0][0] - time.time()
+            if falta > 0:
+                self.condicao.wait(falta)
                 continue
+            _, _, email, id_lembrete = heapq.heappop(self.heap)
+            del self.versoes[(email, id_lembrete)]
+            return email, id_lembrete
 
-            existe_o_email = False
-            for usuario in usuarios:
-                if usuario[1].lower() == email.lower():
-                    existe_o_email = True
-                    break
-            if existe_o_email:
-                print("Este e-mail já está cadastrado. Tente novamente.")
-                continue
-            break
+    def rodar(self):
+        while True:
+            with self.condicao:
+                email, id_lembrete = self.proximo_vencido()
+            try:
+                self.ao_disparar(email, id_lembrete)
+            except Exception as erro:  # não para os próximos avisos por uma gravação que falhou
+                print(f"\n[Lembrete] Não foi possível registrar o aviso: {erro}")
+
+def instante_lembrete(lembrete):
+    return datetime.datetime.strptime(lembrete["quando"], FORMATO_QUANDO).timestamp()
+
+def agendar_lembrete(email, lembrete):
+    if lembrete.get("quando") and not lembrete.get("avisado"):
+        agendador.agendar(email, lembrete["id"], instante_lembrete(lembrete))
+    else:
+        agendador.cancelar(email, lembrete["id"])
+
+def agendar_lembretes_usuario(email):
+    for lembrete in usuarios_dados[email]["lembretes"]:
+        agendar_lembrete(email, lembrete)
+
+def cancelar_lembretes_usuario(email):
+    for lembrete in usuarios_dados[email]["lembretes"]:
+        agendador.cancelar(email, lembrete["id"])
+
+def disparar_lembrete(email, id_lembrete):
+    """Chamado pela thread do agendador quando um lembrete vence."""
+    with trava_dados:
+        lembretes = usuarios_dados.get(email, {}).get("lembretes", [])
+        pos = next((i for i, l in enumerate(lembretes) if l["id"] == id_lembrete), None)
+        if pos is None:
+            return
+        lembrete = lembretes[pos]
+        passo = RECORRENCIAS.get(lembrete.get("recorrencia"))
+        if passo:
+            # próxima ocorrência no futuro (pula as que passaram com o programa fechado)
+            quando = datetime.datetime.strptime(lembrete["quando"], FORMATO_QUANDO)
+            agora = datetime.datetime.now()
+            while quando <= agora:
+                quando += passo
+            lembrete["quando"] = quando.strftime(FORMATO_QUANDO)
+        else:
+            lembrete["avisado"] = True
+        agendar_lembrete(email, lembrete)
+        salvar_tudo(("usuarios_dados", email, "lembretes", pos))
+    avisos.append((email, lembrete["texto"]))
+    print(f"\n[Lembrete] {lembrete['texto']}")
 
-        if email.lower() == 'sair':
-            continue
+agendador = AgendadorLembretes(disparar_lembrete)
 
+def novo_lembrete(u, texto, quando=None, recorrencia=None):
+    id_lembrete = u.get("proximo_id_lembrete", 0)
+    u["proximo_id_lembrete"] = id_lembrete + 1
+    return {"id": id_lembrete, "texto": texto, "quando": quando, "recorrencia": recorrencia, "avisado": False}
+
+def adicionar_lembrete(email, texto, quando=None, recorrencia=None):
+    u = usuarios_dados[email]
+    lembrete = novo_lembrete(u, texto, quando, recorrencia)
+    indice_busca(email, "lembretes").adicionar(texto)
+    u["lembretes"].append(lembrete)
+    agendar_lembrete(email, lembrete)
+    return lembrete
+
+def editar_lembrete(email, pos, texto, quando, recorrencia):
+    lembrete = usuarios_dados[email]["lembretes"][pos]
+    indice_busca(email, "lembretes").editar(pos, texto)
+    lembrete.update({"texto": texto, "quando": quando, "recorrencia": recorrencia, "avisado": False})
+    agendar_lembrete(email, lembrete)
+
+def excluir_lembrete(email, pos):
+    indice_busca(email, "lembretes").excluir(pos)
+    removido = usuarios_dados[email]["lembretes"].pop(pos)
+    agendador.cancelar(email, removido["id"])
+    return removido
+
+def descrever_lembrete(lembrete):
+    texto = lembrete["texto"]
+    if lembrete.get("quando"):
+        quando = datetime.datetime.strptime(lembrete["quando"], FORMATO_QUANDO).strftime("%d/%m/%Y %H:%M")
+        repete = {"diaria": ", todo dia", "semanal": ", toda semana"}.get(lembrete.get("recorrencia"), "")
+        avisado = " ✓" if lembrete.get("avisado") else ""
+        texto += f" (⏰ {quando}{repete}){avisado}"
+    return texto
+
+def perguntar_agendamento(atual=None):
+    """Pergunta data/hora e repetição; devolve (quando, recorrencia). ValueError se a data for inválida."""
+    dica = "Enter mantém, '-' remove" if atual and atual.get("quando") else "Enter para nenhuma"
+    entrada = perguntar(f"Data e hora do aviso (DD/MM/AAAA HH:MM, {dica}): ").strip()
+    if entrada == "-":
+        return None, None
+    if not entrada:
+        if atual:
+            return atual.get("quando"), atual.get("recorrencia")
+        return None, None
+    quando = datetime.datetime.strptime(entrada, "%d/%m/%Y %H:%M").strftime(FORMATO_QUANDO)
+    repetir = perguntar("Repetir? (1. Não  2. Todo dia  3. Toda semana): ").strip()
+    recorrencia = {"2": "diaria", "3": "semanal"}.get(repetir)
+    return quando, recorrencia
+
+# ----------------- Suporte -----------------
+
+POR_PAGINA_SUPORTE = 10
+
+class FilaSuporte:
+    """Índices sobre `solicitacoes`, montados uma vez ao iniciar e mantidos a cada alteração.
+
+    - pendentes / respondidas: ids em ordem de chegada (dict usado como conjunto
+      ordenado: tirar da fila de pendentes é O(1));
+    - por_email: ids de cada usuário; nao_lidas: respostas que o usuário ainda não viu;
+    - texto: índice de palavras das dúvidas.
+    Solicitações nunca são apagadas, então o id interno do índice de texto é a
+    posição na lista."""
+
+    def __init__(self, solicitacoes):
+        self.recarregar(solicitacoes)
+
+    def recarregar(self, solicitacoes):
+        """Refaz todos os índices (a lista mudou por fora: outro terminal, ids renumerados)."""
+        self.solicitacoes = solicitacoes
+        self.posicoes = {}      # id -> posição na lista
+        self.pendentes = {}
+        self.respondidas = {}
+        self.por_email = {}
+        self.nao_lidas = {}
+        self.texto = IndiceTexto([])
+        self.proximo_id = 1 + max((s["id"] for s in solicitacoes), default=0)
+        for s in solicitacoes:
+            self.indexar(len(self.posicoes), s)
+
+    def indexar(self, pos, s):
+        self.posicoes[s["id"]] = pos
+        (self.respondidas if s["respondida"] else self.pendentes)[s["id"]] = None
+        self.por_email.setdefault(s["email"].lower(), []).append(s["id"])
+        if s["respondida"] and not s["lida"]:
+            self.contar_nao_lida(s["email"], 1)
+        self.texto.adicionar(s["duvida"])
+
+    def contar_nao_lida(self, email, delta):
+        chave = email.lower()
+        self.nao_lidas[chave] = self.nao_lidas.get(chave, 0) + delta
+        if not self.nao_lidas[chave]:
+            del self.nao_lidas[chave]
+
+    def buscar(self, id_solicitacao):
+        pos = self.posicoes.get(id_solicitacao)
+        return None if pos is None else self.solicitacoes[pos]
+
+    def criar(self, usuario, email, duvida):
+        s = {
+            "id": self.proximo_id,
+            "usuario": usuario,
+            "email": email,
+            "duvida": duvida,
+            "respondida": False,
+            "resposta": "",
+            "lida": False
+        }
+        self.proximo_id += 1
+        self.solicitacoes.append(s)
+        self.indexar(len(self.solicitacoes) - 1, s)
+        return s
+
+    def responder(self, id_solicitacao, resposta):
+        """Grava a resposta e devolve a posição da solicitação (para salvar só ela)."""
+        s = self.buscar(id_solicitacao)
+        if not s["respondida"] or s["lida"]:
+            self.contar_nao_lida(s["email"], 1)
+        s["resposta"] = resposta
+        s["respondida"] = True
+        s["lida"] = False
+        self.pendentes.pop(id_solicitacao, None)
+        self.respondidas[id_solicitacao] = None
+        return self.posicoes[id_solicitacao]
+
+    def do_usuario(self, email):
+        return [self.buscar(i) for i in self.por_email.get(email.lower(), [])]
+
+    def marcar_lidas(self, email):
+        """Marca as respostas do usuário como vistas; devolve as posições alteradas."""
+        alteradas = []
+        if not self.nao_lidas.get(email.lower()):
+            return alteradas
+        for s in self.do_usuario(email):
+            if s["respondida"] and not s["lida"]:
+                s["lida"] = True
+                alteradas.append(self.posicoes[s["id"]])
+        self.nao_lidas.pop(email.lower(), None)
+        return alteradas
+
+    def pagina(self, numero, so_pendentes=False):
+        """Página `numero` (a partir de 0): pendentes mais antigas primeiro, depois as respondidas."""
+        inicio = numero * POR_PAGINA_SUPORTE
+        fim = inicio + POR_PAGINA_SUPORTE
+        ordem = itertools.chain(self.pendentes, () if so_pendentes else reversed(self.respondidas))
+        return [self.buscar(i) for i in itertools.islice(ordem, inicio, fim)]
+
+    def total(self, so_pendentes=False):
+        return len(self.pendentes) + (0 if so_pendentes else len(self.respondidas))
+
+    @medido
+    def pesquisar(self, consulta):
+        return [self.solicitacoes[pos] for pos in self.texto.buscar_ids(consulta)]
+
+fila_suporte = FilaSuporte(solicitacoes)
+
+def mostrar_solicitacao(s):
+    print(f'\nSolicitação #{s["id"]}')
+    print(f'Usuário: {s["usuario"]}')
+    print(f'E-mail: {s["email"]}')
+    print(f'Dúvida: {s["duvida"]}')
+    print(f'Status: {"Respondida" if s["respondida"] else "Pendente"}')
+    if s["respondida"]:
+        print(f'Resposta: {s["resposta"]}')
+
+def paginar_solicitacoes(so_pendentes=False):
+    """Mostra a fila página por página; 'p' próxima, 'a' anterior, outra tecla sai."""
+    total = fila_suporte.total(so_pendentes)
+    paginas = max(1, -(-total // POR_PAGINA_SUPORTE))
+    numero = 0
+    while True:
+        for s in fila_suporte.pagina(numero, so_pendentes):
+            if so_pendentes:
+                print(f'#{s["id"]} {s["usuario"]} - {s["duvida"]}')
+            else:
+                mostrar_solicitacao(s)
+        print(f'\nPágina {numero + 1} de {paginas} ({total} solicitações, {len(fila_suporte.pendentes)} pendentes)')
+        if paginas == 1:
+            return
+        navegar = perguntar("'p' próxima, 'a' anterior, Enter continua: ").strip().lower()
+        if navegar == 'p' and numero + 1 < paginas:
+            numero += 1
+        elif navegar == 'a' and numero > 0:
+            numero -= 1
+        elif navegar not in ('p', 'a'):
+            return
+
+# ----------------- Exportação -----------------
+# Um pipeline de geradores: os e-mails escolhidos -> a área de cada um (lida
+# e descartada uma por vez nos modos shards/sqlite) -> linhas de cada entidade
+# -> um arquivo por entidade, escrito linha a linha. Nada é montado inteiro
+# na memória. As senhas não são exportadas.
+
+CAMPOS_EXPORTACAO = {
+    "usuarios": ["nome", "email", "admin"],
+    "metas": ["email", "caminho", "nivel", "nome", "prioridade", "progresso", "concluida"],
+    "cronograma": ["email", "horario", "dia", "atividade"],
+    "anotacoes": ["email", "posicao", "texto"],
+    "lembretes": ["email", "id", "texto", "quando", "recorrencia", "avisado"],
+    "pomodoro": ["email", "inicio", "segundos", "tipo", "completo", "id_meta", "meta"],
+    "solicitacoes": ["id", "usuario", "email", "duvida", "respondida", "resposta"]
+}
+FORMATOS_EXPORTACAO = ("csv", "ndjson")
+
+def usuarios_para_exportar(emails=None):
+    if emails is None:
+        yield from usuarios
+        return
+    for email in emails:
+        usuario = encontrar_usuario_por_email(email)
+        if usuario is None:
+            print(f"Aviso: {email} não está cadastrado; ignorado na exportação.")
+        else:
+            yield usuario
+
+def area_para_exportar(email):
+    """A área do usuário sem deixá-la carregada se ainda não estava (modos shards/sqlite)."""
+    with trava_dados:
+        ja_carregada = email in usuarios_dados
+        carregar_usuario(email)
+        u = usuarios_dados.get(email)
+        if not ja_carregada:
+            usuarios_dados.pop(email, None)
+    if u is None:
+        return {}
+    migrar_area(u)  # só em memória: a exportação não grava nada
+    return u
+
+def linhas_metas(email, nos, prefixo=""):
+    for i, no in enumerate(nos):
+        caminho = f"{prefixo}{i}"
+        yield {"email": email, "caminho": caminho, "nivel": caminho.count("."), "nome": no.get("nome"),
+               "prioridade": no.get("prioridade"), "progresso": round(progresso_no(no), 2),
+               "concluida": no["concluida"]}
+        yield from linhas_metas(email, no.get("submetas", []), caminho + ".")
+
+def linhas_area(email, u, entidades):
+    """(entidade, linha) de tudo que está na área de um usuário."""
+    if "metas" in entidades:
+        for linha in linhas_metas(email, u.get("metas", [])):
+            yield "metas", linha
+    if "cronograma" in entidades:
+        for horario, dias in u.get("celulas_cronograma", {}).items():
+            for dia, atividades in dias.items():
+                for atividade in atividades:
+                    yield "cronograma", {"email": email, "horario": horario, "dia": dia, "atividade": atividade}
+    if "anotacoes" in entidades:
+        for i, texto in enumerate(u.get("anotacoes", [])):
+            yield "anotacoes", {"email": email, "posicao": i, "texto": texto}
+    if "lembretes" in entidades:
+        for lembrete in u.get("lembretes", []):
+            yield "lembretes", dict({c: lembrete.get(c) for c in CAMPOS_EXPORTACAO["lembretes"]}, email=email)
+    if "pomodoro" in entidades:
+        nomes = {meta["id"]: meta["nome"] for meta in u.get("metas", [])}
+        for inicio, segundos, tipo, completo, meta in u.get("pomodoro", {}).get("registros", []):
+            # registro antigo de uma meta que já não existe: só o nome
+            id_meta, nome = (None, meta) if isinstance(meta, str) else (meta, nomes.get(meta))
+            yield "pomodoro", {"email": email, "inicio": datetime.datetime.fromtimestamp(inicio).isoformat(),
+                               "segundos": segundos, "tipo": tipo, "completo": bool(completo),
+                               "id_meta": id_meta, "meta": nome}
+
+def linhas_exportacao(emails=None, entidades=None):
+    """Gera (entidade, linha) para os usuários e entidades escolhidos (None = todos)."""
+    entidades = set(entidades or CAMPOS_EXPORTACAO)
+    precisa_area = bool(entidades - {"usuarios", "solicitacoes"})
+    escolhidos = set()
+    for nome, email, _, admin in usuarios_para_exportar(emails):
+        escolhidos.add(email.lower())
+        if "usuarios" in entidades:
+            yield "usuarios", {"nome": nome, "email": email, "admin": admin}
+        if precisa_area:
+            yield from linhas_area(email, area_para_exportar(email), entidades)
+    if "solicitacoes" in entidades:
+        fonte = solicitacoes if emails is None else (
+            s for email in escolhidos for s in fila_suporte.do_usuario(email))
+        for s in fonte:
+            yield "solicitacoes", {c: s.get(c) for c in CAMPOS_EXPORTACAO["solicitacoes"]}
+
+def exportar(pasta, formato="csv", emails=None, entidades=None):
+    """Escreve um arquivo por entidade em `pasta`; devolve {entidade: linhas escritas}."""
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError(f"Formato desconhecido: {formato} (use csv ou ndjson).")
+    desconhecidas = set(entidades or []) - set(CAMPOS_EXPORTACAO)
+    if desconhecidas:
+        raise ValueError(f"Entidade desconhecida: {', '.join(sorted(desconhecidas))}.")
+    os.makedirs(pasta, exist_ok=True)
+    arquivos = {}
+    escritores = {}
+    contagem = collections.Counter()
+    try:
+        for entidade, linha in linhas_exportacao(emails, entidades):
+            if entidade not in arquivos:
+                # o arquivo de cada entidade só é criado quando aparece a primeira linha dela
+                arquivos[entidade] = open(os.path.join(pasta, f"{entidade}.{formato}"), "w",
+                                          encoding="utf-8", newline="")
+                if formato == "csv":
+                    escritores[entidade] = csv.DictWriter(arquivos[entidade], CAMPOS_EXPORTACAO[entidade])
+                    escritores[entidade].writeheader()
+            if formato == "csv":
+                escritores[entidade].writerow(linha)
+            else:
+                arquivos[entidade].write(json.dumps(linha, ensure_ascii=False) + "\n")
+            contagem[entidade] += 1
+    finally:
+        for f in arquivos.values():
+            f.close()
+    return contagem
+
+def mostrar_exportacao(pasta, formato, contagem):
+    if not contagem:
+        print("Nada para exportar com esses filtros.")
+        return
+    for entidade, linhas in contagem.items():
+        print(f"  {os.path.join(pasta, f'{entidade}.{formato}')}: {linhas} linha(s)")
+
+# ----------------- Serviço HTTP -----------------
+# Servidor asyncio (só biblioteca padrão) com as mesmas operações do menu em
+# JSON, para vários usuários ao mesmo tempo num único processo. O login
+# devolve um token que vai no cabeçalho "Authorization: Bearer <token>".
+# Posições nas URLs começam em 0; /metas/2/0/1 é a submeta 1 da submeta 0 da
+# meta 2. Antes de cada requisição o servidor lê o que o menu (ou outro
+# processo) gravou no dados.json, então os dois podem usar os mesmos dados.
+
+RAZOES_HTTP = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized",
+               403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+               409: "Conflict", 500: "Internal Server Error"}
+
+sessoes = {}  # token -> e-mail
+rotas = []    # (método, padrão, função, acesso) com acesso "publico", "usuario" ou "admin"
+
+class ErroHttp(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+class Pedido:
+    def __init__(self, corpo, consulta, email=None):
+        self.corpo = corpo
+        self.consulta = consulta
+        self.email = email
+
+    def campo(self, nome, tipo=str, obrigatorio=True):
+        valor = self.corpo.get(nome)
+        if valor is None and not obrigatorio:
+            return None
+        tipos = tipo if isinstance(tipo, tuple) else (tipo,)
+        # bool é subclasse de int: true não vale como número
+        if (not isinstance(valor, tipo) or (tipo is str and not valor.strip())
+                or (isinstance(valor, bool) and bool not in tipos)):
+            raise ErroHttp(400, f'Campo "{nome}" ausente ou inválido.')
+        return valor
+
+def rota(metodo, padrao, acesso="usuario"):
+    def registrar(funcao):
+        rotas.append((metodo, re.compile(padrao + "$"), funcao, acesso))
+        return funcao
+    return registrar
+
+def no_da_meta(email, posicoes):
+    """Caminho [meta, submeta, ...] até o nó indicado pelas posições da URL."""
+    try:
+        caminho = [usuarios_dados[email]["metas"][posicoes[0]]]
+        for pos in posicoes[1:]:
+            caminho.append(caminho[-1]["submetas"][pos])
+    except (IndexError, KeyError, TypeError):
+        raise ErroHttp(404, "Meta não encontrada.")
+    return caminho
+
+def posicoes_da_url(meta, resto):
+    return [int(meta)] + [int(p) for p in resto.split("/") if p]
+
+def meta_em_json(no):
+    return {
+        "nome": no["nome"],
+        "prioridade": no.get("prioridade"),
+        "concluida": no["concluida"],
+        "progresso": progresso_no(no),
+        "submetas": [meta_em_json(s) for s in no.get("submetas", [])]
+    }
+
+@rota("POST", "/contas", acesso="publico")
+def api_criar_conta(pedido):
+    nome, email, senha = pedido.campo("nome"), pedido.campo("email").strip(), pedido.campo("senha")
+    if "@" not in email or "." not in email:
+        raise ErroHttp(400, "Estrutura de e-mail inválida.")
+    if encontrar_usuario_por_email(email) is not None:
+        raise ErroHttp(409, "Este e-mail já está cadastrado.")
+    problema = problema_na_senha(senha)
+    if problema:
+        raise ErroHttp(400, problema)
+    adicionar_usuario(nome, email, senha)
+    garantir_estrutura_usuario(email)
+    salvar_tudo(("usuarios", len(usuarios) - 1), ("usuarios_dados", email))
+    return 201, {"nome": nome, "email": email}
+
+@rota("POST", "/login", acesso="publico")
+def api_login(pedido):
+    usuario = encontrar_usuario_por_email(pedido.campo("email"))
+    if usuario is None or usuario[2] != pedido.campo("senha"):
+        raise ErroHttp(401, "E-mail ou senha incorretos.")
+    garantir_estrutura_usuario(usuario[1])
+    token = secrets.token_urlsafe(24)
+    sessoes[token] = usuario[1]
+    return {"token": token, "nome": usuario[0], "admin": usuario[3],
+            "respostas_novas": fila_suporte.nao_lidas.get(usuario[1].lower(), 0)}
+
+@rota("GET", "/metas")
+def api_metas(pedido):
+    if pedido.consulta.get("ordem", [""])[0] == "prioridade":
+        metas = [dict(meta_em_json(m), posicao=pos) for pos, m in indice_metas(pedido.email).em_ordem()]
+    else:
+        metas = [meta_em_json(m) for m in usuarios_dados[pedido.email]["metas"]]
+    return {"progresso_geral": progresso_geral(pedido.email), "metas": metas}
+
+@rota("GET", "/metas/proxima")
+def api_proxima_meta(pedido):
+    proxima = indice_metas(pedido.email).proxima()
+    if proxima is None:
+        raise ErroHttp(404, "Nenhuma meta em aberto.")
+    pos, meta = proxima
+    return {"posicao": pos, "meta": meta_em_json(meta)}
+
+@rota("POST", "/metas")
+def api_adicionar_meta(pedido):
+    prioridade = pedido.corpo.get("prioridade")
+    if prioridade not in ["alta", "media", "baixa"]:
+        prioridade = "media"
+    adicionar_meta(pedido.email, pedido.campo("nome"), prioridade)
+    metas = usuarios_dados[pedido.email]["metas"]
+    salvar_tudo(("usuarios_dados", pedido.email, "metas", len(metas) - 1),
+                ("usuarios_dados", pedido.email, "proximo_id_meta"))
+    return 201, meta_em_json(metas[-1])
+
+@rota("DELETE", r"/metas/(\d+)")
+def api_remover_meta(pedido, meta):
+    no_da_meta(pedido.email, [int(meta)])
+    remover_meta(pedido.email, int(meta))
+    salvar_tudo(("usuarios_dados", pedido.email, "metas"), ("usuarios_dados", pedido.email, "soma_metas"))
+    return {}
+
+@rota("POST", r"/metas/(\d+)((?:/\d+)*)/submetas")
+def api_adicionar_submeta(pedido, meta, resto):
+    caminho = no_da_meta(pedido.email, posicoes_da_url(meta, resto))
+    adicionar_submeta(pedido.email, caminho, pedido.campo("nome"))
+    salvar_meta(pedido.email, int(meta))
+    return 201, meta_em_json(caminho[-1]["submetas"][-1])
+
+@rota("PUT", r"/metas/(\d+)((?:/\d+)*)/progresso")
+def api_definir_progresso(pedido, meta, resto):
+    caminho = no_da_meta(pedido.email, posicoes_da_url(meta, resto))
+    valor = pedido.campo("progresso", (int, float))
+    if not 0 <= valor <= 100:
+        raise ErroHttp(400, "O progresso vai de 0 a 100.")
+    if caminho[-1].get("submetas"):
+        raise ErroHttp(409, "O progresso deste item vem das submetas.")
+    definir_progresso(pedido.email, caminho, valor)
+    salvar_meta(pedido.email, int(meta))
+    return meta_em_json(caminho[-1])
+
+@rota("POST", r"/metas/(\d+)((?:/\d+)*)/conclusao")
+def api_alternar_conclusao(pedido, meta, resto):
+    caminho = no_da_meta(pedido.email, posicoes_da_url(meta, resto))
+    alternar_conclusao(pedido.email, caminho)
+    salvar_meta(pedido.email, int(meta))
+    return meta_em_json(caminho[-1])
+
+@rota("GET", "/cronograma")
+def api_cronograma(pedido):
+    u = usuarios_dados[pedido.email]
+    return {"dias": u["dias"], "horarios": u["horarios"], "celulas": u["celulas_cronograma"]}
+
+@rota("PUT", "/cronograma")
+def api_definir_celula(pedido):
+    u = usuarios_dados[pedido.email]
+    horario, dia = pedido.campo("horario"), pedido.campo("dia")
+    atividades = pedido.campo("atividades", list)
+    if horario not in u["horarios"] or dia not in u["dias"]:
+        raise ErroHttp(404, "Horário ou dia não existe no cronograma.")
+    if not all(isinstance(a, str) for a in atividades):
+        raise ErroHttp(400, 'Campo "atividades" deve ser uma lista de textos.')
+    definir_atividades(pedido.email, horario, dia, [a.strip() for a in atividades if a.strip()])
+    salvar_tudo(("usuarios_dados", pedido.email, "celulas_cronograma", horario))
+    return {"horario": horario, "dia": dia, "atividades": atividades_da_celula(u, horario, dia)}
+
+@rota("GET", "/cronograma/atividade")
+def api_localizar_atividade(pedido):
+    nome = pedido.consulta.get("nome", [""])[0].strip()
+    if not nome:
+        raise ErroHttp(400, 'Parâmetro "nome" ausente.')
+    posicoes, minutos = localizar_atividade(pedido.email, nome)
+    if not posicoes:
+        raise ErroHttp(404, "Atividade não encontrada no cronograma.")
+    return {"atividade": nome, "celulas": [{"horario": hora, "dia": dia} for hora, dia in posicoes],
+            "minutos_por_semana": minutos}
+
+@rota("GET", "/anotacoes")
+def api_anotacoes(pedido):
+    anotacoes = usuarios_dados[pedido.email]["anotacoes"]
+    termo = pedido.consulta.get("q", [""])[0].strip()
+    if termo:
+        return {"anotacoes": pesquisar(indice_busca(pedido.email, "anotacoes"), anotacoes, termo)}
+    return {"anotacoes": anotacoes}
+
+@rota("POST", "/anotacoes")
+def api_adicionar_anotacao(pedido):
+    texto = pedido.campo("texto")
+    anotacoes = usuarios_dados[pedido.email]["anotacoes"]
+    indice_busca(pedido.email, "anotacoes").adicionar(texto)
+    anotacoes.append(texto)
+    salvar_tudo(("usuarios_dados", pedido.email, "anotacoes", len(anotacoes) - 1))
+    return 201, {"posicao": len(anotacoes) - 1, "texto": texto}
+
+@rota("DELETE", r"/anotacoes/(\d+)")
+def api_excluir_anotacao(pedido, pos):
+    anotacoes = usuarios_dados[pedido.email]["anotacoes"]
+    pos = int(pos)
+    if pos >= len(anotacoes):
+        raise ErroHttp(404, "Anotação não encontrada.")
+    indice_busca(pedido.email, "anotacoes").excluir(pos)
+    del anotacoes[pos]
+    salvar_tudo(("usuarios_dados", pedido.email, "anotacoes"))
+    return {}
+
+@rota("GET", "/lembretes")
+def api_lembretes(pedido):
+    return {"lembretes": usuarios_dados[pedido.email]["lembretes"]}
+
+@rota("POST", "/lembretes")
+def api_adicionar_lembrete(pedido):
+    quando = pedido.campo("quando", str, obrigatorio=False)
+    recorrencia = pedido.campo("recorrencia", str, obrigatorio=False)
+    if quando:
+        try:
+            datetime.datetime.strptime(quando, FORMATO_QUANDO)
+        except ValueError:
+            raise ErroHttp(400, 'Campo "quando" deve estar no formato AAAA-MM-DD HH:MM.')
+    if recorrencia not in RECORRENCIAS:
+        recorrencia = None
+    lembretes = usuarios_dados[pedido.email]["lembretes"]
+    lembrete = adicionar_lembrete(pedido.email, pedido.campo("texto"), quando, recorrencia)
+    salvar_tudo(("usuarios_dados", pedido.email, "lembretes", len(lembretes) - 1),
+                ("usuarios_dados", pedido.email, "proximo_id_lembrete"))
+    return 201, lembrete
+
+@rota("DELETE", r"/lembretes/(\d+)")
+def api_excluir_lembrete(pedido, pos):
+    if int(pos) >= len(usuarios_dados[pedido.email]["lembretes"]):
+        raise ErroHttp(404, "Lembrete não encontrado.")
+    excluir_lembrete(pedido.email, int(pos))
+    salvar_tudo(("usuarios_dados", pedido.email, "lembretes"))
+    return {}
+
+@rota("GET", "/suporte")
+def api_minhas_solicitacoes(pedido):
+    minhas = [dict(s) for s in fila_suporte.do_usuario(pedido.email)]
+    lidas = fila_suporte.marcar_lidas(pedido.email)
+    if lidas:
+        salvar_tudo(*[("solicitacoes", pos) for pos in lidas])
+    return {"solicitacoes": minhas}
+
+@rota("POST", "/suporte")
+def api_criar_solicitacao(pedido):
+    nome = encontrar_usuario_por_email(pedido.email)[0]
+    s = fila_suporte.criar(nome, pedido.email, pedido.campo("duvida"))
+    salvar_tudo(("solicitacoes", len(solicitacoes) - 1))
+    return 201, s
+
+@rota("GET", "/suporte/fila", acesso="admin")
+def api_fila_suporte(pedido):
+    so_pendentes = pedido.consulta.get("pendentes", ["0"])[0] == "1"
+    try:
+        pagina = int(pedido.consulta.get("pagina", ["0"])[0])
+    except ValueError:
+        raise ErroHttp(400, 'Parâmetro "pagina" inválido.')
+    return {"total": fila_suporte.total(so_pendentes), "pendentes": len(fila_suporte.pendentes),
+            "solicitacoes": fila_suporte.pagina(pagina, so_pendentes)}
+
+@rota("GET", "/suporte/busca", acesso="admin")
+def api_pesquisar_suporte(pedido):
+    return {"solicitacoes": fila_suporte.pesquisar(pedido.consulta.get("q", [""])[0])}
+
+@rota("POST", r"/suporte/(\d+)/resposta", acesso="admin")
+def api_responder(pedido, id_solicitacao):
+    if fila_suporte.buscar(int(id_solicitacao)) is None:
+        raise ErroHttp(404, "Solicitação não encontrada.")
+    pos = fila_suporte.responder(int(id_solicitacao), pedido.campo("resposta"))
+    salvar_tudo(("solicitacoes", pos))
+    return solicitacoes[pos]
+
+def tratar_requisicao(metodo, alvo, cabecalhos, corpo):
+    """Executa uma requisição e devolve (status, objeto da resposta)."""
+    url = urllib.parse.urlsplit(alvo)
+    encontrou_caminho = False
+    for metodo_rota, padrao, funcao, acesso in rotas:
+        combinacao = padrao.match(url.path)
+        if not combinacao:
+            continue
+        encontrou_caminho = True
+        if metodo_rota != metodo:
+            continue
+        try:
+            try:
+                corpo_json = json.loads(corpo) if corpo else {}
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                raise ErroHttp(400, "O corpo deve ser JSON.")
+            if not isinstance(corpo_json, dict):
+                raise ErroHttp(400, "O corpo deve ser um objeto JSON.")
+            pedido = Pedido(corpo_json, urllib.parse.parse_qs(url.query))
+            with trava_dados:
+                sincronizar_com_arquivo()
+                if acesso != "publico":
+                    token = cabecalhos.get("authorization", "").removeprefix("Bearer ").strip()
+                    pedido.email = sessoes.get(token)
+                    if pedido.email is None:
+                        raise ErroHttp(401, "Faça login para continuar.")
+                    if acesso == "admin" and not encontrar_usuario_por_email(pedido.email)[3]:
+                        raise ErroHttp(403, "Acesso restrito aos administradores.")
+                resultado = funcao(pedido, *combinacao.groups())
+        except ErroHttp as erro:
+            return erro.status, {"erro": str(erro)}
+        return resultado if isinstance(resultado, tuple) else (200, resultado)
+    if encontrou_caminho:
+        return 405, {"erro": "Método não permitido."}
+    return 404, {"erro": "Endereço não encontrado."}
+
+async def atender_conexao(leitor, escritor):
+    """Lê requisições HTTP/1.1 da conexão (com keep-alive) e responde em JSON."""
+    try:
         while True:
-            senha = input("Digite sua senha (mínimo 6 caracteres e pelo menos 1 número): ")
-            if senha.lower() == 'sair':
-                print("Você cancelou a criação da conta. Retornando ao menu principal.\n")
+            linha = await leitor.readline()
+            if not linha.strip():
                 break
-            elif senha == "":
-                print("A senha não pode ser vazia. Tente novamente.")
-                continue
-            elif len(senha) < 6:
-                print("A senha deve ter pelo menos 6 caracteres. Tente novamente.")
-                continue
-
-            numeros = ['0', '1', '2', '3', '4', '5', '6', '7', '8', '9']
-            temnumero = False
-            for caractere in senha:
-                if caractere in numeros:
-                    temnumero = True
+            metodo, alvo, _ = linha.decode("latin-1").split(" ", 2)
+            cabecalhos = {}
+            while True:
+                linha = await leitor.readline()
+                if linha in (b"\r\n", b"\n", b""):
                     break
-            if not temnumero:
-                print("A senha deve conter pelo menos 1 número. Tente novamente.")
+                nome, _, valor = linha.decode("latin-1").partition(":")
+                cabecalhos[nome.strip().lower()] = valor.strip()
+            tamanho = int(cabecalhos.get("content-length") or 0)
+            corpo = await leitor.readexactly(tamanho) if tamanho else b""
+            try:
+                status, resposta = tratar_requisicao(metodo, alvo, cabecalhos, corpo)
+            except Exception as erro:  # não derruba o servidor por uma requisição
+                status, resposta = 500, {"erro": f"Erro interno: {erro}"}
+            conteudo = json.dumps(resposta, ensure_ascii=False).encode("utf-8")
+            manter = cabecalhos.get("connection", "").lower() != "close"
+            escritor.write(
+                f"HTTP/1.1 {status} {RAZOES_HTTP[status]}\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(conteudo)}\r\n"
+                f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n".encode("latin-1") + conteudo)
+            await escritor.drain()
+            if not manter:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass  # cliente desconectou ou mandou uma requisição malformada
+    finally:
+        escritor.close()
+
+async def iniciar_servidor(host, porta):
+    return await asyncio.start_server(atender_conexao, host, porta)
+
+def servir(host, porta):
+    async def rodar():
+        servidor = await iniciar_servidor(host, porta)
+        endereco = servidor.sockets[0].getsockname()
+        print(f"Servidor StudyON em http://{endereco[0]}:{endereco[1]} (Ctrl+C para encerrar)")
+        async with servidor:
+            await servidor.serve_forever()
+    try:
+        asyncio.run(rodar())
+    except KeyboardInterrupt:
+        print("\nEncerrando o servidor...")
+    finally:
+        salvar_tudo()
+
+# ----------------- Modo em lote -----------------
+# Um arquivo NDJSON com uma operação por linha, ex.:
+#   {"op": "criar_usuario", "nome": "ana", "email": "ana@x.com", "senha": "senha1"}
+#   {"op": "adicionar_meta", "email": "ana@x.com", "nome": "Cálculo", "prioridade": "alta"}
+#   {"op": "adicionar_submeta", "email": "ana@x.com", "meta": [-1], "nome": "Limites", "progresso": 30}
+# "meta" é o caminho de posições até o nó pai (negativas contam do fim: -1 é
+# a última meta criada). As operações usam as mesmas validações da API; as
+# gravações ficam para o fim, num único salvar_tudo.
+
+def lote_adicionar_submeta(pedido):
+    posicoes = pedido.campo("meta", list)
+    if not posicoes or not all(type(p) is int for p in posicoes):
+        raise ErroHttp(400, 'Campo "meta" deve ser uma lista de posições (números inteiros).')
+    caminho = no_da_meta(pedido.email, posicoes)
+    # tudo validado antes de mexer: a gravação do lote é uma só, no fim, e
+    # levaria junto o que uma linha recusada tivesse deixado na memória
+    nome = pedido.campo("nome")
+    progresso = pedido.campo("progresso", (int, float), obrigatorio=False)
+    if progresso is not None and not 0 <= progresso <= 100:
+        raise ErroHttp(400, "O progresso vai de 0 a 100.")
+    adicionar_submeta(pedido.email, caminho, nome)
+    if progresso is not None:
+        definir_progresso(pedido.email, caminho + [caminho[-1]["submetas"][-1]], progresso)
+    metas = usuarios_dados[pedido.email]["metas"]
+    salvar_meta(pedido.email, posicoes[0] % len(metas))
+
+OPERACOES_LOTE = {
+    "criar_usuario": (api_criar_conta, False),  # (função, precisa de um usuário existente)
+    "adicionar_meta": (api_adicionar_meta, True),
+    "adicionar_submeta": (lote_adicionar_submeta, True),
+    "definir_celula": (api_definir_celula, True),
+    "adicionar_anotacao": (api_adicionar_anotacao, True),
+    "adicionar_lembrete": (api_adicionar_lembrete, True)
+}
+
+def executar_lote(arquivo):
+    """Aplica as operações do arquivo e grava tudo uma vez no fim; devolve o número de erros."""
+    global gravacoes_adiadas
+    erros = 0
+    total = 0
+    inicio = time.perf_counter()
+    gravacoes_adiadas = {}  # dicionário como conjunto ordenado
+    try:
+        for numero, linha in enumerate(arquivo, 1):
+            linha = linha.strip()
+            if not linha or linha.startswith("#"):
                 continue
-            break
+            total += 1
+            try:
+                try:
+                    operacao = json.loads(linha)
+                except json.JSONDecodeError:
+                    raise ErroHttp(400, "linha não é um JSON válido.")
+                if not isinstance(operacao, dict) or operacao.get("op") not in OPERACOES_LOTE:
+                    raise ErroHttp(400, f'operação desconhecida: {operacao.get("op") if isinstance(operacao, dict) else operacao!r}.')
+                funcao, precisa_usuario = OPERACOES_LOTE[operacao["op"]]
+                pedido = Pedido(operacao, {})
+                if precisa_usuario:
+                    usuario = encontrar_usuario_por_email(pedido.campo("email"))
+                    if usuario is None:
+                        raise ErroHttp(404, f'usuário {operacao["email"]} não encontrado.')
+                    pedido.email = usuario[1]
+                    garantir_estrutura_usuario(pedido.email)
+                with trava_dados:
+                    funcao(pedido)
+            except ErroHttp as erro:
+                erros += 1
+                print(f"Linha {numero}: {erro}")
+            except Exception as erro:  # não perde o resto do lote por uma linha
+                erros += 1
+                print(f"Linha {numero}: erro inesperado ({type(erro).__name__}: {erro}).")
+    finally:
+        alteracoes = gravacoes_adiadas
+        gravacoes_adiadas = None
+        inicio_gravacao = time.perf_counter()
+        if alteracoes:
+            salvar_tudo(*caminhos_minimos(alteracoes))
+    fim = time.perf_counter()
+    print(f"{total} operações em {fim - inicio:.2f} s ({total / max(fim - inicio, 1e-9):.0f} op/s), "
+          f"{erros} com erro; gravação final: {fim - inicio_gravacao:.2f} s")
+    return erros
 
-        if senha.lower() == 'sair':
-            continue
+# ----------------- Programa principal (menu) -----------------
 
-        usuarios.append([nome_usuario, email, senha, False])
-        garantir_estrutura_usuario(email)
-        salvar_tudo()
-        print(f"Conta criada com sucesso! Bem-vindo(a), {nome_usuario}!\n")
+def main():
+    while True:
+        print("=== Sistema de Menu ===")
+        print("1. Criar conta")
+        print("2. Fazer login")
+        print("3. Recuperar senha")
+        print("0. Encerrar programa")
 
-    elif opcao == '2':
-        print("\n=== Login ===")
+        opcao = perguntar("Escolha uma opção: ").strip()
 
-        cancel_login = False
-        while True:
-            email_login = input("Digite seu e-mail (ou 'sair' para cancelar): ")
-            if email_login.lower() == 'sair':
-                print("Você cancelou o login. Retornando ao menu principal.\n")
-                cancel_login = True
-                break
-            elif email_login == "":
-                print("O e-mail não pode ser vazio. Tente novamente.")
-                continue
-            elif "@" not in email_login or "." not in email_login:
-                print("Estrutura de e-mail inválida. Tente novamente.")
-                continue
+        if opcao == '0':
+            print("Encerrando o programa...")
+            salvar_tudo()
+            sys.exit()
 
-            existe_o_email = False
-            for user in usuarios:
-                if user[1].lower() == email_login.lower():
-                    existe_o_email = True
+        elif opcao == '1':
+            print("\n=== Criação de Conta ===")
+
+            while True:
+                nome_usuario = perguntar("Digite o nome de usuário desejado (ou 'sair' para cancelar): ")
+                if nome_usuario.lower() == 'sair':
+                    print("Você cancelou a criação da conta. Retornando ao menu principal.\n")
                     break
-            if not existe_o_email:
-                print("Este e-mail não está cadastrado. Tente novamente.\n")
-                continue
+                elif nome_usuario == "":
+                    print("O nome de usuário não pode ser vazio. Tente novamente.")
+                    continue
+                break
 
-            break
+            if nome_usuario.lower() == 'sair':
+                continue
 
-        if cancel_login:
-            continue
+            while True:
+                email = perguntar("Digite seu email: ")
+                if email.lower() == 'sair':
+                    print("Você cancelou a criação da conta. Retornando ao menu principal.\n")
+                    break
+                elif email == "":
+                    print("O email não pode ser vazio. Tente novamente.")
+                    continue
+                elif "@" not in email or "." not in email:
+                    print("Estrutura de e-mail inválida. Tente novamente.")
+                    continue
 
-        while True:
-            senha_login = input("Digite sua senha (ou 'sair' para cancelar): ")
-            if senha_login.lower() == 'sair':
-                print("Você cancelou o login. Retornando ao menu principal.\n")
-                cancel_login = True
+                if encontrar_usuario_por_email(email) is not None:
+                    print("Este e-mail já está cadastrado. Tente novamente.")
+                    continue
                 break
-            elif senha_login == "":
-                print("A senha não pode ser vazia. Tente novamente.")
+
+            if email.lower() == 'sair':
                 continue
 
-            usuario_encontrado = None
-            for usuario in usuarios:
-                if usuario[1].lower() == email_login.lower() and usuario[2] == senha_login:
-                    usuario_encontrado = usuario
+            while True:
+                senha = perguntar("Digite sua senha (mínimo 6 caracteres e pelo menos 1 número): ")
+                if senha.lower() == 'sair':
+                    print("Você cancelou a criação da conta. Retornando ao menu principal.\n")
                     break
-
-            if usuario_encontrado:
-                print(f"Login bem-sucedido! Bem-vindo(a) de volta, {usuario_encontrado[0]}!")
+                problema = problema_na_senha(senha)
+                if problema:
+                    print(f"{problema} Tente novamente.")
+                    continue
                 break
-            else:
-                print('Senha incorreta! Tente novamente.')
 
-        if cancel_login:
-            continue
+            if senha.lower() == 'sair':
+                continue
 
-        # garante estrutura do usuário logado
-        garantir_estrutura_usuario(usuario_encontrado[1])
+            adicionar_usuario(nome_usuario, email, senha)
+            garantir_estrutura_usuario(email)
+            salvar_tudo(("usuarios", len(usuarios) - 1), ("usuarios_dados", email))
+            print(f"Conta criada com sucesso! Bem-vindo(a), {nome_usuario}!\n")
 
-        # ------------------- Área do Admin -------------------
-        if usuario_encontrado[3] == True:
-            print('Entrando na área do administrador...\n')
+        elif opcao == '2':
+            print("\n=== Login ===")
 
+            cancel_login = False
             while True:
-                print('\n=== ÁREA DO ADMIN ===')
-                print('1. Ver solicitações de suporte')
-                print('2. Responder solicitação')
-                print('0. Sair')
+                email_login = perguntar("Digite seu e-mail (ou 'sair' para cancelar): ")
+                if email_login.lower() == 'sair':
+                    print("Você cancelou o login. Retornando ao menu principal.\n")
+                    cancel_login = True
+                    break
+                elif email_login == "":
+                    print("O e-mail não pode ser vazio. Tente novamente.")
+                    continue
+                elif "@" not in email_login or "." not in email_login:
+                    print("Estrutura de e-mail inválida. Tente novamente.")
+                    continue
 
-                opcao_admin = input('Escolha: ').strip()
+                if encontrar_usuario_por_email(email_login) is None:
+                    print("Este e-mail não está cadastrado. Tente novamente.\n")
+                    continue
 
-                if opcao_admin == '1':
-                    print('\n=== SOLICITAÇÕES DE SUPORTE ===')
+                break
 
-                    if len(solicitacoes) == 0:
-                        print('Nenhuma solicitação encontrada.\n')
-                    else:
-                        for i, s in enumerate(solicitacoes):
-                            print(f'\nSolicitação {i+1}')
-                            print(f'Usuário: {s["usuario"]}')
-                            print(f'E-mail: {s["email"]}')
-                            print(f'Dúvida: {s["duvida"]}')
-                            print(f'Status: {"Respondida" if s["respondida"] else "Pendente"}')
-                            if s["respondida"]:
-                                print(f'Resposta: {s["resposta"]}')
-                    print()
-
-                elif opcao_admin == '2':
-                    if len(solicitacoes) == 0:
-                        print('Nenhuma solicitação encontrada.\n')
-                    else:
-                        print('=== Responder solicitação ===')
+            if cancel_login:
+                continue
 
-                        for i, s in enumerate(solicitacoes, start=1):
-                            print(f'{i}. {s["usuario"]} - {s["duvida"]} ({"Respondida" if s["respondida"] else "Pendente"})')
+            while True:
+                senha_login = perguntar("Digite sua senha (ou 'sair' para cancelar): ")
+                if senha_login.lower() == 'sair':
+                    print("Você cancelou o login. Retornando ao menu principal.\n")
+                    cancel_login = True
+                    break
+                elif senha_login == "":
+                    print("A senha não pode ser vazia. Tente novamente.")
+                    continue
 
-                        try:
-                            escolha = int(input("Digite o número da solicitação para responder: "))
-                            if 1 <= escolha <= len(solicitacoes):
-                                idx = escolha - 1
-                                resposta = input("Digite sua resposta: ").strip()
-                                solicitacoes[idx]["resposta"] = resposta
-                                solicitacoes[idx]["respondida"] = True
-                                salvar_tudo()
-                                print("Solicitação marcada como respondida!\n")
-                            else:
-                                print("Número fora do intervalo.\n")
-                        except ValueError:
-                            print("Entrada inválida, digite um número.\n")
+                usuario_encontrado = encontrar_usuario_por_email(email_login)
+                if usuario_encontrado and usuario_encontrado[2] != senha_login:
+                    usuario_encontrado = None
 
-                elif opcao_admin == '0':
-                    print('Saindo...\n')
+                if usuario_encontrado:
+                    print(f"Login bem-sucedido! Bem-vindo(a) de volta, {usuario_encontrado[0]}!")
                     break
                 else:
-                    print('Opção inválida!\n')
+                    print('Senha incorreta! Tente novamente.')
 
-        # ------------------- Área do Usuário Comum -------------------
-        else:
-            email_logado = usuario_encontrado[1]
-            # carrega dados locais
-            user_data = usuarios_dados[email_logado]
-            dias = user_data["dias"]
-            horarios = user_data["horarios"]
-            cronograma = user_data["matriz_cronograma"]
-            metas = user_data["metas"]
-            anotacoes = user_data["anotacoes"]
-            lembretes = user_data["lembretes"]
-
-            # loop principal do usuário
-            while True:
-                print('\n=== BEM VINDO AO STUDYON ===')
-                print('  --- Menu Principal ---  ')
-                print('1. Metas')
-                print('2. Cronograma')
-                print('3. Anotações')
-                print('4. Lembretes')
-                print('5. Cronômetro Pomodoro')
-                print('6. Suporte')
-                print('0. Sair')
-                escolha = input ('Escolha uma opção: ').strip()
-
-                # ---------- Metas ----------
-                if escolha == '1':
-                    def mostrar_barra_progresso(porcentagem):
-                        barras = int(porcentagem // 5)
-                        espacos = 20 - barras
-                        print(f"[{'█' * barras}{' ' * espacos}] {porcentagem:.1f}%")
-
-                    while True:
-                        print("\n--- Minhas Metas ---")
-                        print("1. Adicionar meta")
-                        print("2. Ver metas")
-                        print("3. Gerenciar submetas de uma meta")
-                        print("4. Progresso geral das metas")
-                        print("5. Marcar meta como concluída")
-                        print("6. Editar/Excluir meta")
-                        print("0. Voltar ao menu principal")
-
-                        opc = input("Escolha uma opção: ").strip()
-
-                        if opc == '1':
-                            nome = input("\nDigite o nome da meta: ").strip()
-                            if nome:
-                                prioridade = input("Escolha a prioridade da meta (alta, média ou baixa): ").strip().lower()
-                                if prioridade not in ["alta", "media", "baixa"]:
-                                    prioridade = "media"
-                                metas.append({
-                                    "nome": nome,
-                                    "submetas": [],
-                                    "concluida": False,
-                                    "prioridade": prioridade
-                                })
-                                salvar_tudo()
-                                print("Meta adicionada com sucesso!")
-                            else:
-                                print("Você não digitou nenhuma meta.")
+            if cancel_login:
+                continue
 
-                        elif opc == '2':
-                            if not metas:
-                                print("Nenhuma meta cadastrada.")
-                            else:
-                                print("\nMetas:")
-                                for i, meta in enumerate(metas, 1):
-                                    if meta.get("concluida", False):
-                                        status = "✓ CONCLUÍDA"
-                                        total = 100
-                                    else:
-                                        submetas = meta["submetas"]
-                                        if submetas:
-                                            total = sum(s.get("progresso", 0) for s in submetas) / len(submetas)
-                                        else:
-                                            total = 0
-                                        status = "em andamento"
-                                    prior = meta.get("prioridade", "media")
-                                    print(f"{i}. {meta['nome']} | Prioridade: {prior} | {status} - {total:.1f}%")
-
-                        elif opc == '3':
-                            if not metas:
-                                print("Nenhuma meta cadastrada.")
-                                continue
+            # garante estrutura do usuário logado
+            garantir_estrutura_usuario(usuario_encontrado[1])
 
-                            print("\nEscolha a meta que deseja gerenciar:")
-                            for i, meta in enumerate(metas, 1):
-                                print(f"{i}. {meta['nome']}")
+            # ------------------- Área do Admin -------------------
+            if usuario_encontrado[3] == True:
+                print('Entrando na área do administrador...\n')
 
-                            escolha_meta = input("Número da meta: ").strip()
+                while True:
+                    print('\n=== ÁREA DO ADMIN ===')
+                    print(f'1. Ver solicitações de suporte ({len(fila_suporte.pendentes)} pendentes)')
+                    print('2. Responder solicitação')
+                    print('3. Pesquisar solicitações')
+                    print('4. Exportar dados')
+                    print('0. Sair')
 
-                            if not escolha_meta.isdigit() or not (1 <= int(escolha_meta) <= len(metas)):
-                                print("Número inválido.")
-                                continue
+                    opcao_admin = perguntar('Escolha: ').strip()
 
-                            meta = metas[int(escolha_meta) - 1]
-
-                            while True:
-                                print(f"\n--- Submetas da meta: {meta['nome']} ---")
-                                print("1. Adicionar submeta")
-                                print("2. Ver submetas")
-                                print("3. Editar progresso de uma submeta")
-                                print("4. Renomear submeta")
-                                print("5. Excluir submeta")
-                                print("6. Marcar submeta como concluída")
-                                print("0. Voltar")
-
-                                subopc = input("Escolha: ").strip()
-
-                                if subopc == '1':
-                                    nome_sub = input("\nNome da submeta: ").strip()
-                                    if nome_sub:
-                                        meta["submetas"].append({"nome": nome_sub, "progresso": 0, "concluida": False})
-                                        salvar_tudo()
-                                        print("Submeta adicionada!")
-                                    else:
-                                        print("Você não digitou nada.")
+                    if opcao_admin == '1':
+                        print('\n=== SOLICITAÇÕES DE SUPORTE ===')
 
-                                elif subopc == '2':
-                                    if not meta["submetas"]:
-                                        print("Nenhuma submeta cadastrada.")
-                                    else:
-                                        print("\nSubmetas:")
-                                        for i, s in enumerate(meta["submetas"], 1):
-                                            status = "✓" if s.get("concluida", False) else ""
-                                            print(f"{i}. {s['nome']} - {s['progresso']}% {status}")
-
-                                elif subopc == '3':
-                                    if not meta["submetas"]:
-                                        print("Nenhuma submeta cadastrada.")
-                                        continue
-
-                                    for i, s in enumerate(meta["submetas"], 1):
-                                        print(f"{i}. {s['nome']} - {s['progresso']}%")
+                        if len(solicitacoes) == 0:
+                            print('Nenhuma solicitação encontrada.\n')
+                        else:
+                            paginar_solicitacoes()
+                        print()
 
-                                    idx = input("Escolha a submeta: ").strip()
-                                    if not idx.isdigit() or not (1 <= int(idx) <= len(meta["submetas"])):
-                                        print("Número inválido.")
-                                        continue
+                    elif opcao_admin == '2':
+                        if len(solicitacoes) == 0:
+                            print('Nenhuma solicitação encontrada.\n')
+                        else:
+                            print('=== Responder solicitação ===')
+                            if fila_suporte.pendentes:
+                                paginar_solicitacoes(so_pendentes=True)
+                            else:
+                                print('Nenhuma solicitação pendente.')
+
+                            try:
+                                escolha = int(perguntar("Digite o número (#) da solicitação para responder: ").strip().lstrip('#'))
+                                if fila_suporte.buscar(escolha) is not None:
+                                    resposta = perguntar("Digite sua resposta: ").strip()
+                                    idx = fila_suporte.responder(escolha, resposta)
+                                    salvar_tudo(("solicitacoes", idx))
+                                    print("Solicitação marcada como respondida!\n")
+                                else:
+                                    print("Solicitação não encontrada.\n")
+                            except ValueError:
+                                print("Entrada inválida, digite um número.\n")
+
+                    elif opcao_admin == '3':
+                        termo = perguntar('Palavras para pesquisar nas dúvidas: ').strip()
+                        encontradas = fila_suporte.pesquisar(termo)
+                        if not encontradas:
+                            print('Nenhuma solicitação encontrada.\n')
+                        for s in encontradas:
+                            mostrar_solicitacao(s)
+
+                    elif opcao_admin == '4':
+                        formato = perguntar('Formato (csv ou ndjson, Enter = csv): ').strip().lower() or 'csv'
+                        pasta = perguntar('Pasta de destino (Enter = exportacao): ').strip() or 'exportacao'
+                        emails = perguntar('E-mails separados por vírgula (Enter = todos): ').strip()
+                        entidades = perguntar(f'Entidades ({", ".join(CAMPOS_EXPORTACAO)}; Enter = todas): ').strip()
+                        try:
+                            contagem = exportar(pasta, formato,
+                                                [e.strip() for e in emails.split(',') if e.strip()] or None,
+                                                [e.strip() for e in entidades.split(',') if e.strip()] or None)
+                            print('Exportação concluída:')
+                            mostrar_exportacao(pasta, formato, contagem)
+                        except (ValueError, OSError) as erro:
+                            print(f'Não foi possível exportar: {erro}')
+                        print()
+
+                    elif opcao_admin == '0':
+                        print('Saindo...\n')
+                        break
+                    else:
+                        print('Opção inválida!\n')
 
-                                    nova = input("Novo progresso (0 – 100): ").strip()
-                                    if nova.isdigit() and 0 <= int(nova) <= 100:
-                                        meta["submetas"][int(idx) - 1]["progresso"] = int(nova)
-                                        if int(nova) == 100:
-                                            meta["submetas"][int(idx) - 1]["concluida"] = True
-                                        salvar_tudo()
-                                        print("Progresso atualizado!")
-                                    else:
-                                        print("Valor inválido.")
+            # ------------------- Área do Usuário Comum -------------------
+            else:
+                email_logado = usuario_encontrado[1]
+                # carrega dados locais
+                user_data = usuarios_dados[email_logado]
+                metas = user_data["metas"]
+                anotacoes = user_data["anotacoes"]
+                lembretes = user_data["lembretes"]
+                pomodoro = None  # sessão Pomodoro em segundo plano, se houver
+                agendar_lembretes_usuario(email_logado)
+
+                respostas_novas = fila_suporte.nao_lidas.get(email_logado.lower(), 0)
+                if respostas_novas:
+                    print(f'Você tem {respostas_novas} resposta(s) nova(s) do suporte. Veja em "6. Suporte".')
+
+                # loop principal do usuário
+                while True:
+                    print('\n=== BEM VINDO AO STUDYON ===')
+                    print('  --- Menu Principal ---  ')
+                    print('1. Metas')
+                    print('2. Cronograma')
+                    print('3. Anotações')
+                    print('4. Lembretes')
+                    print('5. Cronômetro Pomodoro')
+                    print('6. Suporte')
+                    print('7. Estatísticas')
+                    print('0. Sair')
+                    escolha = perguntar('Escolha uma opção: ').strip()
+
+                    # ---------- Metas ----------
+                    if escolha == '1':
+                        def mostrar_barra_progresso(porcentagem):
+                            barras = int(porcentagem // 5)
+                            espacos = 20 - barras
+                            print(f"[{'█' * barras}{' ' * espacos}] {porcentagem:.1f}%")
+
+                        while True:
+                            print("\n--- Minhas Metas ---")
+                            print("1. Adicionar meta")
+                            print("2. Ver metas")
+                            print("3. Gerenciar submetas de uma meta")
+                            print("4. Progresso geral das metas")
+                            print("5. Marcar meta como concluída")
+                            print("6. Editar/Excluir meta")
+                            print("7. Próxima meta")
+                            print("0. Voltar ao menu principal")
+
+                            opc = perguntar("Escolha uma opção: ").strip()
+
+                            if opc == '1':
+                                nome = perguntar("\nDigite o nome da meta: ").strip()
+                                if nome:
+                                    prioridade = perguntar("Escolha a prioridade da meta (alta, média ou baixa): ").strip().lower()
+                                    if prioridade not in ["alta", "media", "baixa"]:
+                                        prioridade = "media"
+                                    adicionar_meta(email_logado, nome, prioridade)
+                                    salvar_tudo(("usuarios_dados", email_logado, "metas", len(metas) - 1),
+                                                ("usuarios_dados", email_logado, "proximo_id_meta"))
+                                    print("Meta adicionada com sucesso!")
+                                else:
+                                    print("Você não digitou nenhuma meta.")
 
-                                elif subopc == '4':
-                                    if not meta["submetas"]:
-                                        print("Nenhuma submeta cadastrada.")
-                                        continue
+                            elif opc == '2':
+                                if not metas:
+                                    print("Nenhuma meta cadastrada.")
+                                else:
+                                    # em ordem de prioridade; o número é o mesmo das outras opções
+                                    print("\nMetas (por prioridade):")
+                                    for pos, meta in indice_metas(email_logado).em_ordem():
+                                        if meta["concluida"]:
+                                            status = "✓ CONCLUÍDA"
+                                        else:
+                                            status = "em andamento"
+                                        total = progresso_no(meta)
+                                        prior = meta["prioridade"]
+                                        print(f"{pos + 1}. {meta['nome']} | Prioridade: {prior} | {status} - {total:.1f}%")
 
-                                    for i, s in enumerate(meta["submetas"], 1):
-                                        print(f"{i}. {s['nome']}")
+                            elif opc == '3':
+                                if not metas:
+                                    print("Nenhuma meta cadastrada.")
+                                    continue
 
-                                    idx = input("Escolha a submeta: ").strip()
-                                    if not idx.isdigit() or not (1 <= int(idx) <= len(meta["submetas"])):
-                                        print("Inválido.")
-                                        continue
+                                print("\nEscolha a meta que deseja gerenciar:")
+                                for i, meta in enumerate(metas, 1):
+                                    print(f"{i}. {meta['nome']}")
 
-                                    novo_nome = input("Novo nome: ").strip()
-                                    if novo_nome:
-                                        meta["submetas"][int(idx) - 1]["nome"] = novo_nome
-                                        salvar_tudo()
-                                        print("Renomeada!")
-                                    else:
-                                        print("Nome vazio.")
+                                escolha_meta = perguntar("Número da meta: ").strip()
 
-                                elif subopc == '5':
-                                    if not meta["submetas"]:
-                                        print("Nenhuma submeta cadastrada.")
-                                        continue
+                                if not escolha_meta.isdigit() or not (1 <= int(escolha_meta) <= len(metas)):
+                                    print("Número inválido.")
+                                    continue
 
-                                    for i, s in enumerate(meta["submetas"], 1):
-                                        print(f"{i}. {s['nome']}")
+                                idx_meta = int(escolha_meta) - 1
+                                gerenciar_submetas(email_logado, idx_meta, [metas[idx_meta]])
 
-                                    idx = input("Escolha a submeta: ").strip()
-                                    if idx.isdigit() and 1 <= int(idx) <= len(meta["submetas"]):
-                                        removida = meta["submetas"].pop(int(idx) - 1)
-                                        salvar_tudo()
-                                        print(f"Submeta '{removida['nome']}' excluída!")
-                                    else:
-                                        print("Inválido.")
+                            elif opc == '4':
+                                if not metas:
+                                    print("Nenhuma meta cadastrada.")
+                                else:
+                                    print("\nProgresso geral:")
+                                    mostrar_barra_progresso(progresso_geral(email_logado))
 
-                                elif subopc == '6':
-                                    if not meta["submetas"]:
-                                        print("Nenhuma submeta cadastrada.")
-                                        continue
+                            elif opc == '5':
+                                if not metas:
+                                    print("Nenhuma meta cadastrada.")
+                                    continue
 
-                                    for i, s in enumerate(meta["submetas"], 1):
-                                        status = "✓" if s.get("concluida", False) else ""
-                                        print(f"{i}. {s['nome']} - {s['progresso']}% {status}")
-
-                                    idx = input("Escolha a submeta para marcar como concluída: ").strip()
-                                    if idx.isdigit() and 1 <= int(idx) <= len(meta["submetas"]):
-                                        sub = meta["submetas"][int(idx) - 1]
-                                        sub["concluida"] = not sub.get("concluida", False)
-                                        if sub["concluida"]:
-                                            sub["progresso"] = 100
-                                            print(f"Submeta '{sub['nome']}' marcada como concluída!")
-                                        else:
-                                            print(f"Submeta '{sub['nome']}' desmarcada.")
-                                        salvar_tudo()
+                                print("\nEscolha a meta para marcar como concluída:")
+                                for i, meta in enumerate(metas, 1):
+                                    status = "✓" if meta["concluida"] else ""
+                                    print(f"{i}. {meta['nome']} {status}")
+
+                                idx = perguntar("Número da meta: ").strip()
+                                if idx.isdigit() and 1 <= int(idx) <= len(metas):
+                                    meta = metas[int(idx) - 1]
+                                    if alternar_conclusao(email_logado, [meta]):
+                                        print(f"Meta '{meta['nome']}' marcada como concluída!")
                                     else:
-                                        print("Inválido.")
-
-                                elif subopc == '0':
-                                    break
+                                        print(f"Meta '{meta['nome']}' desmarcada.")
+                                    salvar_meta(email_logado, int(idx) - 1)
                                 else:
-                                    print("Opção inválida.")
-
-                        elif opc == '4':
-                            if not metas:
-                                print("Nenhuma meta cadastrada.")
-                            else:
-                                total_metas = 0
-                                for meta in metas:
-                                    if meta.get("concluida", False):
-                                        total_metas += 100
-                                    else:
-                                        sbs = meta["submetas"]
-                                        if sbs:
-                                            prog = sum(s.get("progresso", 0) for s in sbs) / len(sbs)
-                                            total_metas += prog
-                                geral = total_metas / len(metas) if metas else 0
-                                print("\nProgresso geral:")
-                                mostrar_barra_progresso(geral)
-
-                        elif opc == '5':
-                            if not metas:
-                                print("Nenhuma meta cadastrada.")
-                                continue
+                                    print("Número inválido.")
 
-                            print("\nEscolha a meta para marcar como concluída:")
-                            for i, meta in enumerate(metas, 1):
-                                status = "✓" if meta.get("concluida", False) else ""
-                                print(f"{i}. {meta['nome']} {status}")
-
-                            idx = input("Número da meta: ").strip()
-                            if idx.isdigit() and 1 <= int(idx) <= len(metas):
-                                meta = metas[int(idx) - 1]
-                                meta["concluida"] = not meta.get("concluida", False)
-                                if meta["concluida"]:
-                                    print(f"Meta '{meta['nome']}' marcada como concluída!")
-                                else:
-                                    print(f"Meta '{meta['nome']}' desmarcada.")
-                                salvar_tudo()
-                            else:
-                                print("Número inválido.")
+                            elif opc == '6':
+                                if not metas:
+                                    print("Nenhuma meta cadastrada.")
+                                    continue
 
-                        elif opc == '6':
-                            if not metas:
-                                print("Nenhuma meta cadastrada.")
-                                continue
+                                print("\nEscolha a meta para editar/excluir:")
+                                for i, meta in enumerate(metas, 1):
+                                    print(f"{i}. {meta['nome']}")
 
-                            print("\nEscolha a meta para editar/excluir:")
-                            for i, meta in enumerate(metas, 1):
-                                print(f"{i}. {meta['nome']}")
+                                idx = perguntar("Número da meta: ").strip()
+                                if not idx.isdigit() or not (1 <= int(idx) <= len(metas)):
+                                    print("Número inválido.")
+                                    continue
 
-                            idx = input("Número da meta: ").strip()
-                            if not idx.isdigit() or not (1 <= int(idx) <= len(metas)):
-                                print("Número inválido.")
-                                continue
+                                print("\n1. Renomear meta")
+                                print("2. Excluir meta")
+                                print("3. Alterar prioridade")
+                                print("0. Cancelar")
 
-                            print("\n1. Renomear meta")
-                            print("2. Excluir meta")
-                            print("3. Alterar prioridade")
-                            print("0. Cancelar")
-
-                            acao = input("Escolha: ").strip()
-                            if acao == '1':
-                                novo_nome = input("Novo nome: ").strip()
-                                if novo_nome:
-                                    metas[int(idx) - 1]["nome"] = novo_nome
-                                    salvar_tudo()
-                                    print("Meta renomeada!")
+                                acao = perguntar("Escolha: ").strip()
+                                if acao == '1':
+                                    novo_nome = perguntar("Novo nome: ").strip()
+                                    if novo_nome:
+                                        metas[int(idx) - 1]["nome"] = novo_nome
+                                        salvar_tudo(("usuarios_dados", email_logado, "metas", int(idx) - 1))
+                                        print("Meta renomeada!")
+                                    else:
+                                        print("Nome vazio.")
+                                elif acao == '2':
+                                    removida = remover_meta(email_logado, int(idx) - 1)
+                                    salvar_tudo(("usuarios_dados", email_logado, "metas"), ("usuarios_dados", email_logado, "soma_metas"))
+                                    print(f"Meta '{removida['nome']}' excluída!")
+                                elif acao == '3':
+                                    nova_prior = perguntar("Nova prioridade (alta, média ou baixa): ").strip().lower()
+                                    if nova_prior in ["alta", "media", "baixa"]:
+                                        definir_prioridade(email_logado, int(idx) - 1, nova_prior)
+                                        salvar_tudo(("usuarios_dados", email_logado, "metas", int(idx) - 1))
+                                        print("Prioridade atualizada!")
+                                    else:
+                                        print("Valor inválido.")
+                                elif acao == '0':
+                                    print("Operação cancelada.")
                                 else:
-                                    print("Nome vazio.")
-                            elif acao == '2':
-                                removida = metas.pop(int(idx) - 1)
-                                salvar_tudo()
-                                print(f"Meta '{removida['nome']}' excluída!")
-                            elif acao == '3':
-                                nova_prior = input("Nova prioridade (alta, média ou baixa): ").strip().lower()
-                                if nova_prior in ["alta", "media", "baixa"]:
-                                    metas[int(idx) - 1]["prioridade"] = nova_prior
-                                    salvar_tudo()
-                                    print("Prioridade atualizada!")
+                                    print("Opção inválida.")
+
+                            elif opc == '7':
+                                if not metas:
+                                    print("Nenhuma meta cadastrada.")
+                                    continue
+                                proxima = indice_metas(email_logado).proxima()
+                                if proxima is None:
+                                    print("Todas as metas estão concluídas!")
                                 else:
-                                    print("Valor inválido.")
-                            elif acao == '0':
-                                print("Operação cancelada.")
-                            else:
-                                print("Opção inválida.")
+                                    pos, meta = proxima
+                                    print(f"\nPróxima meta: {pos + 1}. {meta['nome']} | Prioridade: {meta['prioridade']}")
+                                    mostrar_barra_progresso(progresso_no(meta))
 
-                        elif opc == '0':
-                            print("Voltando ao menu…")
-                            break
+                            elif opc == '0':
+                                print("Voltando ao menu…")
+                                break
 
-                        else:
-                            print("Opção inválida.")
-
-
-                # ---------- Cronograma ----------
-                elif escolha == '2':
-                    while True:
-                        print('\n=== CRONOGRAMA ===')
-                        print('1. Ver cronograma')
-                        print('2. Gerenciar atividades e horários')
-                        print('3. Ver relatório diário')
-                        print('0. Voltar ao menu principal')
-
-                        escolha_cron = input('Escolha: ').strip()
-
-                        if escolha_cron == '0':
-                            print('Voltando ao menu principal...')
-                            break
-
-                        elif escolha_cron == '1':
-                            print('\n' + 'CRONOGRAMA'.center(130))
-                            print('-' * 130)
-                            print(f'{"HORÁRIO":<16}', end='')
-                            for dia in dias:
-                                print(f'{dia:^16}', end='')
-                            print()
-                            for i in range(len(horarios)):
-                                print(f'{horarios[i]:<16}', end='')
-                                for j in range(len(dias)):
-                                    atividade = cronograma[i][j] if cronograma[i][j] else ' - '
-                                    print(f'{atividade:^16}', end='')
-                                print()
-                            print('-' * 130)
-
-                        elif escolha_cron == '2':
-                            while True:
-                                print('\n === GERENCIAR ATIVIDADES E HORÁRIOS ===')
-                                print('1. Adicionar atividade')
-                                print('2. Editar ou excluir atividade')
-                                print('3. Adicionar ou editar horário')
-                                print('0. Voltar')
-
-                                subescolha = input('Escolha: ').strip()
-
-                                if subescolha == '0':
-                                    break
-
-                                elif subescolha == '1':
-                                    hora = input('Digite o horário (ex: 07:00 - 08:00): ').strip()
-                                    if hora not in horarios:
-                                        print('Horário não encontrado. Aqui estão os horários disponíveis:')
-                                        for h in horarios:
-                                            print(h)
-                                        continue
+                            else:
+                                print("Opção inválida.")
 
-                                    dia = input('Digite o dia da semana (ex: Segunda): ').strip().capitalize()
-                                    if dia not in dias:
-                                        print('Dia inválido.')
-                                        continue
 
-                                    i = horarios.index(hora)
-                                    j = dias.index(dia)
-                                    atividade = input('Digite a atividade: ').strip()
-
-                                    if cronograma[i][j]:
-                                        print(f'Já existe uma atividade: {cronograma[i][j]}')
-                                        print('1. Substituir atividade')
-                                        print('2. Acrescentar atividade')
-                                        print('3. Cancelar')
-                                        escolha_op = input('Escolha: ').strip()
-
-                                        if escolha_op == '1':
-                                            cronograma[i][j] = atividade
-                                            salvar_tudo()
-                                            print('Atividade atualizada!')
-
-                                        elif escolha_op == '2':
-                                            valor_atual = str(cronograma[i][j]).strip()
-                                            if valor_atual == '':
-                                                cronograma[i][j] = atividade.strip()
+                    # ---------- Cronograma ----------
+                    elif escolha == '2':
+                        while True:
+                            print('\n=== CRONOGRAMA ===')
+                            print('1. Ver cronograma')
+                            print('2. Gerenciar atividades e horários')
+                            print('3. Ver relatório diário')
+                            print('4. Localizar atividade')
+                            print('5. Ver alguns dias do cronograma')
+                            print('0. Voltar ao menu principal')
+
+                            escolha_cron = perguntar('Escolha: ').strip()
+
+                            if escolha_cron == '0':
+                                print('Voltando ao menu principal...')
+                                break
+
+                            elif escolha_cron == '1':
+                                agora = grade_horarios(email_logado).ativo_em(minuto_atual())
+                                print(tabela_cronograma(email_logado).desenhar(agora=agora))
+
+                            elif escolha_cron == '5':
+                                escolhidos = [d.strip().capitalize() for d in
+                                              perguntar('Dias (ex: Segunda, Quarta): ').split(',') if d.strip()]
+                                invalidos = [d for d in escolhidos if d not in user_data["dias"]]
+                                if not escolhidos or invalidos:
+                                    print(f'Dia inválido: {", ".join(invalidos)}' if invalidos else 'Nenhum dia informado.')
+                                    continue
+                                agora = grade_horarios(email_logado).ativo_em(minuto_atual())
+                                print(tabela_cronograma(email_logado).desenhar(escolhidos, agora))
+
+                            elif escolha_cron == '2':
+                                while True:
+                                    print('\n === GERENCIAR ATIVIDADES E HORÁRIOS ===')
+                                    print('1. Adicionar atividade')
+                                    print('2. Editar ou excluir atividade')
+                                    print('3. Adicionar ou editar horário')
+                                    print('0. Voltar')
+
+                                    subescolha = perguntar('Escolha: ').strip()
+
+                                    if subescolha == '0':
+                                        break
+
+                                    elif subescolha == '1':
+                                        hora = normalizar_horario(perguntar('Digite o horário (ex: 07:00 - 08:00): '))
+                                        if hora not in user_data["horarios"]:
+                                            print('Horário não encontrado. Aqui estão os horários disponíveis:')
+                                            for h in user_data["horarios"]:
+                                                print(h)
+                                            continue
+
+                                        dia = perguntar('Digite o dia da semana (ex: Segunda): ').strip().capitalize()
+                                        if dia not in user_data["dias"]:
+                                            print('Dia inválido.')
+                                            continue
+
+                                        atividade = perguntar('Digite a atividade: ').strip()
+                                        atividades = atividades_da_celula(user_data, hora, dia)
+
+                                        if atividades:
+                                            print(f'Já existe uma atividade: {" + ".join(atividades)}')
+                                            print('1. Substituir atividade')
+                                            print('2. Acrescentar atividade')
+                                            print('3. Cancelar')
+                                            escolha_op = perguntar('Escolha: ').strip()
+
+                                            if escolha_op == '1':
+                                                definir_atividades(email_logado, hora, dia, [atividade] if atividade else [])
+                                                salvar_tudo(("usuarios_dados", email_logado, "celulas_cronograma", hora))
+                                                print('Atividade atualizada!')
+
+                                            elif escolha_op == '2':
+                                                if atividade:
+                                                    definir_atividades(email_logado, hora, dia, atividades + [atividade])
+                                                salvar_tudo(("usuarios_dados", email_logado, "celulas_cronograma", hora))
+                                                print('Atividade acrescentada!')
+
+                                            elif escolha_op == '3':
+                                                print('Operação cancelada!')
                                             else:
-                                                cronograma[i][j] = valor_atual + ' + ' + atividade.strip()
-                                            salvar_tudo()
-                                            print('Atividade acrescentada!')
-
-                                        elif escolha_op == '3':
-                                            print('Operação cancelada!')
+                                                print('Opção inválida!')
                                         else:
-                                            print('Opção inválida!')
-                                    else:
-                                        cronograma[i][j] = atividade
-                                        salvar_tudo()
-                                        print('Atividade adicionada!')
-
-                                elif subescolha == '2':
-                                    hora = input('Digite o horário (ex: 07:00 - 08:00): ').strip()
-                                    dia = input('Digite o dia da semana (ex: segunda): ').strip().capitalize()
-
-                                    if hora in horarios and dia in dias:
-                                        i = horarios.index(hora)
-                                        j = dias.index(dia)
-
-                                        if cronograma[i][j]:
-                                            atividades = cronograma[i][j].split(' + ')
-                                            if len(atividades) >= 1:
-                                                print('\nAtividades encontradas nesse horário: ')
-                                                for id, ativi in enumerate(atividades, start=1):
-                                                    print(f'[{id}] {ativi}')
-
-                                                escolha_atividade = input('Qual atividade deseja alterar/excluir? ').strip()
-                                                try:
-                                                    escolha_atividade = int(escolha_atividade)
-                                                    if 1 <= escolha_atividade <= len(atividades):
-                                                        print('\n[1] Editar atividade')
-                                                        print('[2] Excluir atividade')
-
-                                                        acao = input('Escolha: ').strip()
-
-                                                        if acao == '1':
-                                                            nova_atividade = input('Nova descrição: ').strip()
-                                                            atividades[escolha_atividade - 1] = nova_atividade
-                                                            cronograma[i][j] = ' + '.join(atividades)
-                                                            salvar_tudo()
-                                                            print('Atividade editada!')
-
-                                                        elif acao == '2':
-                                                            atividades.pop(escolha_atividade - 1)
-                                                            if atividades:
-                                                                cronograma[i][j] = ' + '.join(atividades)
+                                            definir_atividades(email_logado, hora, dia, [atividade] if atividade else [])
+                                            salvar_tudo(("usuarios_dados", email_logado, "celulas_cronograma", hora))
+                                            print('Atividade adicionada!')
+
+                                    elif subescolha == '2':
+                                        hora = normalizar_horario(perguntar('Digite o horário (ex: 07:00 - 08:00): '))
+                                        dia = perguntar('Digite o dia da semana (ex: segunda): ').strip().capitalize()
+
+                                        if hora in user_data["horarios"] and dia in user_data["dias"]:
+                                            atividades = list(atividades_da_celula(user_data, hora, dia))
+
+                                            if atividades:
+                                                if len(atividades) >= 1:
+                                                    print('\nAtividades encontradas nesse horário: ')
+                                                    for id, ativi in enumerate(atividades, start=1):
+                                                        print(f'[{id}] {ativi}')
+
+                                                    escolha_atividade = perguntar('Qual atividade deseja alterar/excluir? ').strip()
+                                                    try:
+                                                        escolha_atividade = int(escolha_atividade)
+                                                        if 1 <= escolha_atividade <= len(atividades):
+                                                            print('\n[1] Editar atividade')
+                                                            print('[2] Excluir atividade')
+
+                                                            acao = perguntar('Escolha: ').strip()
+
+                                                            if acao == '1':
+                                                                nova_atividade = perguntar('Nova descrição: ').strip()
+                                                                atividades[escolha_atividade - 1] = nova_atividade
+                                                                definir_atividades(email_logado, hora, dia, [a for a in atividades if a])
+                                                                salvar_tudo(("usuarios_dados", email_logado, "celulas_cronograma", hora))
+                                                                print('Atividade editada!')
+
+                                                            elif acao == '2':
+                                                                atividades.pop(escolha_atividade - 1)
+                                                                definir_atividades(email_logado, hora, dia, atividades)
+                                                                salvar_tudo(("usuarios_dados", email_logado, "celulas_cronograma", hora))
+                                                                print('Atividade excluída!')
                                                             else:
-                                                                cronograma[i][j] = ''
-                                                            salvar_tudo()
-                                                            print('Atividade excluída!')
+                                                                print('Opção inválida.')
+                                                                continue
                                                         else:
-                                                            print('Opção inválida.')
-                                                            continue
-                                                    else:
-                                                        print('Escolha fora do intervalo.')
-                                                except ValueError:
-                                                    print('Você deve digitar um número.')
+                                                            print('Escolha fora do intervalo.')
+                                                    except ValueError:
+                                                        print('Você deve digitar um número.')
+                                                else:
+                                                    print('Não há atividades.')
                                             else:
-                                                print('Não há atividades.')
+                                                print('Não há atividade cadastrada no dia/horário informado!')
                                         else:
-                                            print('Não há atividade cadastrada no dia/horário informado!')
-                                    else:
-                                        print('Dia ou horário inválido.')
-
-                                elif subescolha == '3':
-                                    print('\nHorários atuais:')
-                                    for h in horarios:
-                                        print(h)
-
-                                    print('\n1. Adicionar novo horário')
-                                    print('2. Editar horário existente')
-                                    print('3. Excluir horário')
-
-                                    escolha_h = input('Escolha: ').strip()
-
-                                    if escolha_h == '1':
-                                        novo_horario = input('Digite o novo horário (ex: 18:00 - 19:00): ').strip()
-
-                                        if novo_horario not in horarios:
-                                            horarios.append(novo_horario)
-                                            cronograma.append(['' for _ in dias])
-                                            salvar_tudo()
-                                            print('Horário adicionado com sucesso!')
-                                            
-                                            for i in range(len(horarios)):
-                                                for j in range(i + 1,len(horarios)):
-                                                    if horarios[i] > horarios[j]:
-                                                        horarios[i], horarios[j] = horarios[j], horarios[i]
-                                                        cronograma[i], cronograma[j] = cronograma[j], cronograma[i]                                            
-                                        else:
-                                            print('Esse horário já existe.')
+                                            print('Dia ou horário inválido.')
 
-                                    elif escolha_h == '2':
-                                        antigo_horario = input('Qual horário deseja alterar? ').strip()
+                                    elif subescolha == '3':
+                                        print('\nHorários atuais:')
+                                        for h in user_data["horarios"]:
+                                            print(h)
 
-                                        if antigo_horario in horarios:
-                                            novo_horario = input('Digite o novo horário: ').strip()
-                                            idx = horarios.index(antigo_horario)
-                                            horarios[idx] = novo_horario
-                                            salvar_tudo()
-                                            print('Horário atualizado!')
-                                        else:
-                                            print('Horário não encontrado!')
+                                        print('\n1. Adicionar novo horário')
+                                        print('2. Editar horário existente')
+                                        print('3. Excluir horário')
+
+                                        escolha_h = perguntar('Escolha: ').strip()
+
+                                        if escolha_h == '1':
+                                            novo_horario = perguntar('Digite o novo horário (ex: 18:00 - 19:00): ').strip()
+
+                                            try:
+                                                # entra direto na posição certa, sem reordenar a lista
+                                                grade_horarios(email_logado).inserir(novo_horario)
+                                                salvar_tudo(("usuarios_dados", email_logado, "horarios"))
+                                                print('Horário adicionado com sucesso!')
+                                            except ValueError as erro:
+                                                print(erro)
+
+                                        elif escolha_h == '2':
+                                            antigo_horario = perguntar('Qual horário deseja alterar? ').strip()
+
+                                            if antigo_horario in user_data["horarios"]:
+                                                novo_horario = perguntar('Digite o novo horário: ').strip()
+                                                try:
+                                                    novo_horario = grade_horarios(email_logado).renomear(antigo_horario, novo_horario)
+                                                except ValueError as erro:
+                                                    print(erro)
+                                                    continue
+                                                # as atividades acompanham o horário renomeado
+                                                renomear_linha_cronograma(email_logado, antigo_horario, novo_horario)
+                                                salvar_tudo(("usuarios_dados", email_logado, "horarios"),
+                                                            ("usuarios_dados", email_logado, "celulas_cronograma", antigo_horario),
+                                                            ("usuarios_dados", email_logado, "celulas_cronograma", novo_horario))
+                                                print('Horário atualizado!')
+                                            else:
+                                                print('Horário não encontrado!')
 
-                                    elif escolha_h == '3':
-                                        excluir = input('Qual horário deseja excluir? ').strip()
+                                        elif escolha_h == '3':
+                                            excluir = perguntar('Qual horário deseja excluir? ').strip()
+
+                                            if excluir in user_data["horarios"]:
+                                                grade_horarios(email_logado).remover(excluir)
+                                                apagar_linha_cronograma(email_logado, excluir)
+                                                salvar_tudo(("usuarios_dados", email_logado, "horarios"),
+                                                            ("usuarios_dados", email_logado, "celulas_cronograma", excluir))
+                                                print('Horário excluído com sucesso!')
+                                            else:
+                                                print('Esse horário não está incluído no cronograma.')
 
-                                        if excluir in horarios:
-                                            idx = horarios.index(excluir)
-                                            horarios.pop(idx)
-                                            cronograma.pop(idx)
-                                            salvar_tudo()
-                                            print('Horário excluído com sucesso!')
                                         else:
-                                            print('Esse horário não está incluído no cronograma.')
+                                            print('Opção inválida.')
 
                                     else:
                                         print('Opção inválida.')
 
-                                else:
-                                    print('Opção inválida.')
+                            elif escolha_cron == '3':
+                                # Relatório diário
+                                print("\n=== RELATÓRIO DIÁRIO ===")
+                                dia_escolhido = perguntar("Digite o dia da semana (ex: Segunda): ").strip().capitalize()
 
-                        elif escolha_cron == '3':
-                            # Relatório diário
-                            print("\n=== RELATÓRIO DIÁRIO ===")
-                            dia_escolhido = input("Digite o dia da semana (ex: Segunda): ").strip().capitalize()
-
-                            if dia_escolhido not in dias:
-                                print("Dia inválido.")
-                                continue
+                                if dia_escolhido not in user_data["dias"]:
+                                    print("Dia inválido.")
+                                    continue
 
-                            j = dias.index(dia_escolhido)
+                                print(f"\n=== Atividades de {dia_escolhido} ===\n")
+                                agora = grade_horarios(email_logado).ativo_em(minuto_atual()) if dia_escolhido == dia_de_hoje() else None
+                                print(tabela_cronograma(email_logado).relatorio(dia_escolhido, agora), end="")
 
-                            print(f"\n=== Atividades de {dia_escolhido} ===\n")
-                            for i in range(len(horarios)):
-                                atividade = cronograma[i][j] if cronograma[i][j] else "-"
-                                print(f"{horarios[i]:<16} | {atividade}")
+                            elif escolha_cron == '4':
+                                nome_atividade = perguntar("Nome da atividade: ").strip()
+                                posicoes, minutos = localizar_atividade(email_logado, nome_atividade)
+                                if not posicoes:
+                                    print("Atividade não encontrada no cronograma.")
+                                else:
+                                    print(f"\n=== Onde está {nome_atividade} ===\n")
+                                    for hora, dia in posicoes:
+                                        print(f"{dia:<10} {hora}")
+                                    print(f"\nTotal semanal: {minutos // 60}h{minutos % 60:02d}")
 
-                        else:
-                            print("Opção inválida.")
-
-                # ----------- Anotações -----------
-                elif escolha == '3':
-                    while True:
-                        print("\n=== ANOTAÇÕES ===")
-                        print("1. Adicionar anotação")
-                        print("2. Ver anotações")
-                        print("3. Excluir anotação")
-                        print("4. Pesquisar anotação")
-                        print("0. Voltar ao menu principal")
-
-                        op = input("Escolha uma opção: ").strip()
-
-                        if op == '1':
-                            texto = input("\nDigite sua anotação: ")
-                            if texto.strip():
-                                anotacoes.append(texto)
-                                salvar_tudo()
-                                print("Anotação adicionada com sucesso!")
                             else:
-                                print("Anotacao vazia nao adicionada.")
+                                print("Opção inválida.")
 
-                        elif op == '2':
-                            print("\n=== Minhas Anotações ===")
-                            if len(anotacoes) == 0:
-                                print("Nenhuma anotação salva.")
-                            else:
-                                for i, nota in enumerate(anotacoes, 1):
-                                    print(f"{i}. {nota}")
+                    # ----------- Anotações -----------
+                    elif escolha == '3':
+                        while True:
+                            print("\n=== ANOTAÇÕES ===")
+                            print("1. Adicionar anotação")
+                            print("2. Ver anotações")
+                            print("3. Excluir anotação")
+                            print("4. Pesquisar anotação")
+                            print("0. Voltar ao menu principal")
+
+                            op = perguntar("Escolha uma opção: ").strip()
+
+                            if op == '1':
+                                texto = perguntar("\nDigite sua anotação: ")
+                                if texto.strip():
+                                    indice_busca(email_logado, "anotacoes").adicionar(texto)
+                                    anotacoes.append(texto)
+                                    salvar_tudo(("usuarios_dados", email_logado, "anotacoes", len(anotacoes) - 1))
+                                    print("Anotação adicionada com sucesso!")
+                                else:
+                                    print("Anotacao vazia nao adicionada.")
 
-                        elif op == '3':
-                            print("\n=== Excluir Anotação ===")
-                            if len(anotacoes) == 0:
-                                print("Nenhuma anotação para excluir.")
-                            else:
-                                for i, nota in enumerate(anotacoes, 1):
-                                    print(f"{i}. {nota}")
-                                apagar = input("Digite o número da anotação para excluir: ")
-
-                                if apagar.isdigit() and 1 <= int(apagar) <= len(anotacoes):
-                                    del anotacoes[int(apagar) - 1]
-                                    salvar_tudo()
-                                    print("Anotação excluída!")
+                            elif op == '2':
+                                print("\n=== Minhas Anotações ===")
+                                if len(anotacoes) == 0:
+                                    print("Nenhuma anotação salva.")
                                 else:
-                                    print("Opção inválida.")
+                                    for i, nota in enumerate(anotacoes, 1):
+                                        print(f"{i}. {nota}")
 
-                        elif op == '4':
-                            termo = input("Digite a palavra-chave para pesquisar: ").strip().lower()
-                            resultados = [nota for nota in anotacoes if termo in nota.lower()]
-                            print("\n=== Resultados da pesquisa ===")
-                            if resultados:
-                                for i, r in enumerate(resultados, 1):
-                                    print(f"{i}. {r}")
-                            else:
-                                print("Nenhuma anotação encontrada com esse termo.")
+                            elif op == '3':
+                                print("\n=== Excluir Anotação ===")
+                                if len(anotacoes) == 0:
+                                    print("Nenhuma anotação para excluir.")
+                                else:
+                                    for i, nota in enumerate(anotacoes, 1):
+                                        print(f"{i}. {nota}")
+                                    apagar = perguntar("Digite o número da anotação para excluir: ")
+
+                                    if apagar.isdigit() and 1 <= int(apagar) <= len(anotacoes):
+                                        indice_busca(email_logado, "anotacoes").excluir(int(apagar) - 1)
+                                        del anotacoes[int(apagar) - 1]
+                                        salvar_tudo(("usuarios_dados", email_logado, "anotacoes"))
+                                        print("Anotação excluída!")
+                                    else:
+                                        print("Opção inválida.")
+
+                            elif op == '4':
+                                termo = perguntar("Digite a palavra-chave para pesquisar: ").strip().lower()
+                                resultados = pesquisar(indice_busca(email_logado, "anotacoes"), anotacoes, termo)
+                                print("\n=== Resultados da pesquisa ===")
+                                if resultados:
+                                    for i, r in enumerate(resultados, 1):
+                                        print(f"{i}. {r}")
+                                else:
+                                    print("Nenhuma anotação encontrada com esse termo.")
 
-                        elif op == '0':
-                            break
+                            elif op == '0':
+                                break
 
-                        else:
-                            print("Opção inválida. Tente novamente.")
-
-                # ---------- Lembretes ----------
-                elif escolha == "4":
-                    while True:
-                        print("\n=== LEMBRETES ===")
-                        print("1. Adicionar lembrete")
-                        print("2. Ver lembretes")
-                        print("3. Editar lembrete")
-                        print("4. Excluir lembrete")
-                        print("5. Pesquisar lembrete")
-                        print("0. Voltar ao menu principal")
-
-                        opcao = input("Escolha uma opção: ").strip()
-
-                        if opcao == "1":
-                            lembrete = input("Digite o lembrete: ").strip()
-                            if lembrete:
-                                lembretes.append(lembrete)
-                                salvar_tudo()
-                                print("Lembrete adicionado!")
                             else:
-                                print("Lembrete vazio não adicionado.")
+                                print("Opção inválida. Tente novamente.")
+
+                    # ---------- Lembretes ----------
+                    elif escolha == "4":
+                        while True:
+                            print("\n=== LEMBRETES ===")
+                            print("1. Adicionar lembrete")
+                            print("2. Ver lembretes")
+                            print("3. Editar lembrete")
+                            print("4. Excluir lembrete")
+                            print("5. Pesquisar lembrete")
+                            print("0. Voltar ao menu principal")
+
+                            opcao = perguntar("Escolha uma opção: ").strip()
+
+                            if opcao == "1":
+                                lembrete = perguntar("Digite o lembrete: ").strip()
+                                if lembrete:
+                                    try:
+                                        quando, recorrencia = perguntar_agendamento()
+                                    except ValueError:
+                                        print("Data inválida. Use DD/MM/AAAA HH:MM.")
+                                        continue
+                                    adicionar_lembrete(email_logado, lembrete, quando, recorrencia)
+                                    salvar_tudo(("usuarios_dados", email_logado, "lembretes", len(lembretes) - 1),
+                                                ("usuarios_dados", email_logado, "proximo_id_lembrete"))
+                                    print("Lembrete adicionado!")
+                                else:
+                                    print("Lembrete vazio não adicionado.")
 
-                        elif opcao == "2":
-                            print("\nLISTA DE LEMBRETES")
-                            print("==============================")
-                            if len(lembretes) == 0:
-                                print("Nenhum lembrete cadastrado.")
-                            else:
-                                for i in range(len(lembretes)):
-                                    print(f"{i+1}. {lembretes[i]}")
+                            elif opcao == "2":
+                                print("\nLISTA DE LEMBRETES")
+                                print("==============================")
+                                if len(lembretes) == 0:
+                                    print("Nenhum lembrete cadastrado.")
+                                else:
+                                    for i in range(len(lembretes)):
+                                        print(f"{i+1}. {descrever_lembrete(lembretes[i])}")
 
-                        elif opcao == "3":
-                            if len(lembretes) == 0:
-                                print("Nenhum lembrete para editar.")
-                            else:
-                                for i in range(len(lembretes)):
-                                    print(f"{i+1}. {lembretes[i]}")
-
-                                num = input("Número do lembrete para editar: ").strip()
-                                if num.isdigit():
-                                    num = int(num) - 1
-                                    if 0 <= num < len(lembretes):
-                                        novo = input("Novo texto: ")
-                                        lembretes[num] = novo
-                                        salvar_tudo()
-                                        print("Lembrete editado!")
+                            elif opcao == "3":
+                                if len(lembretes) == 0:
+                                    print("Nenhum lembrete para editar.")
+                                else:
+                                    for i in range(len(lembretes)):
+                                        print(f"{i+1}. {descrever_lembrete(lembretes[i])}")
+
+                                    num = perguntar("Número do lembrete para editar: ").strip()
+                                    if num.isdigit():
+                                        num = int(num) - 1
+                                        if 0 <= num < len(lembretes):
+                                            novo = perguntar("Novo texto (Enter mantém o atual): ").strip() or lembretes[num]["texto"]
+                                            try:
+                                                quando, recorrencia = perguntar_agendamento(lembretes[num])
+                                            except ValueError:
+                                                print("Data inválida. Use DD/MM/AAAA HH:MM.")
+                                                continue
+                                            editar_lembrete(email_logado, num, novo, quando, recorrencia)
+                                            salvar_tudo(("usuarios_dados", email_logado, "lembretes", num))
+                                            print("Lembrete editado!")
+                                        else:
+                                            print("Número inválido.")
                                     else:
                                         print("Número inválido.")
-                                else:
-                                    print("Número inválido.")
 
-                        elif opcao == "4":
-                            if len(lembretes) == 0:
-                                print("Nenhum lembrete para excluir.")
-                            else:
-                                for i in range(len(lembretes)):
-                                    print(f"{i+1}. {lembretes[i]}")
-
-                                num = input("Número do lembrete para excluir: ").strip()
-                                if num.isdigit():
-                                    num = int(num) - 1
-                                    if 0 <= num < len(lembretes):
-                                        removido = lembretes.pop(num)
-                                        salvar_tudo()
-                                        print(f"Lembrete '{removido}' excluído!")
+                            elif opcao == "4":
+                                if len(lembretes) == 0:
+                                    print("Nenhum lembrete para excluir.")
+                                else:
+                                    for i in range(len(lembretes)):
+                                        print(f"{i+1}. {descrever_lembrete(lembretes[i])}")
+
+                                    num = perguntar("Número do lembrete para excluir: ").strip()
+                                    if num.isdigit():
+                                        num = int(num) - 1
+                                        if 0 <= num < len(lembretes):
+                                            removido = excluir_lembrete(email_logado, num)
+                                            salvar_tudo(("usuarios_dados", email_logado, "lembretes"))
+                                            print(f"Lembrete '{removido['texto']}' excluído!")
+                                        else:
+                                            print("Número inválido.")
                                     else:
                                         print("Número inválido.")
-                                else:
-                                    print("Número inválido.")
 
-                        elif opcao == "5":
-                            termo = input("Digite a palavra-chave para pesquisar: ").strip().lower()
-                            resultados = [l for l in lembretes if termo in l.lower()]
-                            print("\n=== Resultados da pesquisa ===")
-                            if resultados:
-                                for i, r in enumerate(resultados, 1):
-                                    print(f"{i}. {r}")
-                            else:
-                                print("Nenhum lembrete encontrado com esse termo.")
-
-                        elif opcao == "0":
-                            print("Voltando ao menu principal...")
-                            break
+                            elif opcao == "5":
+                                termo = perguntar("Digite a palavra-chave para pesquisar: ").strip().lower()
+                                resultados = pesquisar(indice_busca(email_logado, "lembretes"), (l["texto"] for l in lembretes), termo)
+                                print("\n=== Resultados da pesquisa ===")
+                                if resultados:
+                                    for i, r in enumerate(resultados, 1):
+                                        print(f"{i}. {r}")
+                                else:
+                                    print("Nenhum lembrete encontrado com esse termo.")
 
-                        else:
-                            print("Opção inválida!")
+                            elif opcao == "0":
+                                print("Voltando ao menu principal...")
+                                break
 
-                # ---------- Cronômetro Pomodoro ----------
-                elif escolha == '5':
-                    print('\n--- Cronômetro Pomodoro ---')
-                    try:
-                        foco = int(input('Minutos de foco (padrão 25): ').strip() or '25')
-                        pausa = int(input('Minutos de pausa (padrão 5): ').strip() or '5')
-                        ciclos = int(input('Quantos ciclos você quer fazer?').strip() or '1')
-                        print('\nPomodoro iniciado! Concentre-se, evite distrações e bons estudos. \n')
-                        ciclo = 1
-                        while ciclo <= ciclos:
-                            print(f'== Ciclo {ciclo} de {ciclos} ==')
-
-                            # tempo de foco
-                            minutos_foco = foco*60
-                            print('Foco:')
-                            while minutos_foco > 0:
-                                m= minutos_foco // 60
-                                s= minutos_foco % 60
-                                print(f'{m:02d}:{s:02d}')
-                                time.sleep(1)
-                                minutos_foco-=1
-                            print('\n Foco concluído! Hora da pausa.')
-
-                            if ciclo < ciclos:
-                                minutos_pausa = pausa * 60
-                                print('Pausa: ')
-                                while minutos_pausa > 0:
-                                    m= minutos_pausa // 60
-                                    s = minutos_pausa % 60
-                                    print(f'{m:02d}:{s:02d}')
-                                    time.sleep(1)
-                                    minutos_pausa-=1
-                                print('\nPausa encerrada! Volte ao foco.')
-                            ciclo+= 1
-                    except ValueError:
-                        print('Valor inválido. Digite apenas números.')
-
-                # ---------- Suporte ----------
-                elif escolha == "6":
-                    while True:
-                        print("\n===== SUPORTE =====")
-                        print('1. Enviar nova solicitação')
-                        print('2. Ver minhas solicitações')
-                        print('0. Voltar ao menu principal')
-
-                        opcao_sup = input('Escolha: ').strip()
-
-                        if opcao_sup == '1':
-                            duvida = input('Descreva sua dúvida ou problema: ').strip()
-
-                            if duvida:
-                                solicitacoes.append({
-                                    "usuario": usuario_encontrado[0],
-                                    "email": usuario_encontrado[1],
-                                    "duvida": duvida,
-                                    "respondida": False,
-                                    "resposta": ""
-                                })
-                                salvar_tudo()
-                                print("\nObrigado por relatar seu problema!")
-                                print("Nosso suporte responderá em breve.\n")
-
-                        elif opcao_sup == '2':
-                            minhas_solicitacoes = [s for s in solicitacoes if s["email"] == usuario_encontrado[1]]
-                            if len(minhas_solicitacoes) == 0:
-                                print('Você não possui solicitações.\n')
                             else:
-                                print('\n=== Minhas Solicitações ===')
-                                for i, s in enumerate(minhas_solicitacoes, 1):
-                                    print(f'\nSolicitação {i}')
-                                    print(f'Dúvida: {s["duvida"]}')
-                                    if s['respondida']:
-                                        print(f'Resposta do admin: {s["resposta"]}')
-                                    else:
-                                        print('Ainda não respondida.')
-                            print()
-
-                        elif opcao_sup == '0':
-                            print("Voltando ao menu principal...\n")
-                            break
+                                print("Opção inválida!")
+
+                    # ---------- Cronômetro Pomodoro ----------
+                    elif escolha == '5':
+                        print('\n--- Cronômetro Pomodoro ---')
+                        if pomodoro is None or not pomodoro.status()["ativo"]:
+                            try:
+                                foco = int(perguntar('Minutos de foco (padrão 25): ').strip() or '25')
+                                pausa = int(perguntar('Minutos de pausa (padrão 5): ').strip() or '5')
+                                ciclos = int(perguntar('Quantos ciclos você quer fazer?').strip() or '1')
+                            except ValueError:
+                                print('Valor inválido. Digite apenas números.')
+                                continue
+                            if foco <= 0 or pausa < 0 or ciclos <= 0:
+                                print('Valor inválido. Digite apenas números.')
+                                continue
+                            meta_foco = None
+                            if metas:
+                                for i, meta in enumerate(metas, 1):
+                                    print(f"{i}. {meta['nome']}")
+                                escolha_meta = perguntar('Meta desta sessão (número, ou Enter para nenhuma): ').strip()
+                                if escolha_meta.isdigit() and 1 <= int(escolha_meta) <= len(metas):
+                                    meta_foco = metas[int(escolha_meta) - 1]["id"]
+                            pomodoro = Pomodoro(foco, pausa, ciclos, ao_terminar_pomodoro(email_logado, meta_foco))
+                            pomodoro.iniciar()
+                            print('\nPomodoro iniciado! Concentre-se, evite distrações e bons estudos.')
+                            print('Ele continua rodando enquanto você usa o resto do sistema.\n')
+
+                        while True:
+                            st = pomodoro.status()
+                            if not st["ativo"]:
+                                print('Sessão Pomodoro finalizada.')
+                                break
+                            situacao = ' (pausado)' if st["pausado"] else ''
+                            print(f'\n== Ciclo {st["ciclo"]} de {st["ciclos"]} | {st["tipo"].capitalize()}: {formatar_tempo(st["restante"])}{situacao} ==')
+                            print('1. Atualizar tempo restante')
+                            print('2. Retomar' if st["pausado"] else '2. Pausar')
+                            print('3. Pular para o próximo bloco')
+                            print('4. Encerrar sessão')
+                            print('0. Voltar ao menu (o Pomodoro continua)')
+                            acao_pomo = perguntar('Escolha: ').strip()
+
+                            if acao_pomo == '1':
+                                continue
+                            elif acao_pomo == '2':
+                                if st["pausado"]:
+                                    pomodoro.retomar()
+                                else:
+                                    pomodoro.pausar()
+                            elif acao_pomo == '3':
+                                pomodoro.pular()
+                            elif acao_pomo == '4':
+                                pomodoro.parar()
+                            elif acao_pomo == '0':
+                                break
+                            else:
+                                print('Opção inválida.')
+
+                    # ---------- Suporte ----------
+                    elif escolha == "6":
+                        while True:
+                            print("\n===== SUPORTE =====")
+                            print('1. Enviar nova solicitação')
+                            print('2. Ver minhas solicitações')
+                            print('0. Voltar ao menu principal')
+
+                            opcao_sup = perguntar('Escolha: ').strip()
+
+                            if opcao_sup == '1':
+                                duvida = perguntar('Descreva sua dúvida ou problema: ').strip()
+
+                                if duvida:
+                                    fila_suporte.criar(usuario_encontrado[0], usuario_encontrado[1], duvida)
+                                    salvar_tudo(("solicitacoes", len(solicitacoes) - 1))
+                                    print("\nObrigado por relatar seu problema!")
+                                    print("Nosso suporte responderá em breve.\n")
+
+                            elif opcao_sup == '2':
+                                minhas_solicitacoes = fila_suporte.do_usuario(email_logado)
+                                if len(minhas_solicitacoes) == 0:
+                                    print('Você não possui solicitações.\n')
+                                else:
+                                    print('\n=== Minhas Solicitações ===')
+                                    for s in minhas_solicitacoes:
+                                        nova = ' (nova resposta!)' if s['respondida'] and not s['lida'] else ''
+                                        print(f'\nSolicitação #{s["id"]}{nova}')
+                                        print(f'Dúvida: {s["duvida"]}')
+                                        if s['respondida']:
+                                            print(f'Resposta do admin: {s["resposta"]}')
+                                        else:
+                                            print('Ainda não respondida.')
+                                    lidas = fila_suporte.marcar_lidas(email_logado)
+                                    if lidas:
+                                        salvar_tudo(*[("solicitacoes", pos) for pos in lidas])
+                                print()
 
-                        else:
-                            print("Opção inválida!\n")
-
-                # ------- Sair -----------
-                elif escolha == "0":
-                    print("\nSaindo do sistema...")
-                    print("Obrigado por utilizar o programa! Até a próxima!\n")
-                    # salvar antes de sair da conta
-                    usuarios_dados[email_logado]["metas"] = metas
-                    usuarios_dados[email_logado]["matriz_cronograma"] = cronograma
-                    usuarios_dados[email_logado]["horarios"] = horarios
-                    usuarios_dados[email_logado]["anotacoes"] = anotacoes
-                    usuarios_dados[email_logado]["lembretes"] = lembretes
-                    salvar_tudo()
-                    break
+                            elif opcao_sup == '0':
+                                print("Voltando ao menu principal...\n")
+                                break
 
-                else:
-                    print("Opção inválida. Tente novamente.\n")
+                            else:
+                                print("Opção inválida!\n")
+
+                    # ---------- Estatísticas ----------
+                    elif escolha == "7":
+                        mostrar_estatisticas(email_logado)
+
+                    # ------- Sair -----------
+                    elif escolha == "0":
+                        print("\nSaindo do sistema...")
+                        print("Obrigado por utilizar o programa! Até a próxima!\n")
+                        if pomodoro is not None:
+                            pomodoro.parar()
+                        cancelar_lembretes_usuario(email_logado)
+                        # salvar antes de sair da conta
+                        usuarios_dados[email_logado]["metas"] = metas
+                        usuarios_dados[email_logado]["anotacoes"] = anotacoes
+                        usuarios_dados[email_logado]["lembretes"] = lembretes
+                        salvar_tudo(("usuarios_dados", email_logado))
+                        break
 
-    #----- recuperação de senha -----
-    elif opcao == '3':
-        print("\n=== Recuperação de Senha ===")
-        email_recuperacao = input("Digite seu e-mail cadastrado: ")
+                    else:
+                        print("Opção inválida. Tente novamente.\n")
 
-        usuario_encontrado = None
-        for usuario in usuarios:
-            if usuario[1].lower() == email_recuperacao.lower():
-                usuario_encontrado = usuario
-                break
+        #----- recuperação de senha -----
+        elif opcao == '3':
+            print("\n=== Recuperação de Senha ===")
+            email_recuperacao = perguntar("Digite seu e-mail cadastrado: ")
 
-        if usuario_encontrado:
-            print("E-mail encontrado. Vamos redefinir sua senha.")
-            while True:
-                novasenha = input("Digite sua nova senha (mínimo 6 caracteres e pelo menos 1 número): ")
-                if novasenha == "":
-                    print("A senha não pode ser vazia. Tente novamente.")
-                    continue
-                elif len(novasenha) < 6:
-                    print("A senha deve ter pelo menos 6 caracteres. Tente novamente.")
-                    continue
-                elif novasenha == usuario_encontrado[2]:
-                    print("A nova senha não pode ser igual à senha antiga. Tente novamente.")
-                    continue
+            usuario_encontrado = encontrar_usuario_por_email(email_recuperacao)
 
-                senha_confirmacao = input("Confirme sua nova senha: ")
-                if novasenha == senha_confirmacao:
-                    usuario_encontrado[2] = novasenha
-                    salvar_tudo()
-                    print("Senha redefinida com sucesso!\n")
-                    break
-                else:
-                    print("As senhas não coincidem. Tente novamente.\n")
+            if usuario_encontrado:
+                print("E-mail encontrado. Vamos redefinir sua senha.")
+                while True:
+                    novasenha = perguntar("Digite sua nova senha (mínimo 6 caracteres e pelo menos 1 número): ")
+                    if novasenha == "":
+                        print("A senha não pode ser vazia. Tente novamente.")
+                        continue
+                    elif len(novasenha) < 6:
+                        print("A senha deve ter pelo menos 6 caracteres. Tente novamente.")
+                        continue
+                    elif novasenha == usuario_encontrado[2]:
+                        print("A nova senha não pode ser igual à senha antiga. Tente novamente.")
+                        continue
+
+                    senha_confirmacao = perguntar("Confirme sua nova senha: ")
+                    if novasenha == senha_confirmacao:
+                        pos = alterar_senha(usuario_encontrado[1], novasenha)
+                        salvar_tudo(("usuarios", pos))
+                        print("Senha redefinida com sucesso!\n")
+                        break
+                    else:
+                        print("As senhas não coincidem. Tente novamente.\n")
+            else:
+                print("E-mail não encontrado. Verifique e tente novamente.")
         else:
-            print("E-mail não encontrado. Verifique e tente novamente.")
+            print("Opção inválida. Tente novamente.\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="StudyON")
+    parser.add_argument("--migrar-sqlite", action="store_true",
+                        help=f"copia o {DADOS_ARQUIVO} para o banco {BANCO_ARQUIVO} e sai")
+    parser.add_argument("--lote", metavar="ARQUIVO",
+                        help="aplica as operações de um arquivo NDJSON ('-' para a entrada padrão) e sai")
+    parser.add_argument("--exportar", metavar="PASTA",
+                        help="exporta os dados para arquivos CSV/NDJSON em PASTA e sai")
+    parser.add_argument("--formato", choices=FORMATOS_EXPORTACAO, default="csv",
+                        help="formato da exportação (padrão: csv)")
+    parser.add_argument("--usuario", action="append", metavar="EMAIL",
+                        help="exporta só este usuário (pode repetir)")
+    parser.add_argument("--entidade", action="append", choices=list(CAMPOS_EXPORTACAO),
+                        help="exporta só esta entidade (pode repetir)")
+    parser.add_argument("--servidor", action="store_true",
+                        help="em vez do menu, atende a API HTTP/JSON")
+    parser.add_argument("--host", default="127.0.0.1", help="endereço do servidor (padrão: 127.0.0.1)")
+    parser.add_argument("--porta", type=int, default=8080, help="porta do servidor (padrão: 8080)")
+    parser.add_argument("--medir", action="store_true",
+                        help="mede as operações principais e mostra um resumo ao sair")
+    parser.add_argument("--limite-lento", type=float, metavar="MS",
+                        help=f"anota em {LOG_OPERACOES_LENTAS} as operações mais demoradas que isso "
+                             f"(padrão: {LIMITE_LENTO_MS:g}; liga a medição)")
+    parser.add_argument("--snapshot", action="store_true",
+                        help=f"guarda agora um snapshot do {DADOS_ARQUIVO} em {PASTA_SNAPSHOTS}/ e sai")
+    parser.add_argument("--listar-snapshots", action="store_true", help="lista os snapshots guardados e sai")
+    parser.add_argument("--restaurar", nargs="?", const="", metavar="MOMENTO",
+                        help=f"volta o {DADOS_ARQUIVO} ao último snapshot até MOMENTO ('AAAA-MM-DD HH:MM' "
+                             "ou o nome de um snapshot; sem MOMENTO, o mais recente) e sai")
+    args = parser.parse_args()
+    if args.medir or args.limite_lento is not None:
+        ativar_medicao(args.limite_lento)
+    if args.migrar_sqlite:
+        migrar_para_sqlite()
+    elif args.snapshot or args.listar_snapshots or args.restaurar is not None:
+        sys.exit(0 if comando_snapshots(args.snapshot, args.restaurar) else 1)
+    elif args.exportar:
+        mostrar_exportacao(args.exportar, args.formato,
+                           exportar(args.exportar, args.formato, args.usuario, args.entidade))
+    elif args.lote:
+        if args.lote == "-":
+            sys.exit(1 if executar_lote(sys.stdin) else 0)
+        with open(args.lote, "r", encoding="utf-8") as f:
+            sys.exit(1 if executar_lote(f) else 0)
+    elif args.servidor:
+        servir(args.host, args.porta)
     else:
-        print("Opção inválida. Tente novamente.\n")
\ No newline at end of file
+        with trava_dados:
+            main()
@@ -0,0 +1,40 @@
+# Compara a busca de usuário por e-mail: varredura linear antiga x índice por hash.
+# Uso: python benchmarks/bench_indice_email.py
+import random
+import sys
+import time
+
+from comum import carregar_programa
+
+TAMANHOS = [1_000, 10_000, 100_000]
+BUSCAS = 2_000
+
+
+def busca_linear(usuarios, email):
+    for u in usuarios:
+        if u[1].lower() == email.lower():
+            return u
+    return None
+
+
+def medir(funcao, emails):
+    inicio = time.perf_counter()
+    for email in emails:
+        funcao(email)
+    return (time.perf_counter() - inicio) / len(emails) * 1e6  # µs por busca
+
+
+def main():
+    studyon = carregar_programa()
+    print(f"{'usuários':>10} {'linear (µs)':>14} {'índice (µs)':>14}")
+    for n in TAMANHOS:
+        studyon.usuarios[:] = [[f"user{i}", f"User{i}@Exemplo.com", "senha1", False] for i in range(n)]
+        studyon.indexar_usuarios()
+        emails = [f"user{random.randrange(n)}@exemplo.com" for _ in range(BUSCAS)]
+        linear = medir(lambda e: busca_linear(studyon.usuarios, e), emails[:200])
+        indice = medir(studyon.encontrar_usuario_por_email, emails)
+        print(f"{n:>10} {linear:>14.2f} {indice:>14.3f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+# Mede as operações principais sobre um dados.json sintético e grava os tempos em JSON,
+# para comparar versões do programa.
+# Uso: python benchmarks/bench_operacoes.py --usuarios 10000 --anotacoes 50000 --saida atual.json
+#      python benchmarks/bench_operacoes.py --comparar base.json
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from comum import RAIZ, carregar_programa
+from gerar_dados import gerar
+
+LIMITE_REGRESSAO = 1.2  # mais de 20% mais lento que a base é destacado
+
+
+def medir(funcao, repeticoes):
+    """Estatísticas (em ms) de `repeticoes` chamadas de funcao(i)."""
+    tempos = []
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(i)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        "repeticoes": repeticoes,
+        "media_ms": statistics.fmean(tempos),
+        "mediana_ms": statistics.median(tempos),
+        "p95_ms": tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))],
+        "minimo_ms": tempos[0]
+    }
+
+
+def desenhar_cronograma(studyon, email):
+    """Mesma montagem da opção "Ver cronograma" do menu, escrita num buffer."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        agora = studyon.grade_horarios(email).ativo_em(studyon.minuto_atual())
+        print(studyon.tabela_cronograma(email).desenhar(agora=agora))
+
+
+def versao_do_programa():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def rodar(args):
+    pasta = tempfile.mkdtemp()
+    parametros = {k: getattr(args, k) for k in ("usuarios", "metas_por_usuario", "anotacoes", "lembretes",
+                                                 "solicitacoes", "ocupacao", "semente")}
+    with open(os.path.join(pasta, "dados.json"), "w", encoding="utf-8") as f:
+        json.dump(gerar(**parametros), f, indent=4, ensure_ascii=False)
+    tamanho_arquivo = os.path.getsize(os.path.join(pasta, "dados.json"))
+
+    # a primeira execução lê o dados.json inteiro (o gerador não grava o índice de
+    # posições); depois da primeira gravação, iniciar só lê as tabelas
+    inicio = time.perf_counter()
+    studyon = carregar_programa(pasta)
+    primeira_execucao = (time.perf_counter() - inicio) * 1000
+    studyon.salvar_tudo()
+    inicio = time.perf_counter()
+    studyon = carregar_programa(pasta)
+    importacao = (time.perf_counter() - inicio) * 1000
+
+    aleatorio = random.Random(args.semente)
+    emails = [u[1] for u in studyon.usuarios[1:]]
+    for email in emails:
+        studyon.garantir_estrutura_usuario(email)
+    mais_anotacoes = max(emails, key=lambda e: len(studyon.usuarios_dados[e]["anotacoes"]))
+    mais_lembretes = max(emails, key=lambda e: len(studyon.usuarios_dados[e]["lembretes"]))
+    mais_metas = max(emails, key=lambda e: len(studyon.usuarios_dados[e]["metas"]))
+    termos = [" ".join(random.Random(i).sample(["revisar", "prova", "cálculo", "exercícios", "óptica",
+                                                "derivadas", "resumo", "semana"], k=1 + i % 2))
+              for i in range(50)]
+    r = args.repeticoes
+
+    def uma_anotacao(i):
+        email = emails[i % len(emails)]
+        studyon.usuarios_dados[email]["anotacoes"].append(f"benchmark {i}")
+        studyon.salvar_tudo(("usuarios_dados", email, "anotacoes", len(studyon.usuarios_dados[email]["anotacoes"]) - 1))
+
+    def editar_e_desenhar(i):
+        # o mesmo usuário: só o horário alterado é refeito
+        u = studyon.usuarios_dados[emails[0]]
+        studyon.definir_atividades(emails[0], u["horarios"][i % len(u["horarios"])], u["dias"][i % 7], [f"Revisão {i}"])
+        desenhar_cronograma(studyon, emails[0])
+
+    def progresso_e_proxima(i):
+        # muda o progresso de uma meta e pergunta de novo qual é a próxima
+        meta = studyon.usuarios_dados[mais_metas]["metas"][i % len(studyon.usuarios_dados[mais_metas]["metas"])]
+        if not meta["submetas"]:
+            studyon.definir_progresso(mais_metas, [meta], i % 90)
+        studyon.indice_metas(mais_metas).proxima()
+
+    def indexar(i):
+        studyon.indices_usuarios.pop(mais_anotacoes, None)
+        studyon.indice_busca(mais_anotacoes, "anotacoes")
+
+    operacoes = {
+        "carregar_dados": (lambda i: studyon.carregar_dados(), max(3, r // 20)),
+        "salvar_tudo_completo": (lambda i: studyon.salvar_tudo(), max(3, r // 20)),
+        "salvar_tudo_uma_anotacao": (uma_anotacao, max(3, r // 20)),
+        "buscar_email": (lambda i: studyon.encontrar_usuario_por_email(aleatorio.choice(emails).upper()), r * 10),
+        "indexar_anotacoes": (indexar, max(3, r // 20)),
+        "pesquisar_anotacoes": (lambda i: studyon.pesquisar(
+            studyon.indice_busca(mais_anotacoes, "anotacoes"), studyon.usuarios_dados[mais_anotacoes]["anotacoes"],
+            termos[i % len(termos)]), r),
+        "pesquisar_lembretes": (lambda i: studyon.pesquisar(
+            studyon.indice_busca(mais_lembretes, "lembretes"),
+            (l["texto"] for l in studyon.usuarios_dados[mais_lembretes]["lembretes"]), termos[i % len(termos)]), r),
+        "desenhar_cronograma": (lambda i: desenhar_cronograma(studyon, emails[i % len(emails)]), r),
+        "redesenhar_cronograma_editado": (editar_e_desenhar, r),
+        "ver_metas_por_prioridade": (lambda i: list(studyon.indice_metas(mais_metas).em_ordem()), r),
+        "proxima_meta_editada": (progresso_e_proxima, r),
+        "progresso_geral_todos": (lambda i: [studyon.progresso_geral(e) for e in emails], max(3, r // 20)),
+        "recalcular_progresso_todos": (lambda i: [studyon.recalcular_progresso(m) for e in emails
+                                                  for m in studyon.usuarios_dados[e]["metas"]], max(3, r // 20))
+    }
+    resultados = {nome: {"repeticoes": 1, "media_ms": ms, "mediana_ms": ms, "p95_ms": ms, "minimo_ms": ms}
+                  for nome, ms in (("importar_primeira_execucao", primeira_execucao),
+                                   ("importar_programa", importacao))}
+    for nome, (funcao, repeticoes) in operacoes.items():
+        print(f"medindo {nome}...", file=sys.stderr)
+        resultados[nome] = medir(funcao, repeticoes)
+
+    return {
+        "versao": versao_do_programa(),
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "modo_persistencia": studyon.MODO_PERSISTENCIA,
+        "parametros": dict(parametros, tamanho_arquivo_bytes=tamanho_arquivo,
+                           anotacoes_do_maior=len(studyon.usuarios_dados[mais_anotacoes]["anotacoes"])),
+        "resultados": resultados
+    }
+
+
+def mostrar(relatorio, base=None):
+    print(f"\nversão {relatorio['versao']} | modo {relatorio['modo_persistencia']} | {relatorio['parametros']}",
+          file=sys.stderr)
+    cabecalho = f"{'operação':<28} {'mediana (ms)':>13} {'p95 (ms)':>10}"
+    print(cabecalho + (f" {'base (ms)':>10} {'razão':>7}" if base else ""), file=sys.stderr)
+    for nome, r in relatorio["resultados"].items():
+        linha = f"{nome:<28} {r['mediana_ms']:>13.3f} {r['p95_ms']:>10.3f}"
+        anterior = base["resultados"].get(nome) if base else None
+        if anterior:
+            razao = r["mediana_ms"] / anterior["mediana_ms"] if anterior["mediana_ms"] else float("inf")
+            linha += f" {anterior['mediana_ms']:>10.3f} {razao:>6.2f}x"
+            if razao > LIMITE_REGRESSAO:
+                linha += "  <- mais lento"
+        print(linha, file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das operações principais do StudyON.")
+    parser.add_argument("--usuarios", type=int, default=1000)
+    parser.add_argument("--metas-por-usuario", type=int, default=4)
+    parser.add_argument("--anotacoes", type=int, default=10000)
+    parser.add_argument("--lembretes", type=int, default=3000)
+    parser.add_argument("--solicitacoes", type=int, default=500)
+    parser.add_argument("--ocupacao", type=float, default=0.5)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=200, help="repetições das operações rápidas")
+    parser.add_argument("--saida", help="grava o relatório JSON neste arquivo (padrão: saída padrão)")
+    parser.add_argument("--comparar", metavar="BASE", help="relatório JSON de outra versão para comparar")
+    args = parser.parse_args()
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            base = json.load(f)
+    saida = os.path.abspath(args.saida) if args.saida else None  # o benchmark muda de pasta
+    relatorio = rodar(args)
+    mostrar(relatorio, base)
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if saida:
+        with open(saida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
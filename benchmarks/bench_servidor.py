@@ -0,0 +1,87 @@
+# Mede requisições por segundo do serviço HTTP com vários clientes simultâneos.
+# Uso: python benchmarks/bench_servidor.py [clientes] [requisicoes_por_cliente]
+import asyncio
+import json
+import sys
+import time
+
+from comum import carregar_programa
+
+CLIENTES = 50
+REQUISICOES = 40
+
+
+class Cliente:
+    """Uma conexão keep-alive com o servidor."""
+
+    def __init__(self, porta):
+        self.porta = porta
+        self.token = None
+
+    async def conectar(self):
+        self.leitor, self.escritor = await asyncio.open_connection("127.0.0.1", self.porta)
+
+    async def pedir(self, metodo, caminho, corpo=None):
+        conteudo = json.dumps(corpo).encode() if corpo is not None else b""
+        cabecalhos = f"{metodo} {caminho} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(conteudo)}\r\n"
+        if self.token:
+            cabecalhos += f"Authorization: Bearer {self.token}\r\n"
+        self.escritor.write(cabecalhos.encode() + b"\r\n" + conteudo)
+        status = int((await self.leitor.readline()).split()[1])
+        tamanho = 0
+        while (linha := await self.leitor.readline()) != b"\r\n":
+            nome, _, valor = linha.decode().partition(":")
+            if nome.lower() == "content-length":
+                tamanho = int(valor)
+        resposta = json.loads(await self.leitor.readexactly(tamanho))
+        if status >= 400:
+            raise RuntimeError(f"{metodo} {caminho}: {status} {resposta}")
+        return resposta
+
+
+async def rodada(clientes, requisicoes, funcao):
+    """Todos os clientes ao mesmo tempo; devolve requisições por segundo."""
+    async def um_cliente(i, cliente):
+        for j in range(requisicoes):
+            await funcao(i, j, cliente)
+    inicio = time.perf_counter()
+    await asyncio.gather(*(um_cliente(i, c) for i, c in enumerate(clientes)))
+    return len(clientes) * requisicoes / (time.perf_counter() - inicio)
+
+
+async def medir(studyon, n_clientes, requisicoes):
+    servidor = await studyon.iniciar_servidor("127.0.0.1", 0)
+    porta = servidor.sockets[0].getsockname()[1]
+    clientes = [Cliente(porta) for _ in range(n_clientes)]
+    for i, cliente in enumerate(clientes):
+        await cliente.conectar()
+        email = f"aluno{i}@exemplo.com"
+        await cliente.pedir("POST", "/contas", {"nome": f"aluno{i}", "email": email, "senha": "senha1"})
+        cliente.token = (await cliente.pedir("POST", "/login", {"email": email, "senha": "senha1"}))["token"]
+        await cliente.pedir("POST", "/metas", {"nome": "Cálculo", "prioridade": "alta"})
+
+    leituras = await rodada(clientes, requisicoes, lambda i, j, c: c.pedir("GET", "/metas"))
+    escritas = await rodada(clientes, requisicoes,
+                            lambda i, j, c: c.pedir("POST", "/anotacoes", {"texto": f"anotação {j}"}))
+    for cliente in clientes:
+        cliente.escritor.close()
+        await cliente.escritor.wait_closed()
+    await asyncio.sleep(0.1)  # deixa o servidor ver as conexões fechando
+    servidor.close()
+    await servidor.wait_closed()
+    return leituras, escritas
+
+
+def main():
+    n_clientes = int(sys.argv[1]) if len(sys.argv) > 1 else CLIENTES
+    requisicoes = int(sys.argv[2]) if len(sys.argv) > 2 else REQUISICOES
+    studyon = carregar_programa()
+    leituras, escritas = asyncio.run(medir(studyon, n_clientes, requisicoes))
+    print(f"modo de armazenamento: {studyon.MODO_PERSISTENCIA}")
+    print(f"{n_clientes} clientes x {requisicoes} requisições")
+    print(f"{'GET /metas':>16}: {leituras:>8.0f} req/s")
+    print(f"{'POST /anotacoes':>16}: {escritas:>8.0f} req/s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,16 @@
+# Funções usadas por todos os benchmarks.
+import importlib.util
+import os
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROGRAMA = os.path.join(RAIZ, "CodigoStudyON 11.12.25.py")
+
+
+def carregar_programa(pasta=None):
+    """Importa o programa principal em `pasta` (ou numa pasta temporária, sem tocar no dados.json real)."""
+    os.chdir(pasta or tempfile.mkdtemp())
+    spec = importlib.util.spec_from_file_location("studyon", PROGRAMA)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
@@ -0,0 +1,141 @@
+# Gera um dados.json sintético (no formato atual do programa) com o tamanho pedido.
+# Uso: python benchmarks/gerar_dados.py --usuarios 10000 --anotacoes 50000 --saida dados.json
+import argparse
+import json
+import random
+import sys
+
+MATERIAS = ["Cálculo", "Física", "Química", "Biologia", "História", "Geografia", "Português",
+            "Inglês", "Programação", "Estatística", "Filosofia", "Sociologia", "Redação"]
+TOPICOS = ["limites", "derivadas", "integrais", "cinemática", "dinâmica", "óptica", "estequiometria",
+           "genética", "ecologia", "revolução", "industrial", "clima", "relevo", "sintaxe", "literatura",
+           "verbos", "funções", "vetores", "matrizes", "probabilidade", "regressão", "ética", "política",
+           "argumentação", "citologia", "termodinâmica", "eletricidade", "algoritmos", "recursão", "listas"]
+PALAVRAS = ["revisar", "exercícios", "capítulo", "resumo", "prova", "lista", "página", "professor",
+            "aula", "dúvida", "fórmula", "exemplo", "trabalho", "entregar", "estudar", "ler", "mapa",
+            "mental", "questões", "simulado", "vídeo", "anotar", "importante", "amanhã", "semana"]
+HORARIOS = ['07:00 - 08:00', '08:00 - 09:00', '09:00 - 10:00', '10:00 - 11:00',
+            '11:00 - 12:00', '14:00 - 16:00', '16:00 - 17:00', '17:00 - 18:00']
+DIAS = ['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado']
+# versões do formato que o programa grava (ESQUEMA_ARQUIVO / ESQUEMA_AREA): os dados
+# gerados já estão no formato atual e não são migrados no login
+ESQUEMA_ARQUIVO = 1
+ESQUEMA_AREA = 5
+
+
+def frase(aleatorio, minimo=4, maximo=12):
+    n = aleatorio.randint(minimo, maximo)
+    return " ".join(aleatorio.choice(PALAVRAS + TOPICOS + MATERIAS) for _ in range(n))
+
+
+def progresso(no):
+    """Mesma regra do programa: concluída = 100, com submetas = média, senão o progresso próprio."""
+    if no.get("concluida"):
+        return 100
+    if no.get("submetas"):
+        return no["soma_submetas"] / len(no["submetas"])
+    return no.get("progresso", 0)
+
+
+def gerar_submetas(aleatorio, profundidade):
+    submetas = []
+    for _ in range(aleatorio.choice([0, 0, 1, 2, 3, 4])):
+        no = {"nome": aleatorio.choice(TOPICOS).capitalize(), "progresso": aleatorio.choice([0, 10, 25, 50, 75, 100]),
+              "concluida": False}
+        if profundidade < 2 and aleatorio.random() < 0.2:
+            no["submetas"] = gerar_submetas(aleatorio, profundidade + 1)
+            no["soma_submetas"] = sum(progresso(s) for s in no["submetas"])
+        no["concluida"] = progresso(no) == 100
+        submetas.append(no)
+    return submetas
+
+
+def gerar_area(aleatorio, metas, anotacoes, lembretes, ocupacao):
+    area = {
+        "metas": [],
+        "cronograma": [],  # horários e dias ficam no padrão: o programa não grava essas chaves
+        "celulas_cronograma": {},
+        "anotacoes": [frase(aleatorio) for _ in range(anotacoes)],
+        "lembretes": [],
+        "soma_metas": 0,
+        "pomodoro": {"registros": [], "foco_por_dia": {}, "foco_por_semana": {}, "foco_por_meta": {},
+                     "foco_total": 0, "sequencia": {"ultimo_dia": None, "atual": 0, "melhor": 0}},
+        "proximo_id_lembrete": lembretes,
+        "proximo_id_meta": metas,
+        "esquema": ESQUEMA_AREA
+    }
+    for i in range(metas):
+        meta = {"id": i, "nome": aleatorio.choice(MATERIAS), "submetas": gerar_submetas(aleatorio, 0),
+                "concluida": False, "prioridade": aleatorio.choice(["alta", "media", "baixa"])}
+        meta["soma_submetas"] = sum(progresso(s) for s in meta["submetas"])
+        area["metas"].append(meta)
+        area["soma_metas"] += progresso(meta)
+    for horario in HORARIOS:
+        for dia in DIAS:
+            if aleatorio.random() < ocupacao:
+                area["celulas_cronograma"].setdefault(horario, {})[dia] = [aleatorio.choice(MATERIAS)]
+    for i in range(lembretes):
+        quando = None
+        if aleatorio.random() < 0.6:
+            quando = f"2030-{aleatorio.randint(1, 12):02d}-{aleatorio.randint(1, 28):02d} {aleatorio.randint(7, 22):02d}:00"
+        area["lembretes"].append({"id": i, "texto": frase(aleatorio, 2, 6), "quando": quando,
+                                  "recorrencia": aleatorio.choice([None, None, "diaria", "semanal"]) if quando else None,
+                                  "avisado": False})
+    return area
+
+
+def distribuir(aleatorio, total, partes):
+    """Divide `total` itens entre `partes` de forma desigual (uns usuários escrevem muito mais)."""
+    pesos = [aleatorio.paretovariate(1.5) for _ in range(partes)]
+    soma = sum(pesos)
+    quantidades = [int(total * p / soma) for p in pesos]
+    for i in range(total - sum(quantidades)):
+        quantidades[i % partes] += 1
+    return quantidades
+
+
+def gerar(usuarios=1000, metas_por_usuario=4, anotacoes=10000, lembretes=3000, solicitacoes=500,
+          ocupacao=0.5, semente=42):
+    """Devolve um dicionário no formato do dados.json."""
+    aleatorio = random.Random(semente)
+    dados = {"usuarios": [["admin", "admin@sistema.com", "123456", True]], "solicitacoes": [], "usuarios_dados": {},
+             "esquema": ESQUEMA_ARQUIVO}
+    por_usuario_anotacoes = distribuir(aleatorio, anotacoes, usuarios)
+    por_usuario_lembretes = distribuir(aleatorio, lembretes, usuarios)
+    for i in range(usuarios):
+        email = f"aluno{i}@escola.com"
+        dados["usuarios"].append([f"aluno{i}", email, f"senha{i}", False])
+        dados["usuarios_dados"][email] = gerar_area(
+            aleatorio, aleatorio.randint(0, 2 * metas_por_usuario),
+            por_usuario_anotacoes[i], por_usuario_lembretes[i], ocupacao)
+    for i in range(solicitacoes):
+        aluno = aleatorio.randrange(usuarios)
+        respondida = aleatorio.random() < 0.7
+        dados["solicitacoes"].append({
+            "id": i + 1, "usuario": f"aluno{aluno}", "email": f"aluno{aluno}@escola.com",
+            "duvida": frase(aleatorio), "respondida": respondida,
+            "resposta": frase(aleatorio) if respondida else "", "lida": respondida and aleatorio.random() < 0.5})
+    return dados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um dados.json sintético para os benchmarks.")
+    parser.add_argument("--usuarios", type=int, default=1000)
+    parser.add_argument("--metas-por-usuario", type=int, default=4, help="média (cada meta tem 0 a 4 submetas)")
+    parser.add_argument("--anotacoes", type=int, default=10000, help="total, distribuído entre os usuários")
+    parser.add_argument("--lembretes", type=int, default=3000, help="total, distribuído entre os usuários")
+    parser.add_argument("--solicitacoes", type=int, default=500)
+    parser.add_argument("--ocupacao", type=float, default=0.5, help="fração das células do cronograma preenchidas")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", default="dados.json")
+    args = parser.parse_args()
+    dados = gerar(args.usuarios, args.metas_por_usuario, args.anotacoes, args.lembretes,
+                  args.solicitacoes, args.ocupacao, args.semente)
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(dados, f, indent=4, ensure_ascii=False)
+    print(f"{args.saida}: {len(dados['usuarios'])} usuários, {args.anotacoes} anotações, "
+          f"{args.lembretes} lembretes, {args.solicitacoes} solicitações")
+
+
+if __name__ == "__main__":
+    sys.exit(main())